@@ -1,5 +1,6 @@
-from typing import List, Dict, Optional, Tuple
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from datetime import datetime, timezone
+import asyncio
 import json
 import re
 
@@ -22,6 +23,133 @@ class SimpleAgent:
         system_prompt: Optional[str] = None,
     ) -> Tuple[str, Optional[str]]:
         """Process user message and return response."""
+        quick_reply = self._quick_reply(user_message)
+        if quick_reply:
+            return quick_reply
+
+        llm = self._create_llm()
+        messages = self._build_messages(user_message, history, system_prompt)
+
+        # Get available tools from SkillManager
+        tools = skill_manager.get_tool_definitions()
+        
+        tool_used_names = []
+        max_tool_rounds = 5
+        for _ in range(max_tool_rounds):
+            response_message, tool_calls = await self._call_llm_with_tool_recovery(llm, messages, tools)
+
+            if not tool_calls:
+                content = getattr(response_message, "content", None)
+                if content is None and isinstance(response_message, dict):
+                    content = response_message.get("content", "")
+                return content or "", ", ".join(tool_used_names) if tool_used_names else "groq"
+
+            serialized_tool_calls = self._serialize_tool_calls(tool_calls)
+            messages.append({"role": "assistant", "content": "", "tool_calls": serialized_tool_calls})
+
+            tool_messages = await self._execute_tool_calls(tool_calls, db)
+            for tool_message in tool_messages:
+                tool_used_names.append(tool_message["name"])
+                messages.append(tool_message)
+
+        final_reply = await llm.chat(messages)
+        return final_reply, ", ".join(tool_used_names)
+
+    async def run_stream(
+        self,
+        user_message: str,
+        db=None,
+        history: Optional[List[Dict[str, str]]] = None,
+        system_prompt: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Process user message and yield events as the response is produced.
+
+        Yields dicts with a ``type`` of ``token`` (assistant text delta),
+        ``tool_start`` / ``tool_end`` (around each tool call) and finally
+        ``done`` carrying the full reply and the tools used.
+        """
+        quick_reply = self._quick_reply(user_message)
+        if quick_reply:
+            reply, tool_used = quick_reply
+            yield {"type": "token", "content": reply}
+            yield {"type": "done", "reply": reply, "tool_used": tool_used}
+            return
+
+        llm = self._create_llm()
+        messages = self._build_messages(user_message, history, system_prompt)
+        tools = skill_manager.get_tool_definitions()
+
+        tool_used_names = []
+        max_tool_rounds = 5
+        for round_index in range(max_tool_rounds + 1):
+            # The last round is the final answer without tools, like run()
+            round_tools = tools if round_index < max_tool_rounds else None
+            content_parts = []
+            tool_calls = None
+
+            try:
+                partial_tool_calls: Dict[int, Dict[str, Any]] = {}
+                async for delta in llm.chat_stream(messages, tools=round_tools):
+                    text = getattr(delta, "content", None)
+                    if text:
+                        content_parts.append(text)
+                        yield {"type": "token", "content": text}
+                    for tc_delta in getattr(delta, "tool_calls", None) or []:
+                        self._merge_tool_call_delta(partial_tool_calls, tc_delta)
+                tool_calls = [partial_tool_calls[i] for i in sorted(partial_tool_calls)]
+            except Exception as e:
+                # Tokens already sent cannot be retracted, so only recover
+                # tool calls when the round failed before producing any text
+                if content_parts:
+                    raise
+                tool_calls = self._recover_tool_calls(str(e))
+                if not tool_calls:
+                    raise
+
+            if not tool_calls:
+                reply = "".join(content_parts)
+                tool_used = ", ".join(tool_used_names) if tool_used_names else "groq"
+                yield {"type": "done", "reply": reply, "tool_used": tool_used}
+                return
+
+            serialized_tool_calls = self._serialize_tool_calls(tool_calls)
+            messages.append({"role": "assistant", "content": "", "tool_calls": serialized_tool_calls})
+
+            for tool_call in tool_calls:
+                yield {
+                    "type": "tool_start",
+                    "id": self._tool_call_id(tool_call),
+                    "name": self._tool_call_function_name(tool_call),
+                    "arguments": self._tool_call_function_arguments(tool_call),
+                }
+
+            # Report each tool as it finishes, but keep the conversation in call order
+            semaphore = asyncio.Semaphore(max(1, settings.tool_max_concurrency))
+            pending = [
+                asyncio.create_task(self._execute_tool_call_limited(semaphore, index, tool_call, db))
+                for index, tool_call in enumerate(tool_calls)
+            ]
+            tool_messages: List[Optional[Dict[str, Any]]] = [None] * len(tool_calls)
+            try:
+                for finished in asyncio.as_completed(pending):
+                    index, tool_message = await finished
+                    tool_messages[index] = tool_message
+                    yield {
+                        "type": "tool_end",
+                        "id": tool_message["tool_call_id"],
+                        "name": tool_message["name"],
+                        "result": str(tool_message["content"]),
+                    }
+            finally:
+                for task in pending:
+                    task.cancel()
+
+            for tool_message in tool_messages:
+                tool_used_names.append(tool_message["name"])
+                messages.append(tool_message)
+
+    def _quick_reply(self, user_message: str) -> Optional[Tuple[str, str]]:
+        """Answer hardcoded commands without calling the LLM."""
         normalized = user_message.lower().strip()
 
         # Hardcoded demo commands (pre-skill era) - still keeping them for fast response
@@ -34,13 +162,22 @@ class SimpleAgent:
         if normalized.startswith("echo "):
             return user_message[5:].strip(), "echo"
 
-        from .core.llm import GroqLLM
-        llm = GroqLLM(
+        return None
+
+    def _create_llm(self):
+        from .core.llm import AsyncGroqLLM
+        return AsyncGroqLLM(
             api_key=settings.groq_api_key,
             model=settings.llm_model,
         )
 
-        # Build messages list
+    def _build_messages(
+        self,
+        user_message: str,
+        history: Optional[List[Dict[str, str]]],
+        system_prompt: Optional[str],
+    ) -> List[Dict[str, Any]]:
+        """Build the LLM message list from system prompt, history and user message."""
         messages = []
         sys_p = system_prompt or "You are a helpful AI assistant."
         messages.append({"role": "system", "content": sys_p})
@@ -49,107 +186,149 @@ class SimpleAgent:
             messages.extend(history)
             
         messages.append({"role": "user", "content": user_message})
+        return messages
 
-        # Get available tools from SkillManager
-        tools = skill_manager.get_tool_definitions()
-        
-        tool_used_names = []
-        max_tool_rounds = 5
-        for _ in range(max_tool_rounds):
-            response_message, tool_calls = self._call_llm_with_tool_recovery(llm, messages, tools)
-
-            if not tool_calls:
-                content = getattr(response_message, "content", None)
-                if content is None and isinstance(response_message, dict):
-                    content = response_message.get("content", "")
-                return content or "", ", ".join(tool_used_names) if tool_used_names else "groq"
+    async def _execute_tool_calls(self, tool_calls, db) -> List[Dict[str, Any]]:
+        """Execute one round of tool calls concurrently.
 
-            serialized_tool_calls = self._serialize_tool_calls(tool_calls)
-            messages.append({"role": "assistant", "content": "", "tool_calls": serialized_tool_calls})
+        At most ``settings.tool_max_concurrency`` calls run at once. Results
+        are returned in the original tool call order so the conversation
+        stays deterministic regardless of completion order.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.tool_max_concurrency))
+        results = await asyncio.gather(
+            *(
+                self._execute_tool_call_limited(semaphore, index, tool_call, db)
+                for index, tool_call in enumerate(tool_calls)
+            )
+        )
+        return [tool_message for _, tool_message in results]
 
-            for tool_call in tool_calls:
+    async def _execute_tool_call_limited(
+        self,
+        semaphore: asyncio.Semaphore,
+        index: int,
+        tool_call,
+        db,
+    ) -> Tuple[int, Dict[str, Any]]:
+        """Execute a tool call under the round's concurrency cap and timeout."""
+        async with semaphore:
+            try:
+                tool_message = await asyncio.wait_for(
+                    self._execute_tool_call(tool_call, db),
+                    timeout=settings.tool_call_timeout,
+                )
+            except asyncio.TimeoutError:
                 function_name = self._tool_call_function_name(tool_call)
-                function_args = json.loads(self._tool_call_function_arguments(tool_call))
-
-                print(f"Agent calling tool: {function_name} with {function_args}")
-
-                # Check if email skill is being called but Gmail is not connected
-                if function_name == "email":
-                    from .skills.email.backend import GmailService
-                    gmail_service = GmailService(db)
-                    gmail_status = gmail_service.status()
-                    if not gmail_status.get("connected"):
-                        tool_result = "To access your emails, please authorize Gmail access through the Settings page. Click Settings > Email > Connect, then return to try again."
-                        tool_used_names.append(function_name)
-                        messages.append({
-                            "tool_call_id": self._tool_call_id(tool_call),
-                            "role": "tool",
-                            "name": function_name,
-                            "content": tool_result,
-                        })
-                        continue
-
-                tool_result = await skill_manager.execute_skill(function_name, function_args)
-                tool_used_names.append(function_name)
-                messages.append({
+                tool_message = {
                     "tool_call_id": self._tool_call_id(tool_call),
                     "role": "tool",
                     "name": function_name,
-                    "content": tool_result,
-                })
+                    "content": f"Error: Skill '{function_name}' timed out after {settings.tool_call_timeout:g}s.",
+                }
+            except Exception as e:
+                function_name = self._tool_call_function_name(tool_call)
+                tool_message = {
+                    "tool_call_id": self._tool_call_id(tool_call),
+                    "role": "tool",
+                    "name": function_name,
+                    "content": f"Error executing skill '{function_name}': {str(e)}",
+                }
+        return index, tool_message
 
-        final_reply = llm.chat(messages)
-        return final_reply, ", ".join(tool_used_names)
+    async def _execute_tool_call(self, tool_call, db) -> Dict[str, Any]:
+        """Execute one tool call and return the tool result message."""
+        function_name = self._tool_call_function_name(tool_call)
+        function_args = json.loads(self._tool_call_function_arguments(tool_call))
+
+        print(f"Agent calling tool: {function_name} with {function_args}")
+
+        # Check if email skill is being called but Gmail is not connected
+        tool_result = None
+        if function_name == "email":
+            from .skills.email.backend import GmailService
+            gmail_service = GmailService(db)
+            gmail_status = gmail_service.status()
+            if not gmail_status.get("connected"):
+                tool_result = "To access your emails, please authorize Gmail access through the Settings page. Click Settings > Email > Connect, then return to try again."
+
+        if tool_result is None:
+            tool_result = await skill_manager.execute_skill(function_name, function_args)
+
+        return {
+            "tool_call_id": self._tool_call_id(tool_call),
+            "role": "tool",
+            "name": function_name,
+            "content": tool_result,
+        }
 
-    def _call_llm_with_tool_recovery(self, llm, messages, tools):
+    async def _call_llm_with_tool_recovery(self, llm, messages, tools):
         """Call tool-enabled LLM and recover tool calls from known Groq formatting failures."""
         response_message = None
         tool_calls = None
         try:
-            response_message = llm.chat_with_tools(messages, tools)
+            response_message = await llm.chat_with_tools(messages, tools)
             tool_calls = getattr(response_message, "tool_calls", None)
         except Exception as e:
-            err = str(e)
-            matches = re.findall(r"<function=([A-Za-z0-9_\-]+)=?((?:.|\n)*?)</function>", err)
+            tool_calls = self._recover_tool_calls(str(e))
+            if not tool_calls:
+                raise
+
+        return response_message, tool_calls
+
+    def _recover_tool_calls(self, err: str) -> List[Any]:
+        """Parse tool calls out of a Groq "failed_generation" error message."""
+        tool_calls = []
+        matches = re.findall(r"<function=([A-Za-z0-9_\-]+)=?((?:.|\n)*?)</function>", err)
 
-            for i, (fname, jstr) in enumerate(matches):
-                raw = jstr.strip()
-                if raw.startswith("="):
-                    raw = raw[1:].strip()
-                raw = raw.replace('\"', '"').replace("\\'", "'")
+        for i, (fname, jstr) in enumerate(matches):
+            raw = jstr.strip()
+            if raw.startswith("="):
+                raw = raw[1:].strip()
+            raw = raw.replace('\"', '"').replace("\\'", "'")
 
-                args_obj = {}
-                parse_attempts = [raw]
-                if "'" in raw and '"' not in raw:
-                    parse_attempts.append(raw.replace("'", '"'))
+            args_obj = {}
+            parse_attempts = [raw]
+            if "'" in raw and '"' not in raw:
+                parse_attempts.append(raw.replace("'", '"'))
 
-                for attempt in parse_attempts:
+            for attempt in parse_attempts:
+                try:
+                    args_obj = json.loads(attempt)
+                    break
+                except Exception:
                     try:
-                        args_obj = json.loads(attempt)
+                        cleaned = re.sub(r",\s*}\s*$", "}", attempt)
+                        args_obj = json.loads(cleaned)
                         break
                     except Exception:
-                        try:
-                            cleaned = re.sub(r",\s*}\s*$", "}", attempt)
-                            args_obj = json.loads(cleaned)
-                            break
-                        except Exception:
-                            pass
-
-                tc = type("ToolCall", (), {})()
-                tc.id = f"failed-{i}"
-                fn = type("Function", (), {})()
-                fn.name = fname
-                fn.arguments = json.dumps(args_obj)
-                tc.function = fn
+                        pass
 
-                if not tool_calls:
-                    tool_calls = []
-                tool_calls.append(tc)
+            tc = type("ToolCall", (), {})()
+            tc.id = f"failed-{i}"
+            fn = type("Function", (), {})()
+            fn.name = fname
+            fn.arguments = json.dumps(args_obj)
+            tc.function = fn
 
-            if not tool_calls:
-                raise
+            tool_calls.append(tc)
 
-        return response_message, tool_calls
+        return tool_calls
+
+    def _merge_tool_call_delta(self, partial_tool_calls: Dict[int, Dict[str, Any]], tc_delta) -> None:
+        """Accumulate a streamed tool call fragment into its dict-form tool call."""
+        index = getattr(tc_delta, "index", None) or 0
+        entry = partial_tool_calls.setdefault(
+            index, {"id": "", "function": {"name": "", "arguments": ""}}
+        )
+        if getattr(tc_delta, "id", None):
+            entry["id"] = tc_delta.id
+        function_obj = getattr(tc_delta, "function", None)
+        if function_obj is not None:
+            if getattr(function_obj, "name", None):
+                entry["function"]["name"] += function_obj.name
+            if getattr(function_obj, "arguments", None):
+                entry["function"]["arguments"] += function_obj.arguments
 
     def _tool_call_id(self, tool_call):
         if isinstance(tool_call, dict):
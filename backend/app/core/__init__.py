@@ -1,13 +1,21 @@
 """Core module."""
 
+from .context_assembler import ContextAssembler, TokenCounter
 from .context_builder import ContextBuilder
-from .llm import GroqLLM
+from .keyed_lock import KeyedAsyncLock
+from .llm import AsyncGroqLLM, GroqLLM
+from .llm_cache import CompletionCache
 from .skill_executor import SkillExecutor
 from .skill_loader import SkillLoader
 
 __all__ = [
+    "AsyncGroqLLM",
+    "CompletionCache",
+    "ContextAssembler",
     "ContextBuilder",
     "GroqLLM",
+    "KeyedAsyncLock",
     "SkillExecutor",
     "SkillLoader",
+    "TokenCounter",
 ]
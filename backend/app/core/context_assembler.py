@@ -0,0 +1,257 @@
+"""Token-budgeted context assembly for chat prompts."""
+
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# tiktoken is optional - fall back to a character heuristic without it
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+# Approximate per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = "\n...[truncated]"
+
+
+class TokenCounter:
+    """Count and truncate text in LLM tokens."""
+
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        """
+        Initialize token counter.
+
+        Args:
+            encoding_name: tiktoken encoding used when tiktoken is installed.
+                Llama tokenizers differ slightly, so counts are estimates.
+        """
+        self.encoding = tiktoken.get_encoding(encoding_name) if TIKTOKEN_AVAILABLE else None
+
+    def count(self, text: str) -> int:
+        """Count tokens in text."""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + self.CHARS_PER_TOKEN - 1) // self.CHARS_PER_TOKEN
+
+    def count_message(self, message: Dict[str, str]) -> int:
+        """Count tokens of one chat message including format overhead."""
+        return self.count(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Truncate text to at most max_tokens, keeping the beginning."""
+        if self.count(text) <= max_tokens:
+            return text
+        keep = max(0, max_tokens - self.count(TRUNCATION_MARKER))
+        if self.encoding is not None:
+            head = self.encoding.decode(self.encoding.encode(text, disallowed_special=())[:keep])
+        else:
+            head = text[: keep * self.CHARS_PER_TOKEN]
+        return head + TRUNCATION_MARKER
+
+
+@dataclass
+class ContextSegment:
+    """One piece of prompt context competing for the token budget."""
+
+    name: str
+    text: str
+    priority: int
+    required: bool = False
+    truncatable: bool = False
+    tokens: int = 0
+
+
+@dataclass
+class AssembledContext:
+    """Result of fitting context segments into a token budget."""
+
+    system_prompt: str
+    history: List[Dict[str, str]]
+    budget: int
+    total_tokens: int
+    usage: Dict[str, int] = field(default_factory=dict)
+    dropped: Dict[str, int] = field(default_factory=dict)
+    truncated: List[str] = field(default_factory=list)
+
+
+class ContextAssembler:
+    """Fit system prompt, memory, summary, past sessions and history into a token budget.
+
+    Segments are admitted in priority order. When the budget runs out,
+    truncatable segments are cut down and the rest are dropped, so the
+    lowest-priority context is always the first to go. The agent's own
+    system prompt and the current user message are always kept.
+    """
+
+    SYSTEM_PRIORITY = 100
+    MEMORY_PRIORITY = 90
+    HISTORY_PRIORITY = 95  # Newest message; each older one ranks 1 lower, so ~5 outrank memory
+    SUMMARY_PRIORITY = 50
+    PAST_SESSION_PRIORITY = 20
+    MIN_TRUNCATED_TOKENS = 32
+
+    def __init__(self, budget_tokens: int, counter: Optional[TokenCounter] = None):
+        """
+        Initialize context assembler.
+
+        Args:
+            budget_tokens: Prompt token budget for the target model
+            counter: Token counter (a default one is created if omitted)
+        """
+        self.budget_tokens = budget_tokens
+        self.counter = counter or TokenCounter()
+
+    def assemble(
+        self,
+        system_prompt: str,
+        user_message: str,
+        persistent_memory: str = "",
+        past_sessions: Optional[List[str]] = None,
+        history: Optional[List[Dict[str, str]]] = None,
+        reserved_tokens: int = 0,
+        conversation_summary: str = "",
+    ) -> AssembledContext:
+        """
+        Assemble the prompt context within the budget.
+
+        Args:
+            system_prompt: Agent system prompt (always kept)
+            user_message: Current user message (always kept)
+            persistent_memory: Combined persistent memory block
+            past_sessions: Snippets from other conversations, most relevant first
+            history: Conversation history, oldest first
+            reserved_tokens: Tokens already committed elsewhere (e.g. tool definitions)
+            conversation_summary: Rolling summary of messages older than the history
+
+        Returns:
+            AssembledContext with the final system prompt, kept history and per-segment usage
+        """
+        past_sessions = past_sessions or []
+        history = history or []
+
+        segments = [
+            ContextSegment("system", system_prompt, self.SYSTEM_PRIORITY, required=True),
+            ContextSegment("user_message", user_message, self.SYSTEM_PRIORITY, required=True),
+        ]
+        if persistent_memory:
+            segments.append(
+                ContextSegment("memory", persistent_memory, self.MEMORY_PRIORITY, truncatable=True)
+            )
+        for age, message in enumerate(reversed(history)):
+            segments.append(
+                ContextSegment(
+                    f"history:{len(history) - 1 - age}",
+                    message.get("content") or "",
+                    self.HISTORY_PRIORITY - age,
+                )
+            )
+        if conversation_summary:
+            segments.append(
+                ContextSegment("summary", conversation_summary, self.SUMMARY_PRIORITY, truncatable=True)
+            )
+        for rank, snippet in enumerate(past_sessions):
+            segments.append(
+                ContextSegment(f"past_session:{rank}", snippet, self.PAST_SESSION_PRIORITY - rank)
+            )
+
+        remaining = self.budget_tokens - reserved_tokens
+        kept: Dict[str, ContextSegment] = {}
+        dropped: Dict[str, int] = {}
+        truncated: List[str] = []
+        history_cut = False
+
+        # Stable sort keeps insertion order between equal priorities
+        for segment in sorted(segments, key=lambda s: s.priority, reverse=True):
+            overhead = MESSAGE_OVERHEAD_TOKENS if segment.name.startswith(("history:", "user_message")) else 0
+            segment.tokens = self.counter.count(segment.text) + overhead
+
+            # Keep history a contiguous recent tail: once a message is dropped,
+            # every older message goes too
+            is_history = segment.name.startswith("history:")
+            if is_history and history_cut:
+                dropped["history"] = dropped.get("history", 0) + 1
+            elif segment.required or segment.tokens <= remaining:
+                kept[segment.name] = segment
+                remaining -= segment.tokens
+            elif segment.truncatable and remaining - overhead >= self.MIN_TRUNCATED_TOKENS:
+                segment.text = self.counter.truncate(segment.text, remaining - overhead)
+                segment.tokens = self.counter.count(segment.text) + overhead
+                kept[segment.name] = segment
+                remaining -= segment.tokens
+                truncated.append(segment.name)
+            else:
+                group = segment.name.split(":")[0]
+                dropped[group] = dropped.get(group, 0) + 1
+                history_cut = history_cut or is_history
+
+        kept_history = [
+            message
+            for index, message in enumerate(history)
+            if f"history:{index}" in kept
+        ]
+        kept_past_sessions = [
+            snippet
+            for rank, snippet in enumerate(past_sessions)
+            if f"past_session:{rank}" in kept
+        ]
+
+        usage: Dict[str, int] = {"reserved": reserved_tokens}
+        for segment in kept.values():
+            group = segment.name.split(":")[0]
+            usage[group] = usage.get(group, 0) + segment.tokens
+
+        return AssembledContext(
+            system_prompt=self._render_system_prompt(
+                system_prompt,
+                kept["memory"].text if "memory" in kept else "",
+                kept_past_sessions,
+                kept["summary"].text if "summary" in kept else "",
+            ),
+            history=kept_history,
+            budget=self.budget_tokens,
+            total_tokens=sum(usage.values()),
+            usage=usage,
+            dropped=dropped,
+            truncated=truncated,
+        )
+
+    def _render_system_prompt(
+        self,
+        system_prompt: str,
+        persistent_memory: str,
+        past_sessions: List[str],
+        conversation_summary: str = "",
+    ) -> str:
+        """Render the final system prompt from the kept segments."""
+        extra_context = ""
+        if conversation_summary:
+            extra_context += f"\n\n--- EARLIER IN THIS CONVERSATION ---\n{conversation_summary}"
+        if past_sessions:
+            extra_context += "\n\nRefer to past sessions if helpful:\n" + "\n".join(past_sessions)
+
+        return (
+            f"{system_prompt}\n\n"
+            f"--- PERSISTENT STATE ---\n"
+            f"{persistent_memory}\n\n"
+            f"{extra_context}"
+        )
+
+    def count_tools(self, tools: List[dict]) -> int:
+        """Estimate tokens consumed by tool definitions."""
+        if not tools:
+            return 0
+        return self.counter.count(json.dumps(tools, separators=(",", ":")))
+
+
+def get_context_budget(model: str) -> int:
+    """Get the configured prompt token budget for a model."""
+    from ..config import settings
+
+    return settings.context_budget_tokens.get(model, settings.context_budget_default_tokens)
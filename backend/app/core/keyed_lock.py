@@ -0,0 +1,97 @@
+"""Keyed async locks: serialize work per key while different keys run in parallel."""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+
+class KeyedAsyncLock:
+    """In-process registry of asyncio locks, one per key.
+
+    Locks are created on first use and dropped once nobody holds or waits
+    for them, so the registry only grows with the number of keys that are
+    busy right now. Only serializes within one process; writes that can
+    race across workers still need an optimistic check in the database,
+    whose conflicts are reported here via record_conflict().
+    """
+
+    def __init__(self):
+        """Initialize keyed lock registry."""
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}  # Holders + waiters per key
+
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.conflicts = 0
+        self.conflicts_unresolved = 0
+
+    async def acquire(self, key: str) -> None:
+        """Wait for and take the lock of key."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+
+        started = time.perf_counter()
+        contended = lock.locked()
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._forget(key)
+            raise
+
+        waited = time.perf_counter() - started
+        self.acquisitions += 1
+        if contended:
+            self.contended += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def release(self, key: str) -> None:
+        """Release the lock of key (no-op if it is not held)."""
+        lock = self._locks.get(key)
+        if lock is None or not lock.locked():
+            return
+        lock.release()
+        self._forget(key)
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        """Hold the lock of key for the duration of the block."""
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def record_conflict(self, resolved: bool = True) -> None:
+        """Count an optimistic-concurrency conflict hit by a writer."""
+        self.conflicts += 1
+        if not resolved:
+            self.conflicts_unresolved += 1
+
+    def _forget(self, key: str) -> None:
+        self._users[key] -= 1
+        if self._users[key] <= 0:
+            del self._users[key]
+            del self._locks[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get lock-wait and conflict counters."""
+        return {
+            "active_keys": len(self._locks),
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "avg_wait_seconds": round(self.wait_seconds / self.contended, 4) if self.contended else 0.0,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+            "conflicts": self.conflicts,
+            "conflicts_unresolved": self.conflicts_unresolved,
+        }
+
+
+# Chat turns on the same conversation run one at a time within a process
+conversation_locks = KeyedAsyncLock()
@@ -1,14 +1,62 @@
 """Groq LLM integration - https://console.groq.com/docs/overview"""
 
+import asyncio
 import json
 import os
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 try:
-    from groq import Groq
+    from groq import AsyncGroq, Groq
 except ImportError:
     raise ImportError("Groq SDK not installed. Install with: pip install groq")
 
+from groq.types.chat import ChatCompletionMessage
+
+from .llm_cache import CompletionCache, get_completion_cache
+
+
+# Process-wide Groq clients keyed by API key. Each client owns an HTTP
+# connection pool, so reusing them avoids a new TLS handshake per request.
+_clients: Dict[str, Groq] = {}
+_async_clients: Dict[str, AsyncGroq] = {}
+_clients_lock = threading.Lock()
+
+
+def get_shared_client(api_key: str) -> Groq:
+    """Get the shared synchronous Groq client for an API key."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = Groq(api_key=api_key)
+            _clients[api_key] = client
+        return client
+
+
+def get_shared_async_client(api_key: str) -> AsyncGroq:
+    """Get the shared asynchronous Groq client for an API key."""
+    with _clients_lock:
+        client = _async_clients.get(api_key)
+        if client is None:
+            client = AsyncGroq(api_key=api_key)
+            _async_clients[api_key] = client
+        return client
+
+
+async def close_shared_clients() -> None:
+    """Close all shared Groq clients (call on application shutdown)."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+
+    for client in clients:
+        client.close()
+    for async_client in async_clients:
+        await async_client.close()
+
 
 class GroqLLM:
     """Groq LLM integration using official Groq API."""
@@ -26,6 +74,8 @@ class GroqLLM:
         model: str = "llama-3.3-70b-versatile",
         temperature: float = 0.7,
         max_tokens: int = 2000,
+        cache: Optional[CompletionCache] = None,
+        use_cache: bool = True,
     ):
         """
         Initialize Groq LLM client.
@@ -35,6 +85,9 @@ class GroqLLM:
             model: Model name to use
             temperature: Sampling temperature (0-2)
             max_tokens: Maximum tokens in response
+            cache: Completion cache (defaults to the process-wide cache)
+            use_cache: Set False to always call the API (by default only
+                deterministic calls are cached, see _cache_key)
             
         Reference: https://console.groq.com/docs/overview
         """
@@ -47,10 +100,101 @@ class GroqLLM:
                 "Get your key from https://console.groq.com"
             )
 
-        self.client = Groq(api_key=self.api_key)
+        self.client = self._create_client()
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
+        self.cache = (cache or get_completion_cache()) if use_cache else None
+
+    def _create_client(self) -> Any:
+        """Return the shared client used for API calls."""
+        return get_shared_client(self.api_key)
+
+    @staticmethod
+    def _parse_json_content(content: str) -> Dict[str, Any]:
+        """Parse a JSON object from a completion, tolerating markdown fences."""
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            # Extract JSON from response if wrapped in markdown
+            if "```json" in content:
+                content = content.split("```json")[1].split("```")[0]
+            elif "```" in content:
+                content = content.split("```")[1].split("```")[0]
+
+            return json.loads(content.strip())
+
+    def _temperature(self, temperature: Optional[float]) -> float:
+        """Per-call temperature, falling back to the default (0 is a valid override)."""
+        return self.temperature if temperature is None else temperature
+
+    def _cache_key(
+        self,
+        kind: str,
+        messages: List[dict],
+        temperature: float,
+        tools: Optional[List[dict]] = None,
+        tool_choice: Optional[str] = None,
+        cache: Optional[bool] = None,
+    ) -> Optional[str]:
+        """
+        Build the completion cache key, or None when this call is not cached.
+
+        Sampled completions must not be replayed, so by default only
+        deterministic calls are cached: temperature 0, and structured
+        (classification-style) output.
+
+        Args:
+            cache: True to cache this call, False to skip the cache,
+                None to decide by kind and temperature
+        """
+        if self.cache is None or cache is False:
+            return None
+        if cache is None and not (kind == "structured" or temperature == 0):
+            return None
+        return self.cache.make_key(
+            kind=kind,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=self.max_tokens,
+            messages=messages,
+            tools=tools,
+            tool_choice=tool_choice,
+        )
+
+    def _cache_get(self, key: Optional[str]) -> Optional[Any]:
+        if key is None:
+            return None
+        return self.cache.get(key)
+
+    def _cache_set(self, key: Optional[str], value: Any, started: float) -> None:
+        if key is not None:
+            self.cache.set(key, value, latency=time.perf_counter() - started)
+
+    async def _cache_get_async(self, key: Optional[str]) -> Optional[Any]:
+        """Cache lookup that keeps the SQLite tier's blocking I/O off the event loop."""
+        if key is None:
+            return None
+        if self.cache.persistent:
+            return await asyncio.to_thread(self.cache.get, key)
+        return self.cache.get(key)
+
+    async def _cache_set_async(self, key: Optional[str], value: Any, started: float) -> None:
+        if key is None:
+            return
+        latency = time.perf_counter() - started
+        if self.cache.persistent:
+            await asyncio.to_thread(self.cache.set, key, value, latency)
+        else:
+            self.cache.set(key, value, latency=latency)
+
+    @staticmethod
+    def _json_prompt(prompt: str) -> str:
+        """Add the JSON-only instruction to a prompt."""
+        return (
+            f"{prompt}\n\n"
+            "Respond with ONLY a valid JSON object, no other text or markdown."
+        )
 
     def generate(self, prompt: str, temperature: Optional[float] = None) -> str:
         """
@@ -74,7 +218,7 @@ class GroqLLM:
                         "content": prompt,
                     }
                 ],
-                temperature=temperature or self.temperature,
+                temperature=self._temperature(temperature),
                 max_tokens=self.max_tokens,
             )
             return response.choices[0].message.content
@@ -85,6 +229,7 @@ class GroqLLM:
         self,
         prompt: str,
         response_format: Optional[Dict[str, Any]] = None,
+        cache: Optional[bool] = None,
     ) -> Dict[str, Any]:
         """
         Generate structured JSON response using Groq.
@@ -92,65 +237,77 @@ class GroqLLM:
         Args:
             prompt: Prompt text
             response_format: Optional JSON schema
+            cache: Set False to skip the completion cache
         
         Returns:
             Parsed JSON response
         """
         try:
             # Add JSON instruction to prompt
-            json_prompt = (
-                f"{prompt}\n\n"
-                "Respond with ONLY a valid JSON object, no other text or markdown."
-            )
+            json_prompt = self._json_prompt(prompt)
+            messages = [
+                {
+                    "role": "user",
+                    "content": json_prompt,
+                }
+            ]
+
+            key = self._cache_key("structured", messages, self.temperature, cache=cache)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
 
+            started = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": json_prompt,
-                    }
-                ],
+                messages=messages,
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
             )
 
             content = response.choices[0].message.content
-
-            # Try to parse JSON
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                # Extract JSON from response if wrapped in markdown
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0]
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0]
-
-                return json.loads(content.strip())
+            result = self._parse_json_content(content)
+            self._cache_set(key, result, started)
+            return result
 
         except Exception as e:
             raise RuntimeError(f"Groq API error: {str(e)}")
 
-    def chat(self, messages: List[dict], temperature: Optional[float] = None) -> str:
+    def chat(
+        self,
+        messages: List[dict],
+        temperature: Optional[float] = None,
+        cache: Optional[bool] = None,
+    ) -> str:
         """
         Chat with conversation history using Groq.
         
         Args:
             messages: List of {"role": "user"/"assistant"/"system", "content": "..."} dicts
             temperature: Override default temperature
+            cache: Force (True) or skip (False) the completion cache; by
+                default only temperature-0 calls are cached
         
         Returns:
             Generated text response
         """
         try:
+            temperature = self._temperature(temperature)
+            key = self._cache_key("chat", messages, temperature, cache=cache)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+            started = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
-                temperature=temperature or self.temperature,
+                temperature=temperature,
                 max_tokens=self.max_tokens,
             )
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            self._cache_set(key, content, started)
+            return content
         except Exception as e:
             raise RuntimeError(f"Groq API error: {str(e)}")
 
@@ -159,21 +316,31 @@ class GroqLLM:
         messages: List[dict], 
         tools: List[dict],
         tool_choice: str = "auto",
-        temperature: Optional[float] = None
+        temperature: Optional[float] = None,
+        cache: Optional[bool] = None,
     ) -> Any:
         """
         Chat with tool support.
         """
         try:
+            temperature = self._temperature(temperature)
+            key = self._cache_key("tools", messages, temperature, tools, tool_choice, cache)
+            cached = self._cache_get(key)
+            if cached is not None:
+                return ChatCompletionMessage.model_validate(cached)
+
+            started = time.perf_counter()
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 tools=tools,
                 tool_choice=tool_choice,
-                temperature=temperature or self.temperature,
+                temperature=temperature,
                 max_tokens=self.max_tokens,
             )
-            return response.choices[0].message
+            message = response.choices[0].message
+            self._cache_set(key, message.model_dump(exclude_none=True), started)
+            return message
         except Exception as e:
             raise RuntimeError(f"Groq API error (tools): {str(e)}")
 
@@ -200,3 +367,159 @@ class GroqLLM:
     def get_available_models() -> Dict[str, str]:
         """Get available Groq models."""
         return GroqLLM.MODELS.copy()
+
+
+class AsyncGroqLLM(GroqLLM):
+    """Non-blocking Groq LLM integration for use inside the event loop.
+
+    Mirrors the GroqLLM API with awaitable methods, backed by a shared
+    AsyncGroq client so every caller in the process reuses one connection pool.
+    """
+
+    def _create_client(self) -> Any:
+        """Return the shared async client used for API calls."""
+        return get_shared_async_client(self.api_key)
+
+    async def generate(self, prompt: str, temperature: Optional[float] = None) -> str:
+        """Generate text response using Groq."""
+        try:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt,
+                    }
+                ],
+                temperature=self._temperature(temperature),
+                max_tokens=self.max_tokens,
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            raise RuntimeError(f"Groq API error: {str(e)}")
+
+    async def generate_structured(
+        self,
+        prompt: str,
+        response_format: Optional[Dict[str, Any]] = None,
+        cache: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """Generate structured JSON response using Groq."""
+        try:
+            messages = [
+                {
+                    "role": "user",
+                    "content": self._json_prompt(prompt),
+                }
+            ]
+
+            key = self._cache_key("structured", messages, self.temperature, cache=cache)
+            cached = await self._cache_get_async(key)
+            if cached is not None:
+                return cached
+
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+            )
+
+            content = response.choices[0].message.content
+            result = self._parse_json_content(content)
+            await self._cache_set_async(key, result, started)
+            return result
+
+        except Exception as e:
+            raise RuntimeError(f"Groq API error: {str(e)}")
+
+    async def chat(
+        self,
+        messages: List[dict],
+        temperature: Optional[float] = None,
+        cache: Optional[bool] = None,
+    ) -> str:
+        """Chat with conversation history using Groq."""
+        try:
+            temperature = self._temperature(temperature)
+            key = self._cache_key("chat", messages, temperature, cache=cache)
+            cached = await self._cache_get_async(key)
+            if cached is not None:
+                return cached
+
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=self.max_tokens,
+            )
+            content = response.choices[0].message.content
+            await self._cache_set_async(key, content, started)
+            return content
+        except Exception as e:
+            raise RuntimeError(f"Groq API error: {str(e)}")
+
+    async def chat_with_tools(
+        self,
+        messages: List[dict],
+        tools: List[dict],
+        tool_choice: str = "auto",
+        temperature: Optional[float] = None,
+        cache: Optional[bool] = None,
+    ) -> Any:
+        """Chat with tool support."""
+        try:
+            temperature = self._temperature(temperature)
+            key = self._cache_key("tools", messages, temperature, tools, tool_choice, cache)
+            cached = await self._cache_get_async(key)
+            if cached is not None:
+                return ChatCompletionMessage.model_validate(cached)
+
+            started = time.perf_counter()
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                tools=tools,
+                tool_choice=tool_choice,
+                temperature=temperature,
+                max_tokens=self.max_tokens,
+            )
+            message = response.choices[0].message
+            await self._cache_set_async(key, message.model_dump(exclude_none=True), started)
+            return message
+        except Exception as e:
+            raise RuntimeError(f"Groq API error (tools): {str(e)}")
+
+    async def chat_stream(
+        self,
+        messages: List[dict],
+        tools: Optional[List[dict]] = None,
+        tool_choice: str = "auto",
+        temperature: Optional[float] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Stream a chat completion, yielding each choice delta as it arrives.
+
+        Deltas carry ``content`` text fragments and, when tools are given,
+        ``tool_calls`` fragments that the caller accumulates by ``index``.
+        """
+        tool_kwargs = {}
+        if tools:
+            tool_kwargs = {"tools": tools, "tool_choice": tool_choice}
+
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self._temperature(temperature),
+                max_tokens=self.max_tokens,
+                stream=True,
+                **tool_kwargs,
+            )
+            async for chunk in stream:
+                if chunk.choices:
+                    yield chunk.choices[0].delta
+        except Exception as e:
+            raise RuntimeError(f"Groq API error (stream): {str(e)}")
@@ -0,0 +1,180 @@
+"""Completion cache for Groq LLM calls.
+
+Identical requests (same model, sampling settings, messages and tools) are
+answered from a size-bounded in-memory LRU with TTL expiry, optionally backed
+by a SQLite tier that survives restarts.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CompletionCache:
+    """Exact-match LRU + TTL cache for LLM completions."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+        sqlite_path: Optional[str] = None,
+    ):
+        """
+        Initialize completion cache.
+
+        Args:
+            max_entries: Maximum entries kept in memory (least recently used evicted first)
+            ttl_seconds: Seconds an entry stays valid
+            sqlite_path: Optional SQLite file for a persistent second tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.sqlite_path = sqlite_path or None
+        self._entries: "OrderedDict[str, Tuple[Any, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+
+        if self.sqlite_path:
+            self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS completion_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "latency REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM completion_cache WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    @property
+    def persistent(self) -> bool:
+        """Whether lookups may hit the SQLite tier (blocking file I/O)."""
+        return self._conn is not None
+
+    @staticmethod
+    def make_key(
+        kind: str,
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        messages: List[dict],
+        tools: Optional[List[dict]] = None,
+        tool_choice: Optional[str] = None,
+    ) -> str:
+        """Build a canonical hash of everything that determines a completion."""
+        payload = {
+            "kind": kind,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "messages": messages,
+            "tools": tools,
+            "tool_choice": tool_choice,
+        }
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, latency, expires_at = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.saved_seconds += latency
+                    return value
+                del self._entries[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, latency, expires_at FROM completion_cache WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row and row[2] >= now:
+                    value = json.loads(row[0])
+                    self._store_memory(key, value, row[1], row[2])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.saved_seconds += row[1]
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, latency: float = 0.0) -> None:
+        """Store a JSON-serializable value along with the latency it cost to produce."""
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._store_memory(key, value, latency, expires_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO completion_cache (key, value, latency, expires_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), latency, expires_at),
+                )
+                self._conn.commit()
+
+    def _store_memory(self, key: str, value: Any, latency: float, expires_at: float) -> None:
+        self._entries[key] = (value, latency, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM completion_cache")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the total upstream latency saved."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self.persistent,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+_completion_cache: Optional[CompletionCache] = None
+_completion_cache_lock = threading.Lock()
+
+
+def get_completion_cache() -> Optional[CompletionCache]:
+    """Get the process-wide completion cache, or None when caching is disabled."""
+    global _completion_cache
+    from ..config import settings
+
+    if not settings.llm_cache_enabled:
+        return None
+
+    with _completion_cache_lock:
+        if _completion_cache is None:
+            _completion_cache = CompletionCache(
+                max_entries=settings.llm_cache_max_entries,
+                ttl_seconds=settings.llm_cache_ttl_seconds,
+                sqlite_path=settings.llm_cache_sqlite_path,
+            )
+        return _completion_cache
@@ -3,7 +3,7 @@
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Boolean, Column, DateTime, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -52,14 +52,68 @@ class MemoryDB(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+class KnowledgeChunkDB(Base):
+    """Chunk of a knowledge document, linked to its vector in the vector store."""
+
+    __tablename__ = "knowledge_chunks"
+    __table_args__ = (
+        Index("ix_knowledge_chunks_document_seq", "document_id", "seq", unique=True),
+    )
+
+    id = Column(String, primary_key=True)
+    document_id = Column(String, nullable=False)  # MemoryDB.id
+    seq = Column(Integer, nullable=False)  # 0-based position within the document
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False, default=0)
+    start_offset = Column(Integer, nullable=False, default=0)  # Character offsets into the document
+    end_offset = Column(Integer, nullable=False, default=0)
+    vector_id = Column(Integer, nullable=True)  # Vector store id; None until embedded
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class ConversationDB(Base):
     """Conversation history database model."""
 
     __tablename__ = "conversations"
 
     id = Column(String, primary_key=True)
-    messages = Column(Text, nullable=False)  # JSON string
+    messages = Column(Text, nullable=False, default="[]")  # Legacy JSON string, migrated to conversation_messages
+    snippet = Column(String, nullable=True)  # First message, truncated for listings
+    message_count = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=0)  # Bumped on every update (compare-and-swap)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # ORM updates run as "... WHERE id = ? AND version = ?" and raise
+    # StaleDataError if another writer got there first
+    __mapper_args__ = {"version_id_col": version}
+
+
+class ConversationMessageDB(Base):
+    """Conversation message database model (one row per message, append-only)."""
+
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation_seq", "conversation_id", "seq", unique=True),
+    )
+
+    id = Column(String, primary_key=True)
+    conversation_id = Column(String, nullable=False)
+    seq = Column(Integer, nullable=False)  # 0-based position within the conversation
+    role = Column(String, nullable=False)
+    content = Column(Text, nullable=False)
+    tool_used = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ConversationSummaryDB(Base):
+    """Rolling summary of the older part of a conversation."""
+
+    __tablename__ = "conversation_summaries"
+
+    conversation_id = Column(String, primary_key=True)
+    summary = Column(Text, nullable=False, default="")
+    summarized_count = Column(Integer, nullable=False, default=0)  # Messages folded into the summary
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
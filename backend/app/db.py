@@ -1,33 +1,161 @@
 """Database utilities and session management."""
 
-from sqlalchemy import create_engine
+import uuid
+from datetime import datetime
+
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from .config import settings
 from .database import Base
 
-# Default SQLite database
-DATABASE_URL = "sqlite:///./openpaw_v2.db"
+# Async drivers used for the async engine, keyed by backend name
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+}
+
+
+def normalize_database_url(url: str) -> str:
+    """Normalize a database URL (hosting providers often hand out "postgres://")."""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its async counterpart."""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def is_sqlite(url: str) -> bool:
+    """Check whether a database URL points at SQLite."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def sqlite_pragmas() -> Dict[str, Any]:
+    """Get the per-connection SQLite pragmas from settings."""
+    pragmas: Dict[str, Any] = {}
+    if settings.sqlite_wal:
+        # journal_mode goes first so the remaining pragmas run in WAL mode
+        pragmas["journal_mode"] = "WAL"
+    pragmas.update({
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -settings.sqlite_cache_size_kib,
+        "temp_store": "MEMORY",
+    })
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Run the given PRAGMA statements on every new connection of an engine."""
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name in pragmas:
+            cursor.execute(f"PRAGMA {name}={pragmas[name]}")
+        cursor.close()
+
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """Get pool and driver options for an engine on the given URL."""
+    options: Dict[str, Any] = {
+        "echo": settings.db_echo,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    if is_sqlite(url):
+        if make_url(url).database in (None, "", ":memory:"):
+            # In-memory databases live in a single connection, so no pool sizing
+            return {"echo": settings.db_echo, "connect_args": {"check_same_thread": False}}
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options["pool_pre_ping"] = True
+    return options
+
+
+def create_db_engine(url: str, tuned: bool = True) -> Engine:
+    """
+    Create a sync engine with the configured pool and SQLite profile.
+
+    Args:
+        url: Database URL
+        tuned: Apply the SQLite pragma profile (ignored for other databases)
+
+    Returns:
+        SQLAlchemy engine
+    """
+    engine = create_engine(url, **engine_options(url))
+    if tuned and is_sqlite(url):
+        apply_sqlite_pragmas(engine, sqlite_pragmas())
+    return engine
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    echo=False,
-)
+
+def create_async_db_engine(url: str, tuned: bool = True) -> AsyncEngine:
+    """Create an async engine on the same database as url (see create_db_engine)."""
+    async_url = to_async_url(url)
+    options = engine_options(url)
+    # aiosqlite runs its own connection thread, check_same_thread does not apply
+    options.pop("connect_args", None)
+    engine = create_async_engine(async_url, **options)
+    if tuned and is_sqlite(url):
+        apply_sqlite_pragmas(engine.sync_engine, sqlite_pragmas())
+    return engine
+
+
+DATABASE_URL = normalize_database_url(settings.database_url)
+
+engine = create_db_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine on the same database for request handlers on hot paths
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+async_engine = create_async_db_engine(DATABASE_URL)
+
+# expire_on_commit=False: async sessions cannot lazy-load expired attributes
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 def init_db():
     """Initialize database tables and migrate schema if needed."""
     Base.metadata.create_all(bind=engine)
-    _migrate_tasks_table()
+    # Column migrations predate Postgres support; create_all builds the full schema there
+    if is_sqlite(DATABASE_URL):
+        _migrate_tasks_table()
+        _migrate_conversations_table()
+    _migrate_conversation_messages()
+    if is_sqlite(DATABASE_URL):
+        _create_message_search_index()
+        _create_knowledge_search_index()
 
 
 def _migrate_tasks_table():
     """Add missing columns to the tasks table if they don't exist."""
     import sqlite3
 
-    db_path = DATABASE_URL.replace("sqlite:///./", "")
+    db_path = make_url(DATABASE_URL).database
     try:
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
@@ -52,6 +180,194 @@ def _migrate_tasks_table():
         pass  # Table might not exist yet, create_all will handle it
 
 
+def _migrate_conversations_table():
+    """Add the conversation index columns and backfill them from existing messages."""
+    import sqlite3
+
+    db_path = make_url(DATABASE_URL).database
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA table_info(conversations)")
+        existing_cols = {row[1] for row in cursor.fetchall()}
+
+        migrations = [
+            ("snippet", "TEXT"),
+            ("message_count", "INTEGER NOT NULL DEFAULT 0"),
+            ("version", "INTEGER NOT NULL DEFAULT 0"),
+        ]
+
+        added = set()
+        for col_name, col_def in migrations:
+            if col_name not in existing_cols:
+                cursor.execute(f"ALTER TABLE conversations ADD COLUMN {col_name} {col_def}")
+                added.add(col_name)
+
+        if "message_count" in added:
+            cursor.execute(
+                "UPDATE conversations SET "
+                "message_count = (SELECT COUNT(*) FROM conversation_messages m "
+                "WHERE m.conversation_id = conversations.id), "
+                "snippet = (SELECT substr(m.content, 1, 200) FROM conversation_messages m "
+                "WHERE m.conversation_id = conversations.id ORDER BY m.seq LIMIT 1)"
+            )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS ix_conversations_updated_at ON conversations (updated_at)"
+        )
+
+        conn.commit()
+        conn.close()
+    except Exception:
+        pass  # Table might not exist yet, create_all will handle it
+
+
+def _migrate_conversation_messages():
+    """Move legacy ConversationDB.messages JSON blobs into conversation_messages rows.
+
+    Runs once per conversation: migrated blobs are reset to "[]", so later
+    startups skip them.
+    """
+    import json
+
+    from .database import ConversationDB, ConversationMessageDB
+    from .services.conversation import SNIPPET_LENGTH
+
+    db = SessionLocal()
+    try:
+        legacy = db.query(ConversationDB).filter(ConversationDB.messages != "[]").all()
+        for db_conv in legacy:
+            try:
+                messages_data = json.loads(db_conv.messages or "[]")
+            except json.JSONDecodeError:
+                print(f"Skipping unreadable messages of conversation {db_conv.id}")
+                continue
+
+            for seq, msg in enumerate(messages_data):
+                created_at = msg.get("created_at")
+                db.add(
+                    ConversationMessageDB(
+                        id=msg.get("id") or str(uuid.uuid4()),
+                        conversation_id=db_conv.id,
+                        seq=seq,
+                        role=msg.get("role", "user"),
+                        content=msg.get("content", ""),
+                        tool_used=msg.get("tool_used"),
+                        created_at=datetime.fromisoformat(created_at) if created_at else db_conv.created_at,
+                    )
+                )
+            # Explicit updated_at keeps the column's onupdate from touching it
+            db.query(ConversationDB).filter(ConversationDB.id == db_conv.id).update(
+                {
+                    ConversationDB.messages: "[]",
+                    ConversationDB.message_count: len(messages_data),
+                    ConversationDB.snippet: (
+                        (messages_data[0].get("content") or "")[:SNIPPET_LENGTH]
+                        if messages_data else None
+                    ),
+                    ConversationDB.updated_at: ConversationDB.updated_at,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Conversation message migration failed: {e}")
+    finally:
+        db.close()
+
+
+def _create_message_search_index():
+    """Create the message full-text index and the triggers that keep it in sync."""
+    from .services.conversation_search import MESSAGE_SEARCH_TABLE
+
+    _create_search_index(MESSAGE_SEARCH_TABLE, "conversation_messages")
+
+
+def _create_knowledge_search_index():
+    """Create the knowledge chunk full-text index and the triggers that keep it in sync."""
+    from .services.knowledge_search import CHUNK_SEARCH_TABLE
+
+    _create_search_index(CHUNK_SEARCH_TABLE, "knowledge_chunks")
+
+
+def _create_search_index(fts_table: str, content_table: str):
+    """Create an FTS5 index over the content column of content_table.
+
+    External-content FTS5: the text is stored once, in content_table, and
+    the index refers to it by search_rowid. Both tables have string primary
+    keys, so their implicit rowid is not stable (VACUUM may renumber it);
+    search_rowid is an ordinary column, assigned once by the insert trigger,
+    that nothing renumbers. Triggers keep the index in sync.
+    """
+    import sqlite3
+
+    db_path = make_url(DATABASE_URL).database
+    try:
+        conn = sqlite3.connect(db_path)
+        cursor = conn.cursor()
+        existing = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (fts_table,),
+        ).fetchone()
+        if existing and "search_rowid" not in existing[0]:
+            # Index keyed by the implicit rowid: drop it and its triggers and rebuild
+            cursor.executescript(f"""
+                DROP TRIGGER IF EXISTS {content_table}_fts_insert;
+                DROP TRIGGER IF EXISTS {content_table}_fts_delete;
+                DROP TRIGGER IF EXISTS {content_table}_fts_update;
+                DROP TABLE {fts_table};
+            """)
+            existing = None
+
+        cursor.execute(f"PRAGMA table_info({content_table})")
+        if "search_rowid" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {content_table} ADD COLUMN search_rowid INTEGER")
+        cursor.execute(
+            f"UPDATE {content_table} SET search_rowid = rowid + "
+            f"(SELECT IFNULL(MAX(search_rowid), 0) FROM {content_table}) "
+            "WHERE search_rowid IS NULL"
+        )
+
+        cursor.executescript(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_{content_table}_search_rowid
+            ON {content_table} (search_rowid);
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                content,
+                content='{content_table}',
+                content_rowid='search_rowid',
+                tokenize='porter unicode61'
+            );
+            CREATE TRIGGER IF NOT EXISTS {content_table}_fts_insert
+            AFTER INSERT ON {content_table} BEGIN
+                UPDATE {content_table}
+                SET search_rowid = (SELECT IFNULL(MAX(search_rowid), 0) + 1 FROM {content_table})
+                WHERE rowid = new.rowid AND search_rowid IS NULL;
+                INSERT INTO {fts_table}(rowid, content)
+                SELECT search_rowid, content FROM {content_table} WHERE rowid = new.rowid;
+            END;
+            CREATE TRIGGER IF NOT EXISTS {content_table}_fts_delete
+            AFTER DELETE ON {content_table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, content)
+                VALUES ('delete', old.search_rowid, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS {content_table}_fts_update
+            AFTER UPDATE OF content ON {content_table} BEGIN
+                INSERT INTO {fts_table}({fts_table}, rowid, content)
+                VALUES ('delete', old.search_rowid, old.content);
+                INSERT INTO {fts_table}(rowid, content) VALUES (new.search_rowid, new.content);
+            END;
+        """)
+        if not existing:
+            # Index rows written before the index existed
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        # Search degrades to a LIKE scan without the index (e.g. SQLite built without FTS5)
+        print(f"Search index {fts_table} unavailable: {e}")
+
+
 def get_db() -> Session:
     """Get database session dependency."""
     db = SessionLocal()
@@ -59,3 +375,9 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Get async database session dependency."""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,3 +1,4 @@
+import asyncio
 from pathlib import Path
 from typing import Union
 import warnings
@@ -24,6 +25,9 @@ from .routes import (
     agents_router,
 )
 from .core.skill_extension_loader import load_skill_extensions
+from .core.llm import close_shared_clients
+from .services.memory_updates import memory_updates
+from .services.rag_registry import rag_registry
 
 
 class SPAStaticFiles(StaticFiles):
@@ -84,6 +88,21 @@ for ext in skill_extensions:
     app.include_router(ext.router, prefix=f"{settings.api_prefix}{ext.route_prefix}")
 
 
+@app.on_event("startup")
+async def startup() -> None:
+    """Optionally load the embedding model and vector store in the background."""
+    if settings.rag_warmup:
+        asyncio.create_task(asyncio.to_thread(rag_registry.warm_up))
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    """Run pending memory analyses and release shared LLM clients and RAG components."""
+    await memory_updates.flush_all()
+    await close_shared_clients()
+    rag_registry.shutdown()
+
+
 @app.get(f"{settings.api_prefix}/health")
 def health() -> dict[str, str]:
     """Health check endpoint."""
@@ -1,6 +1,8 @@
 """Memory package."""
 
+from .chunker import Chunk, TextChunker
+from .fact_store import MemoryFactStore
 from .knowledge_base import KnowledgeBase
 from .markdown_memory import MarkdownMemory
 
-__all__ = ["KnowledgeBase", "MarkdownMemory"]
+__all__ = ["Chunk", "KnowledgeBase", "MarkdownMemory", "MemoryFactStore", "TextChunker"]
@@ -0,0 +1,130 @@
+"""Token- and sentence-aware text chunking for the knowledge base."""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from ..core.context_assembler import TokenCounter
+
+# A sentence ends at . ! ? (plus closing quotes/brackets) followed by
+# whitespace, or at a blank line
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n")
+_WORD_RE = re.compile(r"\S+")
+
+
+@dataclass
+class Chunk:
+    """One chunk of a document."""
+
+    seq: int  # 0-based position within the document
+    text: str
+    token_count: int
+    start: int  # Character offsets into the document, end exclusive
+    end: int
+
+
+class TextChunker:
+    """Split text into chunks of at most chunk_tokens, on sentence boundaries.
+
+    Sentences are counted once and packed greedily; consecutive chunks share
+    up to overlap_tokens of trailing sentences. Sentences longer than a chunk
+    are split on word boundaries. Runs in time linear in the text length.
+    """
+
+    def __init__(
+        self,
+        chunk_tokens: int = 256,
+        overlap_tokens: int = 32,
+        counter: Optional[TokenCounter] = None,
+    ):
+        """
+        Initialize chunker.
+
+        Args:
+            chunk_tokens: Maximum tokens per chunk
+            overlap_tokens: Tokens of trailing sentences repeated at the start of the next chunk
+            counter: Token counter (tiktoken when installed, else a character estimate)
+        """
+        if chunk_tokens <= 0:
+            raise ValueError("chunk_tokens must be positive")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = max(0, min(overlap_tokens, chunk_tokens // 2))
+        self.counter = counter or TokenCounter()
+
+    def split(self, text: str) -> List[Chunk]:
+        """
+        Split text into chunks.
+
+        Args:
+            text: Document text
+
+        Returns:
+            Chunks in document order
+        """
+        units = self._units(text)
+        chunks: List[Chunk] = []
+        window: List[Tuple[int, int, int]] = []  # (start, end, tokens) of packed units
+        window_tokens = 0
+
+        def emit() -> None:
+            start, end = window[0][0], window[-1][1]
+            chunks.append(Chunk(len(chunks), text[start:end], window_tokens, start, end))
+
+        for unit in units:
+            if window and window_tokens + unit[2] > self.chunk_tokens:
+                emit()
+                # Carry trailing units up to the overlap budget into the next chunk
+                carried: List[Tuple[int, int, int]] = []
+                carried_tokens = 0
+                for previous in reversed(window):
+                    if carried_tokens + previous[2] > self.overlap_tokens:
+                        break
+                    carried.append(previous)
+                    carried_tokens += previous[2]
+                carried.reverse()
+                if carried_tokens + unit[2] > self.chunk_tokens:
+                    carried, carried_tokens = [], 0
+                window, window_tokens = carried, carried_tokens
+            window.append(unit)
+            window_tokens += unit[2]
+
+        if window:
+            emit()
+        return chunks
+
+    def _units(self, text: str) -> List[Tuple[int, int, int]]:
+        """(start, end, tokens) of each sentence, with long sentences split into word runs."""
+        units = []
+        position = 0
+        for boundary in _SENTENCE_END_RE.finditer(text):
+            units.extend(self._sentence_units(text, position, boundary.start()))
+            position = boundary.end()
+        units.extend(self._sentence_units(text, position, len(text)))
+        return units
+
+    def _sentence_units(self, text: str, start: int, end: int) -> List[Tuple[int, int, int]]:
+        sentence = text[start:end]
+        stripped = sentence.strip()
+        if not stripped:
+            return []
+        start += len(sentence) - len(sentence.lstrip())
+        end = start + len(stripped)
+
+        tokens = self.counter.count(stripped)
+        if tokens <= self.chunk_tokens:
+            return [(start, end, tokens)]
+
+        # Too long for one chunk: cut into runs of words
+        units = []
+        run_start = run_end = start
+        run_tokens = 0
+        for word in _WORD_RE.finditer(text, start, end):
+            word_tokens = max(1, self.counter.count(word.group(0)))
+            if run_tokens and run_tokens + word_tokens > self.chunk_tokens:
+                units.append((run_start, run_end, run_tokens))
+                run_start, run_tokens = word.start(), 0
+            run_end = word.end()
+            run_tokens += word_tokens
+        if run_tokens:
+            units.append((run_start, run_end, run_tokens))
+        return units
@@ -0,0 +1,229 @@
+"""Relevance-selected facts from the persistent memory files.
+
+The markdown files stay the human-editable source of truth. They are split
+into atomic facts (one bullet or line each, tagged with file and section),
+and each chat turn gets only the facts most relevant to the message, so the
+prompt stays roughly the same size as memory grows.
+"""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_TOKEN_RE = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class MemoryFact:
+    """One atomic fact from a memory file."""
+
+    id: str
+    file: str
+    section: str
+    text: str
+
+    def render(self) -> str:
+        """Format the fact for the system prompt."""
+        where = f"{self.file} > {self.section}" if self.section else self.file
+        return f"- [{where}] {self.text}"
+
+
+def split_facts(filename: str, content: str) -> List[MemoryFact]:
+    """
+    Split a markdown memory file into facts.
+
+    Every bullet and every non-heading line is one fact; the closest
+    heading above it becomes its section.
+
+    Args:
+        filename: Memory file name
+        content: File content
+
+    Returns:
+        Facts in file order
+    """
+    facts = []
+    section = ""
+    for line in content.splitlines():
+        heading = _HEADING_RE.match(line)
+        if heading:
+            # Top-level title (e.g. "# User Information") is not a section
+            section = heading.group(2) if len(heading.group(1)) > 1 else section
+            continue
+        bullet = _BULLET_RE.match(line)
+        text = (bullet.group(1) if bullet else line).strip()
+        if not text:
+            continue
+        fact_id = hashlib.sha256(f"{filename}\0{section}\0{text}".encode("utf-8")).hexdigest()[:16]
+        facts.append(MemoryFact(id=fact_id, file=filename, section=section, text=text))
+    return facts
+
+
+def _tokens(text: str) -> List[str]:
+    return [token for token in _TOKEN_RE.findall(text.lower()) if len(token) > 1]
+
+
+@dataclass(frozen=True)
+class _FactIndex:
+    """Facts of one memory version with their vectors and BM25 statistics.
+
+    Published as a whole by a single assignment, so readers never pair the
+    vectors of one version with the facts of another.
+    """
+
+    version: str = ""
+    facts: Tuple[MemoryFact, ...] = ()
+    vectors: Optional[np.ndarray] = None
+    fact_tokens: Tuple[Counter, ...] = ()
+    doc_freq: Counter = field(default_factory=Counter)
+    avg_length: float = 0.0
+
+
+class MemoryFactStore:
+    """Fact index over a memory snapshot, rebuilt when the snapshot hash changes.
+
+    Facts are ranked by embedding similarity when an embedding model is
+    available and by BM25 over the fact text otherwise. Embeddings are cached
+    per fact text, so an edit only embeds the facts it touched.
+    """
+
+    def __init__(self, embedding_service=None, pinned_sections: Optional[List[str]] = None):
+        """
+        Initialize fact store.
+
+        Args:
+            embedding_service: Object with embed(text) and embed_batch(texts), or None for BM25 only
+            pinned_sections: Section names whose facts are always included (e.g. "Profile")
+        """
+        self.embedding_service = embedding_service
+        self.pinned_sections = {section.lower() for section in (pinned_sections or [])}
+        self._index = _FactIndex()
+        self._embedding_cache: Dict[str, np.ndarray] = {}  # Guarded by _lock
+        self._lock = threading.Lock()
+
+    @property
+    def facts(self) -> Tuple[MemoryFact, ...]:
+        """Facts of the current memory version."""
+        return self._index.facts
+
+    @property
+    def version(self) -> str:
+        """Memory version the facts were built from."""
+        return self._index.version
+
+    def sync(self, version: str, contents: Dict[str, str]) -> None:
+        """
+        Rebuild the facts if the memory version changed.
+
+        Args:
+            version: Content hash of the memory snapshot
+            contents: File name -> content of the files to index
+        """
+        if version == self._index.version:
+            return
+        with self._lock:
+            if version == self._index.version:
+                return
+
+            facts = tuple(
+                fact
+                for filename, content in contents.items()
+                for fact in split_facts(filename, content)
+            )
+            fact_tokens = tuple(Counter(_tokens(f"{fact.section} {fact.text}")) for fact in facts)
+            self._index = _FactIndex(
+                version=version,
+                facts=facts,
+                vectors=self._embed_facts(facts),
+                fact_tokens=fact_tokens,
+                doc_freq=Counter(token for tokens in fact_tokens for token in tokens),
+                avg_length=(
+                    sum(sum(tokens.values()) for tokens in fact_tokens) / len(facts) if facts else 0.0
+                ),
+            )
+
+    def select(self, query: str, k: int = 12) -> List[MemoryFact]:
+        """
+        Get the pinned facts plus the k facts most relevant to query, in file order.
+
+        Args:
+            query: Current user message
+            k: Number of relevance-selected facts
+
+        Returns:
+            Selected facts
+        """
+        index = self._index  # One consistent version for the whole selection
+        facts = index.facts
+        if not facts:
+            return []
+
+        scores = self._score(index, query)
+        pinned = {i for i, fact in enumerate(facts) if fact.section.lower() in self.pinned_sections}
+        ranked = [i for i in np.argsort(-scores) if i not in pinned and scores[i] > 0]
+        chosen = pinned | set(ranked[:k])
+        return [fact for i, fact in enumerate(facts) if i in chosen]
+
+    def _score(self, index: _FactIndex, query: str) -> np.ndarray:
+        """Relevance of every fact of index to query (higher is better)."""
+        if index.vectors is not None:
+            try:
+                query_vector = self._normalize(np.asarray(self.embedding_service.embed(query), dtype=np.float32))
+                return index.vectors @ query_vector
+            except Exception as e:
+                print(f"Fact embedding failed, using keyword ranking: {e}")
+        return self._bm25(index, query)
+
+    @staticmethod
+    def _bm25(index: _FactIndex, query: str, k1: float = 1.2, b: float = 0.75) -> np.ndarray:
+        terms = set(_tokens(query))
+        total = len(index.facts)
+        scores = np.zeros(total, dtype=np.float32)
+        for i, tokens in enumerate(index.fact_tokens):
+            length = sum(tokens.values())
+            for term in terms:
+                tf = tokens.get(term, 0)
+                if not tf:
+                    continue
+                idf = math.log(1 + (total - index.doc_freq[term] + 0.5) / (index.doc_freq[term] + 0.5))
+                scores[i] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / (index.avg_length or 1)))
+        return scores
+
+    def _embed_facts(self, facts: Tuple[MemoryFact, ...]) -> Optional[np.ndarray]:
+        """Embed facts (reusing cached vectors); None when no embedding model is available."""
+        if self.embedding_service is None or not facts:
+            return None
+
+        keys = [hashlib.sha256(f"{fact.section}: {fact.text}".encode("utf-8")).hexdigest() for fact in facts]
+        missing = {key: fact for key, fact in zip(keys, facts) if key not in self._embedding_cache}
+        if missing:
+            try:
+                vectors = self.embedding_service.embed_batch(
+                    [f"{fact.section}: {fact.text}" for fact in missing.values()]
+                )
+            except Exception as e:
+                print(f"Fact embedding failed, using keyword ranking: {e}")
+                return None
+            for key, vector in zip(missing, vectors):
+                self._embedding_cache[key] = self._normalize(np.asarray(vector, dtype=np.float32))
+
+        # Drop vectors of facts that no longer exist
+        self._embedding_cache = {key: self._embedding_cache[key] for key in keys}
+        return np.vstack([self._embedding_cache[key] for key in keys])
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def render(self, facts: List[MemoryFact]) -> str:
+        """Format selected facts as a prompt block."""
+        return "\n".join(fact.render() for fact in facts)
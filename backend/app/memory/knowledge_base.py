@@ -3,7 +3,9 @@
 from pathlib import Path
 from typing import List, Optional
 
+from ..config import settings
 from ..services.vector_db import RAGService
+from .chunker import TextChunker
 
 
 class KnowledgeBase:
@@ -21,6 +23,7 @@ class KnowledgeBase:
         self.knowledge_dir = knowledge_dir or Path("./knowledge")
         self.knowledge_dir.mkdir(parents=True, exist_ok=True)
         self.loaded_files: List[str] = []
+        self.chunker = TextChunker(settings.knowledge_chunk_tokens, settings.knowledge_chunk_overlap_tokens)
 
     def load_knowledge_files(self) -> None:
         """Load all knowledge files."""
@@ -40,7 +43,7 @@ class KnowledgeBase:
             content = file_path.read_text(encoding="utf-8")
             
             # Split content into chunks for embedding
-            chunks = self._chunk_content(content, chunk_size=500)
+            chunks = self._chunk_content(content)
             
             # Add to knowledge base
             metadata = [{"source": file_path.name, "type": file_path.suffix}] * len(chunks)
@@ -50,31 +53,18 @@ class KnowledgeBase:
         except Exception as e:
             print(f"Failed to load knowledge file {file_path}: {e}")
 
-    def _chunk_content(self, content: str, chunk_size: int = 500) -> List[str]:
-        """Split content into chunks."""
-        words = content.split()
-        chunks = []
-        current_chunk = []
+    def _chunk_content(self, content: str) -> List[str]:
+        """Split content into token- and sentence-aware chunks."""
+        return [chunk.text for chunk in self.chunker.split(content)]
 
-        for word in words:
-            current_chunk.append(word)
-            if len(" ".join(current_chunk)) >= chunk_size:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = []
-
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
-
-        return chunks
-
-    def search(self, query: str, top_k: int = 5) -> List[str]:
-        """Search knowledge base."""
-        results = self.rag_service.retrieve(query, k=top_k)
+    def search(self, query: str, top_k: int = 5, mode: Optional[str] = None) -> List[str]:
+        """Search knowledge base (hybrid vector + keyword by default, see settings.rag_retrieval_mode)."""
+        results = self.rag_service.retrieve(query, k=top_k, mode=mode)
         return [doc for doc, _, _ in results]
 
-    def get_context(self, query: str, max_docs: int = 5) -> str:
+    def get_context(self, query: str, max_docs: int = 5, mode: Optional[str] = None) -> str:
         """Get formatted context for query."""
-        return self.rag_service.get_context(query, max_docs)
+        return self.rag_service.get_context(query, max_docs, mode=mode)
 
     def add_document(self, title: str, content: str) -> None:
         """Add a new document to knowledge base."""
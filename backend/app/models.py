@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -54,6 +54,10 @@ class ChatResponse(BaseResponse):
     message: ChatMessage = Field(..., description="Latest message")
     reply: str = Field(..., description="Agent response")
     messages: List[ChatMessage] = Field(default_factory=list, description="Recent messages")
+    context_tokens: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Prompt tokens per context segment (system, memory, history, ...) of this turn",
+    )
 
 
 class ConversationResponse(BaseResponse):
@@ -61,3 +65,48 @@ class ConversationResponse(BaseResponse):
 
     conversation_id: str = Field(..., description="Conversation ID")
     messages: List[ChatMessage] = Field(default_factory=list, description="Message history")
+
+
+class ConversationListItem(BaseModel):
+    """Conversation entry in a paginated listing."""
+
+    conversation_id: str = Field(..., description="Conversation ID")
+    snippet: Optional[str] = Field(None, description="Start of the first message")
+    message_count: int = Field(default=0, description="Number of messages")
+    created_at: datetime = Field(..., description="Creation timestamp")
+    updated_at: datetime = Field(..., description="Last update timestamp")
+    messages: Optional[List[ChatMessage]] = Field(None, description="Message history (omitted in metadata-only mode)")
+
+
+class ConversationPage(BaseResponse):
+    """Cursor-paginated conversation listing, most recently updated first."""
+
+    conversations: List[ConversationListItem] = Field(default_factory=list, description="Conversations on this page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+
+class SearchResult(BaseModel):
+    """Message matching a conversation search."""
+
+    conversation_id: str = Field(..., description="Conversation ID")
+    message_id: str = Field(..., description="Message ID")
+    role: str = Field(..., description="Message role")
+    snippet: str = Field(..., description="Excerpt around the matched terms, marked with <mark>")
+    highlight: str = Field(..., description="Full message, matched terms marked with <mark>")
+    score: float = Field(..., description="Relevance, higher is better")
+    created_at: datetime = Field(..., description="Message timestamp")
+
+
+class SearchResponse(BaseResponse):
+    """Ranked full-text search results over conversation history."""
+
+    query: str = Field(..., description="Search query")
+    results: List[SearchResult] = Field(default_factory=list, description="Matches, best first")
+
+
+class MessagePage(BaseResponse):
+    """Page of conversation messages, oldest first."""
+
+    conversation_id: str = Field(..., description="Conversation ID")
+    messages: List[ChatMessage] = Field(default_factory=list, description="Messages on this page")
+    next_before: Optional[int] = Field(None, description="Pass as `before` to load older messages, null when none remain")
@@ -1,41 +1,150 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status, BackgroundTasks
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..models import ChatRequest, ChatResponse, ConversationResponse, ChatMessage
-from ..services import AgentService, ConversationService, PersistentMemoryService
+from ..config import settings
+from ..core.keyed_lock import conversation_locks
+from ..core.context_assembler import AssembledContext, ContextAssembler, get_context_budget
+from ..db import AsyncSessionLocal, SessionLocal, get_async_db, get_db
+from ..models import (
+    ChatRequest,
+    ChatResponse,
+    ConversationResponse,
+    ChatMessage,
+    ConversationListItem,
+    ConversationPage,
+    MessagePage,
+    SearchResponse,
+    SearchResult,
+)
+from ..services import (
+    AsyncAgentService,
+    AsyncConversationService,
+    ChatTurn,
+    ConversationSearchService,
+    ConversationService,
+    ConversationSummaryService,
+)
+from ..services.memory_updates import memory_updates
+from ..services.persistent_memory import get_persistent_memory_service
+from ..schemas import ConversationHistory, ConversationMessage
 from ..exceptions import AgentException
 from ..agent import SimpleAgent
+from ..skills import skill_manager
 
 router = APIRouter(tags=["chat"])
 
 
-@router.get("/conversations", response_model=List[ConversationResponse])
+@router.get("/conversations", response_model=ConversationPage)
 def list_conversations(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    metadata_only: bool = True,
     db: Session = Depends(get_db),
-) -> List[ConversationResponse]:
-    """List all conversations."""
+) -> ConversationPage:
+    """
+    List conversations, most recently updated first.
+    
+    - Pass `next_cursor` from a page as `cursor` to get the next page
+    - `metadata_only=false` also returns each conversation's messages
+    """
     try:
         conversation_service = ConversationService(db)
-        conversations = conversation_service.list_conversations()
+        entries, next_cursor = conversation_service.list_conversation_page(limit=limit, cursor=cursor)
         
-        return [
-            ConversationResponse(
-                conversation_id=c.id,
-                messages=[
-                    ChatMessage(
-                        id=msg.id,
-                        role=msg.role,
-                        content=msg.content,
-                        tool_used=msg.tool_used,
-                        created_at=msg.created_at,
-                    )
-                    for msg in c.messages
-                ],
+        messages_by_conv = {}
+        if not metadata_only:
+            messages_by_conv = conversation_service.get_messages_by_conversation([e.id for e in entries])
+        
+        return ConversationPage(
+            conversations=[
+                ConversationListItem(
+                    conversation_id=e.id,
+                    snippet=e.snippet,
+                    message_count=e.message_count,
+                    created_at=e.created_at,
+                    updated_at=e.updated_at,
+                    messages=None if metadata_only else [
+                        _to_chat_message(msg) for msg in messages_by_conv.get(e.id, [])
+                    ],
+                )
+                for e in entries
+            ],
+            next_cursor=next_cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        )
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search_conversations(
+    q: str = Query(..., min_length=1, description="Search text"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+) -> SearchResponse:
+    """Full-text search over all conversation messages, best match first."""
+    hits = await ConversationSearchService(db).search(q, limit=limit, prefix=True)
+    return SearchResponse(
+        query=q,
+        results=[
+            SearchResult(
+                conversation_id=hit.conversation_id,
+                message_id=hit.message_id,
+                role=hit.role,
+                snippet=hit.snippet,
+                highlight=hit.highlight,
+                score=hit.score,
+                created_at=hit.created_at,
+            )
+            for hit in hits
+        ],
+    )
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=MessagePage)
+def list_conversation_messages(
+    conversation_id: str,
+    before: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+) -> MessagePage:
+    """
+    Page through a conversation's messages, newest page first.
+    
+    - Pass `next_before` from a page as `before` to load older messages
+    """
+    try:
+        conversation_service = ConversationService(db)
+        if not conversation_service.get_conversation(conversation_id, include_messages=False):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Conversation {conversation_id} not found",
             )
-            for c in conversations
-        ]
+        
+        messages, next_before = conversation_service.get_messages_before(
+            conversation_id, before=before, limit=limit
+        )
+        return MessagePage(
+            conversation_id=conversation_id,
+            messages=[_to_chat_message(msg) for msg in messages],
+            next_before=next_before,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -43,11 +152,134 @@ def list_conversations(
         )
 
 
+def _to_chat_message(msg: ConversationMessage) -> ChatMessage:
+    """Convert a stored message to its API model."""
+    return ChatMessage(
+        id=msg.id,
+        role=msg.role,
+        content=msg.content,
+        tool_used=msg.tool_used,
+        created_at=msg.created_at,
+    )
+
+
+async def _prepare_turn(
+    request: ChatRequest,
+    db: AsyncSession,
+    conversation_service: AsyncConversationService,
+) -> Tuple[ConversationHistory, ChatTurn, AssembledContext]:
+    """Resolve the conversation, commit the user message and build the LLM context.
+
+    The new conversation (if any) and the user message are committed before
+    the agent runs, so a crash during a long tool call cannot lose them; the
+    returned ChatTurn then buffers only the agent's reply. The assembled
+    context carries the prompt and its token usage per segment.
+    """
+    agent_service = AsyncAgentService(db)
+    
+    # Always use default agent
+    agent = await agent_service.get_agent()
+    
+    # Get or create conversation
+    if request.conversation_id:
+        conversation = await conversation_service.get_conversation(
+            request.conversation_id, include_messages=False
+        )
+        if not conversation:
+            raise AgentException(
+                message="Conversation not found",
+                detail=f"Conversation {request.conversation_id} does not exist",
+            )
+    else:
+        # Created on save, together with the first messages
+        conversation = ConversationHistory(id=str(uuid.uuid4()), messages=[])
+    turn = ChatTurn(conversation.id, is_new=not request.conversation_id)
+    
+    # --- GLOBAL CONTEXT (Across Conversations) ---
+    # Best-matching message of the 3 other sessions most related to this message,
+    # from the full-text index; the 3 most recent sessions when nothing matches
+    global_memory = []
+    related = await ConversationSearchService(db).related_sessions(
+        request.message, exclude_id=conversation.id, limit=3
+    )
+    for hit in related:
+        global_memory.append(f"Past session {hit.conversation_id[:8]} ({hit.role}): \"{hit.snippet}\"")
+    if not related:
+        for c in await conversation_service.list_recent_index(limit=3, exclude_id=conversation.id):
+            # Add a brief snippet of what was discussed in past sessions
+            first_msg = (c.snippet or "")[:100]
+            global_memory.append(f"Past session {c.id[:8]}: \"{first_msg}...\"")
+    
+    # --- LOCAL CONTEXT (Current Conversation) ---
+    # Rolling summary of older turns plus the unsummarized recent tail
+    if turn.is_new:
+        conversation_summary, history = "", []
+    else:
+        summary_service = ConversationSummaryService(db)
+        conversation_summary, history = await summary_service.get_context_messages(conversation.id)
+    
+    # Write-ahead: commit the user message before the agent runs
+    turn.add_message(role="user", content=request.message)
+    await turn.save(db)
+    
+    # --- PERSISTENT MEMORY ---
+    # soul.md plus the facts most relevant to this message, from the cached snapshot
+    memory_service = get_persistent_memory_service()
+    persistent_context = await asyncio.to_thread(memory_service.get_relevant_memory, request.message)
+    
+    # --- TOKEN BUDGET ---
+    # Fit memory, past sessions and history into the model's prompt budget,
+    # dropping past sessions and the oldest history first
+    assembler = ContextAssembler(get_context_budget(settings.llm_model))
+    context = assembler.assemble(
+        system_prompt=agent.config.system_prompt,
+        user_message=request.message,
+        persistent_memory=persistent_context,
+        past_sessions=global_memory,
+        history=history,
+        reserved_tokens=assembler.count_tools(skill_manager.get_tool_definitions()),
+        conversation_summary=conversation_summary,
+    )
+    return conversation, turn, context
+
+
+@asynccontextmanager
+async def _turn_lock(conversation_id: Optional[str]) -> AsyncIterator[None]:
+    """Serialize turns of one conversation in this process; new conversations need no lock."""
+    if not conversation_id:
+        yield
+        return
+    async with conversation_locks.hold(conversation_id):
+        yield
+
+
+async def _save_pending_turn(turn: ChatTurn, db: AsyncSession) -> None:
+    """Persist a reply whose save was interrupted (e.g. by a client disconnect)."""
+    if not turn.pending and not turn.is_new:
+        return
+    try:
+        await turn.save(db)
+    except Exception as e:
+        print(f"Failed to save chat turn of conversation {turn.conversation_id}: {e}")
+
+
+async def _update_conversation_summary(conversation_id: str) -> None:
+    """Background task: fold older turns into the conversation summary."""
+    async with AsyncSessionLocal() as db:
+        await ConversationSummaryService(db).update_summary(conversation_id)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @router.post("", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db),
 ) -> ChatResponse:
     """
     Chat with the agent.
@@ -55,89 +287,42 @@ async def chat(
     - If `conversation_id` is not provided, a new conversation is created
     """
     try:
-        agent_service = AgentService(db)
-        conversation_service = ConversationService(db)
-        
-        # Always use default agent
-        agent = agent_service.get_agent()
-        
-        # Get or create conversation
-        if request.conversation_id:
-            conversation = conversation_service.get_conversation(request.conversation_id)
-            if not conversation:
-                raise AgentException(
-                    message="Conversation not found",
-                    detail=f"Conversation {request.conversation_id} does not exist",
+        # Persistence goes through the async session; the sync session is
+        # only handed to skills that need it (e.g. the Gmail status check)
+        conversation_service = AsyncConversationService(async_db)
+        async with _turn_lock(request.conversation_id):
+            conversation, turn, context = await _prepare_turn(
+                request, async_db, conversation_service
+            )
+            
+            try:
+                # Process message with SimpleAgent/LLM
+                simple_agent = SimpleAgent()
+         
+                reply, tool_used = await simple_agent.run(
+                    request.message,
+                    db=db,
+                    history=context.history,
+                    system_prompt=context.system_prompt
                 )
-        else:
-            conversation = conversation_service.create_conversation()
-        
-        # --- GLOBAL CONTEXT (Across Conversations) ---
-        # Get last 3 conversations to provide cross-talk memory
-        all_convs = conversation_service.list_conversations()
-        # Sort by updated_at descending
-        all_convs.sort(key=lambda x: x.updated_at, reverse=True)
-        
-        global_memory = []
-        for c in all_convs:
-            if c.id != conversation.id and c.messages:
-                # Add a brief snippet of what was discussed in past sessions
-                first_msg = c.messages[0].content[:100]
-                global_memory.append(f"Past session {c.id[:8]}: \"{first_msg}...\"")
-            if len(global_memory) >= 3:
-                break
-        
-        # --- LOCAL CONTEXT (Current Conversation) ---
-        # Get history for context (last 15 messages)
-        history = conversation_service.get_conversation_messages(conversation.id, limit=15)
-        
-        # Combine global hints into system prompt hint
-        extra_context = ""
-        if global_memory:
-            extra_context = "\n\nRefer to past sessions if helpful:\n" + "\n".join(global_memory)
-        
-        # Add user message
-        conversation_service.add_message(
-            conversation.id,
-            role="user",
-            content=request.message,
-        )
-        
-        # Process message with SimpleAgent/LLM
-        simple_agent = SimpleAgent()
-        
-        # --- PERSISTENT MEMORY ---
-        memory_service = PersistentMemoryService()
-        persistent_context = memory_service.get_all_memory()
-        
-        full_system_prompt = (
-            f"{agent.config.system_prompt}\n\n"
-            f"--- PERSISTENT STATE ---\n"
-            f"{persistent_context}\n\n"
-            f"{extra_context}"
-        )
- 
-        reply, tool_used = await simple_agent.run(
-            request.message,
-            db=db,
-            history=history,
-            system_prompt=full_system_prompt
-        )
-        agent_reply = reply
-        
-        # Add assistant message
-        assistant_msg = conversation_service.add_message(
-            conversation.id,
-            role="assistant",
-            content=agent_reply,
-            tool_used=tool_used,
-        )
+                agent_reply = reply
+                
+                # Add assistant message and write it in one commit
+                assistant_msg = turn.add_message(
+                    role="assistant",
+                    content=agent_reply,
+                    tool_used=tool_used,
+                )
+                await turn.save(async_db)
+            finally:
+                await _save_pending_turn(turn, async_db)
 
-        # Trigger background memory update
-        background_tasks.add_task(memory_service.analyze_and_update, request.message, agent_reply)
+        # Queue memory analysis (pre-filtered and batched) and trigger the summary update
+        memory_updates.submit(conversation.id, request.message, agent_reply)
+        background_tasks.add_task(_update_conversation_summary, conversation.id)
         
         # Get recent messages for response
-        recent_messages = conversation_service.get_conversation(conversation.id).messages
+        recent_messages = await conversation_service.get_recent_messages(conversation.id, limit=10)
         
         return ChatResponse(
             conversation_id=conversation.id,
@@ -157,8 +342,9 @@ async def chat(
                     tool_used=msg.tool_used,
                     created_at=msg.created_at,
                 )
-                for msg in recent_messages[-10:]  # Last 10 messages
+                for msg in recent_messages  # Last 10 messages
             ],
+            context_tokens=context.usage,
         )
     
     except AgentException:
@@ -170,6 +356,96 @@ async def chat(
         )
 
 
+@router.post("/stream")
+async def chat_stream(
+    request: ChatRequest,
+    background_tasks: BackgroundTasks,
+    async_db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    Chat with the agent, streaming the reply as server-sent events.
+    
+    Events: `conversation` (id), `token` (text delta), `tool_start`,
+    `tool_end`, `done` (stored assistant message and prompt tokens per
+    context segment) and `error`.
+    """
+    # Fail fast with a regular HTTP error; the turn itself is prepared in the
+    # stream, once the conversation lock is held
+    if request.conversation_id and not await AsyncConversationService(async_db).get_conversation(
+        request.conversation_id, include_messages=False
+    ):
+        raise AgentException(
+            message="Conversation not found",
+            detail=f"Conversation {request.conversation_id} does not exist",
+        )
+
+    async def event_stream() -> AsyncIterator[str]:
+        # The request-scoped sessions may be closed before the body is sent,
+        # so the stream uses its own: sync for skills, async to persist the reply.
+        stream_db = SessionLocal()
+        stream_async_db = AsyncSessionLocal()
+        try:
+            async with _turn_lock(request.conversation_id):
+                conversation, turn, context = await _prepare_turn(
+                    request, stream_async_db, AsyncConversationService(stream_async_db)
+                )
+                try:
+                    yield _sse_event("conversation", {"conversation_id": conversation.id})
+
+                    simple_agent = SimpleAgent()
+                    async for event in simple_agent.run_stream(
+                        request.message,
+                        db=stream_db,
+                        history=context.history,
+                        system_prompt=context.system_prompt,
+                    ):
+                        if event["type"] != "done":
+                            yield _sse_event(event["type"], event)
+                            continue
+
+                        assistant_msg = turn.add_message(
+                            role="assistant",
+                            content=event["reply"],
+                            tool_used=event["tool_used"],
+                        )
+                        await turn.save(stream_async_db)
+                        memory_updates.submit(conversation.id, request.message, event["reply"])
+                        # Background tasks run once the stream has been fully sent
+                        background_tasks.add_task(_update_conversation_summary, conversation.id)
+                        yield _sse_event(
+                            "done",
+                            {
+                                "conversation_id": conversation.id,
+                                "message": ChatMessage(
+                                    id=assistant_msg.id,
+                                    role=assistant_msg.role,
+                                    content=assistant_msg.content,
+                                    tool_used=assistant_msg.tool_used,
+                                    created_at=assistant_msg.created_at,
+                                ).model_dump(mode="json"),
+                                "context_tokens": context.usage,
+                            },
+                        )
+                finally:
+                    # Also covers client disconnects mid-stream
+                    await _save_pending_turn(turn, stream_async_db)
+        except Exception as e:
+            yield _sse_event(
+                "error",
+                {"message": "Failed to process chat message", "detail": str(e)},
+            )
+        finally:
+            stream_db.close()
+            await stream_async_db.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks,
+    )
+
+
 @router.get("/conversations/{conversation_id}", response_model=ConversationResponse)
 def get_conversation(
     conversation_id: str,
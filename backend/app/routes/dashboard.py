@@ -1,7 +1,13 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..db import get_db
 from ..database import SkillDB, MemoryDB, ConversationDB, TaskDB
+from ..core.keyed_lock import conversation_locks
+from ..core.llm_cache import get_completion_cache
+from ..services.memory_updates import memory_updates
+from ..services.rag_registry import rag_registry
 
 router = APIRouter()
 
@@ -16,3 +22,50 @@ def get_stats(db: Session = Depends(get_db)):
         "tasks_pending": db.query(TaskDB).filter(TaskDB.status == "pending").count(),
         "tasks_completed": db.query(TaskDB).filter(TaskDB.status == "completed").count(),
     }
+
+
+@router.get("/llm-cache")
+def get_llm_cache_stats():
+    """Get LLM completion cache hit/miss counters."""
+    cache = get_completion_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/conversation-locks")
+def get_conversation_lock_stats():
+    """Get per-conversation lock waits and version conflicts of chat turns."""
+    return conversation_locks.stats()
+
+
+@router.get("/memory-updates")
+def get_memory_update_stats():
+    """Get skipped, batched and executed persistent-memory analyses."""
+    return memory_updates.stats()
+
+
+@router.get("/rag")
+def get_rag_status():
+    """Get load state, load time and memory footprint of the embedding model and vector store."""
+    return rag_registry.status()
+
+
+@router.get("/rag/recall")
+def get_rag_recall(k: int = 10, queries: int = 100):
+    """Measure recall@k of the vector index against an exact search."""
+    try:
+        return rag_registry.get_vector_store().recall_check(k=k, queries=queries)
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("/rag/tune")
+def tune_rag_index(ef_search: Optional[int] = None, nprobe: Optional[int] = None, k: int = 10):
+    """Set HNSW efSearch / IVF nprobe and report the resulting recall."""
+    try:
+        store = rag_registry.get_vector_store()
+    except ImportError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    store.tune(ef_search=ef_search, nprobe=nprobe)
+    return {"index": store.index_info(), "recall": store.recall_check(k=k)}
@@ -1,14 +1,15 @@
-from typing import List, Dict, Optional
-import uuid
+from typing import Any, List, Dict, Optional
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ConfigDict
 
-from ..db import get_db
-from ..database import MemoryDB
-from ..services.persistent_memory import PersistentMemoryService
-from ..services.vector_db import VectorStore, EmbeddingService, RAGService
+from ..db import get_async_db, get_db
+from ..schemas import KnowledgeSearchHit
+from ..services.knowledge import KnowledgeService
+from ..services.knowledge_search import HYBRID, KnowledgeSearchService
+from ..services.persistent_memory import get_persistent_memory_service
 
 router = APIRouter(tags=["knowledge"])
 
@@ -28,6 +29,12 @@ class KnowledgeDoc(BaseModel):
     chunks: int
     createdAt: datetime
 
+class KnowledgeSearchResponse(BaseModel):
+    query: str
+    mode: str
+    results: List[KnowledgeSearchHit]
+    timings: Dict[str, Any]
+
 # --- RAG ENDPOINTS (Standard Knowledge Base) ---
 
 @router.get("/", response_model=List[KnowledgeDoc])
@@ -35,10 +42,11 @@ class KnowledgeDoc(BaseModel):
 def list_knowledge(db: Session = Depends(get_db)):
     """List all RAG knowledge documents."""
     try:
-        # Filter docs of type 'knowledge'
-        docs = db.query(MemoryDB).filter(MemoryDB.memory_type == "knowledge").all()
+        service = KnowledgeService(db)
+        docs = service.list_documents()
         if not docs:
             return []
+        chunk_counts = service.chunk_counts()
             
         results = []
         for d in docs:
@@ -52,7 +60,8 @@ def list_knowledge(db: Session = Depends(get_db)):
                 title=title,
                 content=d.content,
                 type=ext,
-                chunks=len(d.content) // 500 + 1,
+                # Documents uploaded before chunking have no chunk rows
+                chunks=chunk_counts.get(d.id) or len(d.content) // 500 + 1,
                 createdAt=d.created_at if d.created_at else datetime.utcnow()
             ))
         return results
@@ -65,6 +74,25 @@ def debug_knowledge():
     """Verify router activity."""
     return {"status": "knowledge_router_active", "timestamp": datetime.utcnow().isoformat()}
 
+@router.get("/search", response_model=KnowledgeSearchResponse)
+async def search_knowledge(
+    q: str = Query(..., min_length=1, description="Search text"),
+    k: int = Query(5, ge=1, le=50),
+    mode: str = Query(HYBRID, pattern="^(hybrid|vector|lexical)$"),
+    vector_candidates: Optional[int] = Query(None, ge=1, le=500),
+    lexical_candidates: Optional[int] = Query(None, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Retrieve knowledge chunks by keyword, vector or hybrid (fused) search, with per-stage timings."""
+    hits, timings = await KnowledgeSearchService(db).search(
+        q,
+        k=k,
+        mode=mode,
+        vector_candidates=vector_candidates,
+        lexical_candidates=lexical_candidates,
+    )
+    return KnowledgeSearchResponse(query=q, mode=mode, results=hits, timings=timings)
+
 @router.post("/upload", response_model=KnowledgeDoc)
 def upload_knowledge(
     title: str = Form(...),
@@ -72,47 +100,24 @@ def upload_knowledge(
     type: str = Form(".md"),
     db: Session = Depends(get_db)
 ):
-    """Upload a new document to the RAG knowledge base."""
-    doc_id = str(uuid.uuid4())
-    
-    # Save to database
-    db_doc = MemoryDB(
-        id=doc_id,
-        content=content,
-        memory_type="knowledge",
-        tags=f"{title},{type}"
-    )
-    db.add(db_doc)
-    db.commit()
-    db.refresh(db_doc)
-    
-    # Add to Vector Store (Non-blocking attempt)
-    try:
-        vs = VectorStore()
-        es = EmbeddingService()
-        rag = RAGService(vs, es)
-        rag.add_knowledge([content], metadata=[{"id": doc_id, "title": title}])
-    except Exception as e:
-        print(f"Vector Store indexing skipped/failed: {e}")
+    """Upload a new document, chunk it and index the chunks in the vector store."""
+    service = KnowledgeService(db)
+    db_doc = service.add_document(title, content, type)
 
     return KnowledgeDoc(
-        id=doc_id,
+        id=db_doc.id,
         title=title,
         content=content,
         type=type,
-        chunks=len(content) // 500 + 1,
+        chunks=service.chunk_count(db_doc.id),
         createdAt=db_doc.created_at
     )
 
 @router.delete("/{doc_id}")
 def delete_knowledge(doc_id: str, db: Session = Depends(get_db)):
     """Delete a document from the RAG knowledge base."""
-    db_doc = db.query(MemoryDB).filter(MemoryDB.id == doc_id).first()
-    if not db_doc:
+    if not KnowledgeService(db).delete_document(doc_id):
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    db.delete(db_doc)
-    db.commit()
     return {"status": "success"}
 
 # --- PERSISTENT MEMORY ENDPOINTS (Soul, User Info, etc.) ---
@@ -121,7 +126,7 @@ def delete_knowledge(doc_id: str, db: Session = Depends(get_db)):
 def list_memory_files():
     """List available persistent memory files."""
     try:
-        service = PersistentMemoryService()
+        service = get_persistent_memory_service()
         return service.files
     except Exception as e:
         print(f"Error listing memory files: {e}")
@@ -130,7 +135,7 @@ def list_memory_files():
 @router.get("/persistent/{filename}", response_model=MemoryFile)
 def get_memory_file(filename: str):
     """Get the content of a persistent memory file."""
-    service = PersistentMemoryService()
+    service = get_persistent_memory_service()
     if filename not in service.files:
         raise HTTPException(status_code=404, detail="File not found")
     
@@ -140,7 +145,7 @@ def get_memory_file(filename: str):
 @router.put("/persistent/{filename}")
 def update_memory_file(filename: str, file_data: MemoryFile):
     """Update the content of a persistent memory file."""
-    service = PersistentMemoryService()
+    service = get_persistent_memory_service()
     if filename not in service.files:
         raise HTTPException(status_code=404, detail="File not found")
     
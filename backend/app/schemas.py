@@ -137,6 +137,42 @@ class ConversationHistory(BaseModel):
         ]
 
 
+class ConversationIndexEntry(BaseModel):
+    """Conversation metadata without its messages."""
+
+    id: str = Field(..., description="Unique conversation ID")
+    snippet: Optional[str] = Field(None, description="Start of the first message")
+    message_count: int = Field(default=0, description="Number of messages")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class MessageSearchHit(BaseModel):
+    """Conversation message matching a full-text search."""
+
+    message_id: str = Field(..., description="Matching message ID")
+    conversation_id: str = Field(..., description="Conversation the message belongs to")
+    role: str = Field(..., description="Message role")
+    snippet: str = Field(..., description="Excerpt around the matched terms")
+    highlight: str = Field(..., description="Full message with matched terms marked")
+    score: float = Field(default=0.0, description="Relevance, higher is better")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class KnowledgeSearchHit(BaseModel):
+    """Knowledge chunk returned by keyword, vector or hybrid retrieval."""
+
+    chunk_id: Optional[str] = Field(default=None, description="Chunk ID (None for vectors indexed before chunking)")
+    document_id: Optional[str] = Field(default=None, description="Knowledge document ID")
+    title: Optional[str] = Field(default=None, description="Document title")
+    text: str = Field(..., description="Chunk text")
+    score: float = Field(default=0.0, description="Relevance, higher is better (fused score in hybrid mode)")
+    vector_score: Optional[float] = Field(default=None, description="Similarity to the query embedding")
+    vector_rank: Optional[int] = Field(default=None, description="1-based rank among vector candidates")
+    lexical_score: Optional[float] = Field(default=None, description="BM25 keyword relevance")
+    lexical_rank: Optional[int] = Field(default=None, description="1-based rank among keyword candidates")
+
+
 class TaskType(str, Enum):
     """Task type enum."""
 
@@ -1,8 +1,27 @@
 """Services package."""
 
-from .agent import AgentService, SkillService
-from .conversation import ConversationService
+from .agent import AgentService, AsyncAgentService, SkillService
+from .conversation import AsyncConversationService, ChatTurn, ConversationService
+from .conversation_search import ConversationSearchService
+from .conversation_summary import ConversationSummaryService
+from .knowledge import KnowledgeService
+from .knowledge_search import KnowledgeSearchService
 from .persistent_memory import PersistentMemoryService
+from .rag_registry import RAGRegistry
 from .task import TaskService
 
-__all__ = ["AgentService", "SkillService", "ConversationService", "PersistentMemoryService", "TaskService"]
+__all__ = [
+    "AgentService",
+    "AsyncAgentService",
+    "SkillService",
+    "ConversationService",
+    "AsyncConversationService",
+    "ChatTurn",
+    "ConversationSearchService",
+    "ConversationSummaryService",
+    "KnowledgeService",
+    "KnowledgeSearchService",
+    "PersistentMemoryService",
+    "RAGRegistry",
+    "TaskService",
+]
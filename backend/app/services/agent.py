@@ -5,12 +5,28 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..database import AgentDB, SkillDB
 from ..schemas import Agent, AgentConfig, AgentState, Skill, SkillManifest, SkillStatus
 
 
+def _agent_schema(db_agent: AgentDB, skill_ids: List[str]) -> Agent:
+    """Convert an agent row and the available skill ids to the Agent schema."""
+    return Agent(
+        id=db_agent.id,
+        name=db_agent.name,
+        config=AgentConfig(**json.loads(db_agent.config)),
+        state=AgentState(db_agent.state),
+        skills=skill_ids,
+        memory_enabled=db_agent.memory_enabled,
+        created_at=db_agent.created_at,
+        updated_at=db_agent.updated_at,
+    )
+
+
 class AgentService:
     """Service for managing the system agent."""
 
@@ -58,18 +74,7 @@ class AgentService:
 
     def _to_schema(self, db_agent: AgentDB) -> Agent:
         """Convert database model to Pydantic schema."""
-        config = AgentConfig(**json.loads(db_agent.config))
-        
-        return Agent(
-            id=db_agent.id,
-            name=db_agent.name,
-            config=config,
-            state=AgentState(db_agent.state),
-            skills=self._get_all_skill_ids(),
-            memory_enabled=db_agent.memory_enabled,
-            created_at=db_agent.created_at,
-            updated_at=db_agent.updated_at,
-        )
+        return _agent_schema(db_agent, self._get_all_skill_ids())
 
     def _get_all_skill_ids(self) -> List[str]:
         """Get IDs of all available skills."""
@@ -77,6 +82,34 @@ class AgentService:
         return [skill.id for skill in skills]
 
 
+class AsyncAgentService:
+    """Async counterpart of AgentService for event-loop request handlers."""
+
+    def __init__(self, db: AsyncSession):
+        """Initialize async agent service."""
+        self.db = db
+
+    async def get_agent(self) -> Agent:
+        """Get the default agent, creating it on first use."""
+        name = "default_agent"
+        db_agent = await self.db.scalar(select(AgentDB).where(AgentDB.name == name).limit(1))
+
+        if not db_agent:
+            db_agent = AgentDB(
+                id="default_agent",
+                name=name,
+                config=AgentConfig().model_dump_json(),
+                state=AgentState.IDLE,
+                memory_enabled=True,
+            )
+            self.db.add(db_agent)
+            await self.db.commit()
+            await self.db.refresh(db_agent)
+
+        skill_ids = (await self.db.scalars(select(SkillDB.id))).all()
+        return _agent_schema(db_agent, list(skill_ids))
+
+
 class SkillService:
     """Service for managing skills."""
 
@@ -1,14 +1,24 @@
 """Conversation management service."""
 
+import base64
 import json
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
-from ..database import ConversationDB
-from ..schemas import ConversationHistory, ConversationMessage
+from ..config import settings
+from ..core.keyed_lock import conversation_locks
+from ..database import ConversationDB, ConversationMessageDB, ConversationSummaryDB
+from ..schemas import ConversationHistory, ConversationIndexEntry, ConversationMessage
+
+# Characters of the first message kept in the conversation index
+SNIPPET_LENGTH = 200
 
 
 class ConversationService:
@@ -21,12 +31,12 @@ class ConversationService:
     def create_conversation(self) -> ConversationHistory:
         """Create a new conversation."""
         conversation_id = str(uuid.uuid4())
-        
+
         conversation = ConversationHistory(
             id=conversation_id,
             messages=[],
         )
-        
+
         # Save to database
         db_conv = ConversationDB(
             id=conversation_id,
@@ -34,23 +44,24 @@ class ConversationService:
         )
         self.db.add(db_conv)
         self.db.commit()
-        
+
         return conversation
 
-    def get_conversation(self, conversation_id: str) -> Optional[ConversationHistory]:
-        """Get conversation by ID."""
+    def get_conversation(
+        self,
+        conversation_id: str,
+        include_messages: bool = True,
+    ) -> Optional[ConversationHistory]:
+        """Get conversation by ID (optionally without loading its messages)."""
         db_conv = self.db.query(ConversationDB).filter(
             ConversationDB.id == conversation_id
         ).first()
-        
+
         if not db_conv:
             return None
-        
-        messages_data = json.loads(db_conv.messages)
-        messages = [
-            ConversationMessage(**msg) for msg in messages_data
-        ]
-        
+
+        messages = self.get_messages(conversation_id) if include_messages else []
+
         return ConversationHistory(
             id=db_conv.id,
             messages=messages,
@@ -65,76 +76,495 @@ class ConversationService:
         content: str,
         tool_used: Optional[str] = None,
     ) -> ConversationMessage:
-        """Add a message to conversation."""
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
-            raise ValueError(f"Conversation {conversation_id} not found")
-        
-        message = conversation.add_message(role, content, tool_used)
-        
-        # Update database
+        """Append a message to a conversation."""
         db_conv = self.db.query(ConversationDB).filter(
             ConversationDB.id == conversation_id
         ).first()
-        
-        messages_data = [
-            {
-                "id": msg.id,
-                "role": msg.role,
-                "content": msg.content,
-                "tool_used": msg.tool_used,
-                "created_at": msg.created_at.isoformat(),
-            }
-            for msg in conversation.messages
-        ]
-        db_conv.messages = json.dumps(messages_data)
+        if not db_conv:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        message = ConversationMessage(
+            id=str(uuid.uuid4()),
+            role=role,
+            content=content,
+            tool_used=tool_used,
+        )
+
+        # Append as a new row; message_count doubles as the next sequence number
+        self.db.add(
+            ConversationMessageDB(
+                id=message.id,
+                conversation_id=conversation_id,
+                seq=db_conv.message_count,
+                role=message.role,
+                content=message.content,
+                tool_used=message.tool_used,
+                created_at=message.created_at,
+            )
+        )
+
+        # Maintain the conversation index
+        if db_conv.message_count == 0:
+            db_conv.snippet = content[:SNIPPET_LENGTH]
+        db_conv.message_count += 1
         db_conv.updated_at = datetime.utcnow()
         self.db.commit()
-        
+
         return message
 
+    def get_messages(
+        self,
+        conversation_id: str,
+        start_seq: int = 0,
+        end_seq: Optional[int] = None,
+    ) -> List[ConversationMessage]:
+        """Get messages with start_seq <= seq < end_seq, oldest first."""
+        query = self.db.query(ConversationMessageDB).filter(
+            ConversationMessageDB.conversation_id == conversation_id,
+            ConversationMessageDB.seq >= start_seq,
+        )
+        if end_seq is not None:
+            query = query.filter(ConversationMessageDB.seq < end_seq)
+
+        return [self._to_schema(row) for row in query.order_by(ConversationMessageDB.seq).all()]
+
+    def get_recent_messages(
+        self,
+        conversation_id: str,
+        limit: int = 10,
+    ) -> List[ConversationMessage]:
+        """Get the last `limit` messages, oldest first."""
+        rows = (
+            self.db.query(ConversationMessageDB)
+            .filter(ConversationMessageDB.conversation_id == conversation_id)
+            .order_by(ConversationMessageDB.seq.desc())
+            .limit(limit)
+            .all()
+        )
+        return [self._to_schema(row) for row in reversed(rows)]
+
+    def count_messages(self, conversation_id: str) -> int:
+        """Count messages in a conversation."""
+        count = self.db.query(ConversationDB.message_count).filter(
+            ConversationDB.id == conversation_id
+        ).scalar()
+        return count or 0
+
+    def list_recent_index(
+        self,
+        limit: int = 3,
+        exclude_id: Optional[str] = None,
+    ) -> List[ConversationIndexEntry]:
+        """Get index entries of the most recently updated non-empty conversations."""
+        query = self.db.query(ConversationDB).filter(ConversationDB.message_count > 0)
+        if exclude_id:
+            query = query.filter(ConversationDB.id != exclude_id)
+
+        db_convs = query.order_by(ConversationDB.updated_at.desc()).limit(limit).all()
+        return [self._to_index_entry(db_conv) for db_conv in db_convs]
+
+    def get_messages_before(
+        self,
+        conversation_id: str,
+        before: Optional[int] = None,
+        limit: int = 50,
+    ) -> Tuple[List[ConversationMessage], Optional[int]]:
+        """
+        Get up to `limit` messages older than seq `before` (newest page if None).
+
+        Returns:
+            (messages oldest first, seq to pass as `before` for the next older page or None)
+        """
+        query = self.db.query(ConversationMessageDB).filter(
+            ConversationMessageDB.conversation_id == conversation_id
+        )
+        if before is not None:
+            query = query.filter(ConversationMessageDB.seq < before)
+
+        rows = query.order_by(ConversationMessageDB.seq.desc()).limit(limit).all()
+        rows.reverse()
+        next_before = rows[0].seq if rows and rows[0].seq > 0 else None
+        return [self._to_schema(row) for row in rows], next_before
+
+    def list_conversation_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[ConversationIndexEntry], Optional[str]]:
+        """
+        List conversation index entries ordered by (updated_at, id) descending.
+
+        Args:
+            limit: Page size
+            cursor: Opaque cursor returned by the previous page
+
+        Returns:
+            (entries, cursor for the next page or None)
+        """
+        query = self.db.query(ConversationDB)
+        if cursor:
+            updated_at, conversation_id = self._decode_cursor(cursor)
+            query = query.filter(
+                or_(
+                    ConversationDB.updated_at < updated_at,
+                    and_(ConversationDB.updated_at == updated_at, ConversationDB.id < conversation_id),
+                )
+            )
+
+        # Fetch one extra row to know whether another page exists
+        db_convs = (
+            query.order_by(ConversationDB.updated_at.desc(), ConversationDB.id.desc())
+            .limit(limit + 1)
+            .all()
+        )
+        has_more = len(db_convs) > limit
+        db_convs = db_convs[:limit]
+
+        next_cursor = None
+        if has_more and db_convs:
+            next_cursor = self._encode_cursor(db_convs[-1].updated_at, db_convs[-1].id)
+        return [self._to_index_entry(db_conv) for db_conv in db_convs], next_cursor
+
     def get_conversation_messages(
         self,
         conversation_id: str,
         limit: int = 10,
     ) -> List[dict]:
         """Get recent messages for LLM context."""
-        conversation = self.get_conversation(conversation_id)
-        if not conversation:
+        if not self.db.query(ConversationDB.id).filter(ConversationDB.id == conversation_id).first():
             raise ValueError(f"Conversation {conversation_id} not found")
-        
-        return conversation.get_messages_for_context(limit)
+
+        return [
+            {"role": msg.role, "content": msg.content}
+            for msg in self.get_recent_messages(conversation_id, limit)
+        ]
+
+    def get_messages_by_conversation(
+        self,
+        conversation_ids: Optional[List[str]] = None,
+    ) -> Dict[str, List[ConversationMessage]]:
+        """Load messages of several conversations in one ordered query (all if ids is None)."""
+        query = self.db.query(ConversationMessageDB)
+        if conversation_ids is not None:
+            if not conversation_ids:
+                return {}
+            query = query.filter(ConversationMessageDB.conversation_id.in_(conversation_ids))
+
+        messages_by_conv: Dict[str, List[ConversationMessage]] = {}
+        rows = query.order_by(ConversationMessageDB.conversation_id, ConversationMessageDB.seq).all()
+        for row in rows:
+            messages_by_conv.setdefault(row.conversation_id, []).append(self._to_schema(row))
+        return messages_by_conv
 
     def list_conversations(self) -> List[ConversationHistory]:
         """List all conversations."""
         db_convs = self.db.query(ConversationDB).all()
-        
-        conversations = []
-        for db_conv in db_convs:
-            messages_data = json.loads(db_conv.messages)
-            messages = [
-                ConversationMessage(**msg) for msg in messages_data
-            ]
-            conversations.append(
-                ConversationHistory(
-                    id=db_conv.id,
-                    messages=messages,
-                    created_at=db_conv.created_at,
-                    updated_at=db_conv.updated_at,
-                )
+        messages_by_conv = self.get_messages_by_conversation()
+
+        return [
+            ConversationHistory(
+                id=db_conv.id,
+                messages=messages_by_conv.get(db_conv.id, []),
+                created_at=db_conv.created_at,
+                updated_at=db_conv.updated_at,
             )
-        
-        return conversations
+            for db_conv in db_convs
+        ]
 
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation."""
         db_conv = self.db.query(ConversationDB).filter(
             ConversationDB.id == conversation_id
         ).first()
-        
+
         if not db_conv:
             return False
-            
+
         self.db.delete(db_conv)
+        self.db.query(ConversationMessageDB).filter(
+            ConversationMessageDB.conversation_id == conversation_id
+        ).delete()
+        self.db.query(ConversationSummaryDB).filter(
+            ConversationSummaryDB.conversation_id == conversation_id
+        ).delete()
         self.db.commit()
         return True
+
+    @staticmethod
+    def _encode_cursor(updated_at: datetime, conversation_id: str) -> str:
+        raw = f"{updated_at.isoformat()}|{conversation_id}"
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+            updated_at, conversation_id = raw.split("|", 1)
+            return datetime.fromisoformat(updated_at), conversation_id
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _to_index_entry(db_conv: ConversationDB) -> ConversationIndexEntry:
+        """Convert a conversation row to its index entry."""
+        return ConversationIndexEntry(
+            id=db_conv.id,
+            snippet=db_conv.snippet,
+            message_count=db_conv.message_count or 0,
+            created_at=db_conv.created_at,
+            updated_at=db_conv.updated_at,
+        )
+
+    @staticmethod
+    def _to_schema(row: ConversationMessageDB) -> ConversationMessage:
+        """Convert a message row to its Pydantic schema."""
+        return ConversationMessage(
+            id=row.id,
+            role=row.role,
+            content=row.content,
+            tool_used=row.tool_used,
+            created_at=row.created_at,
+        )
+
+
+class AsyncConversationService:
+    """Async counterpart of ConversationService for event-loop request handlers.
+
+    Covers the operations on the chat hot path; conversions and cursors are
+    shared with ConversationService.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """Initialize async conversation service."""
+        self.db = db
+
+    async def create_conversation(self) -> ConversationHistory:
+        """Create a new conversation."""
+        conversation_id = str(uuid.uuid4())
+        self.db.add(ConversationDB(id=conversation_id, messages=json.dumps([])))
+        await self.db.commit()
+        return ConversationHistory(id=conversation_id, messages=[])
+
+    async def get_conversation(
+        self,
+        conversation_id: str,
+        include_messages: bool = True,
+    ) -> Optional[ConversationHistory]:
+        """Get conversation by ID (optionally without loading its messages)."""
+        db_conv = await self.db.get(ConversationDB, conversation_id)
+        if not db_conv:
+            return None
+
+        messages = await self.get_messages(conversation_id) if include_messages else []
+
+        return ConversationHistory(
+            id=db_conv.id,
+            messages=messages,
+            created_at=db_conv.created_at,
+            updated_at=db_conv.updated_at,
+        )
+
+    async def add_message(
+        self,
+        conversation_id: str,
+        role: str,
+        content: str,
+        tool_used: Optional[str] = None,
+    ) -> ConversationMessage:
+        """Append a message to a conversation."""
+        db_conv = await self.db.get(ConversationDB, conversation_id)
+        if not db_conv:
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        message = ConversationMessage(
+            id=str(uuid.uuid4()),
+            role=role,
+            content=content,
+            tool_used=tool_used,
+        )
+        self.db.add(
+            ConversationMessageDB(
+                id=message.id,
+                conversation_id=conversation_id,
+                seq=db_conv.message_count,
+                role=message.role,
+                content=message.content,
+                tool_used=message.tool_used,
+                created_at=message.created_at,
+            )
+        )
+
+        if db_conv.message_count == 0:
+            db_conv.snippet = content[:SNIPPET_LENGTH]
+        db_conv.message_count += 1
+        db_conv.updated_at = datetime.utcnow()
+        await self.db.commit()
+
+        return message
+
+    async def get_messages(
+        self,
+        conversation_id: str,
+        start_seq: int = 0,
+        end_seq: Optional[int] = None,
+    ) -> List[ConversationMessage]:
+        """Get messages with start_seq <= seq < end_seq, oldest first."""
+        stmt = select(ConversationMessageDB).where(
+            ConversationMessageDB.conversation_id == conversation_id,
+            ConversationMessageDB.seq >= start_seq,
+        )
+        if end_seq is not None:
+            stmt = stmt.where(ConversationMessageDB.seq < end_seq)
+
+        rows = (await self.db.scalars(stmt.order_by(ConversationMessageDB.seq))).all()
+        return [ConversationService._to_schema(row) for row in rows]
+
+    async def get_recent_messages(
+        self,
+        conversation_id: str,
+        limit: int = 10,
+    ) -> List[ConversationMessage]:
+        """Get the last `limit` messages, oldest first."""
+        stmt = (
+            select(ConversationMessageDB)
+            .where(ConversationMessageDB.conversation_id == conversation_id)
+            .order_by(ConversationMessageDB.seq.desc())
+            .limit(limit)
+        )
+        rows = (await self.db.scalars(stmt)).all()
+        return [ConversationService._to_schema(row) for row in reversed(rows)]
+
+    async def count_messages(self, conversation_id: str) -> int:
+        """Count messages in a conversation."""
+        count = await self.db.scalar(
+            select(ConversationDB.message_count).where(ConversationDB.id == conversation_id)
+        )
+        return count or 0
+
+    async def list_recent_index(
+        self,
+        limit: int = 3,
+        exclude_id: Optional[str] = None,
+    ) -> List[ConversationIndexEntry]:
+        """Get index entries of the most recently updated non-empty conversations."""
+        stmt = select(ConversationDB).where(ConversationDB.message_count > 0)
+        if exclude_id:
+            stmt = stmt.where(ConversationDB.id != exclude_id)
+
+        stmt = stmt.order_by(ConversationDB.updated_at.desc()).limit(limit)
+        db_convs = (await self.db.scalars(stmt)).all()
+        return [ConversationService._to_index_entry(db_conv) for db_conv in db_convs]
+
+    async def get_conversation_messages(
+        self,
+        conversation_id: str,
+        limit: int = 10,
+    ) -> List[dict]:
+        """Get recent messages for LLM context."""
+        if not await self.db.get(ConversationDB, conversation_id):
+            raise ValueError(f"Conversation {conversation_id} not found")
+
+        return [
+            {"role": msg.role, "content": msg.content}
+            for msg in await self.get_recent_messages(conversation_id, limit)
+        ]
+
+
+class ChatTurn:
+    """Unit of work for one chat turn.
+
+    Messages are buffered in memory and each save() writes the buffer, plus
+    the conversation row if it is new, in one transaction. The chat routes
+    save twice per turn: the user message is committed before the agent
+    runs, so a crash or kill mid-turn cannot lose it, and the reply (with
+    any tool output) is committed when the agent finishes. No transaction
+    is held open while the agent runs.
+    """
+
+    def __init__(self, conversation_id: str, is_new: bool = False):
+        """
+        Initialize chat turn.
+
+        Args:
+            conversation_id: Conversation the turn belongs to
+            is_new: Whether the conversation row has to be created on save
+        """
+        self.conversation_id = conversation_id
+        self.is_new = is_new
+        self.pending: List[ConversationMessage] = []
+
+    def add_message(
+        self,
+        role: str,
+        content: str,
+        tool_used: Optional[str] = None,
+    ) -> ConversationMessage:
+        """Buffer a message; it is written on the next save()."""
+        message = ConversationMessage(
+            id=str(uuid.uuid4()),
+            role=role,
+            content=content,
+            tool_used=tool_used,
+        )
+        self.pending.append(message)
+        return message
+
+    async def save(self, db: AsyncSession) -> None:
+        """
+        Write the conversation (if new) and all buffered messages in one commit.
+
+        The conversation row is updated with a version check; if another
+        writer (e.g. a different worker process) appended first, the row is
+        re-read and the messages are renumbered after the new tail.
+        """
+        if not self.pending and not self.is_new:
+            return
+
+        retries = settings.conversation_save_retries
+        for attempt in range(retries + 1):
+            try:
+                await self._write(db)
+                break
+            except (StaleDataError, IntegrityError):
+                await db.rollback()
+                if self.is_new or attempt == retries:
+                    conversation_locks.record_conflict(resolved=False)
+                    raise
+                conversation_locks.record_conflict()
+            except Exception:
+                await db.rollback()
+                raise
+
+        self.is_new = False
+        self.pending = []
+
+    async def _write(self, db: AsyncSession) -> None:
+        if self.is_new:
+            db_conv = ConversationDB(
+                id=self.conversation_id,
+                messages=json.dumps([]),
+                message_count=0,
+            )
+            db.add(db_conv)
+        else:
+            db_conv = await db.get(ConversationDB, self.conversation_id, populate_existing=True)
+            if not db_conv:
+                raise ValueError(f"Conversation {self.conversation_id} not found")
+
+        for message in self.pending:
+            db.add(
+                ConversationMessageDB(
+                    id=message.id,
+                    conversation_id=self.conversation_id,
+                    seq=db_conv.message_count,
+                    role=message.role,
+                    content=message.content,
+                    tool_used=message.tool_used,
+                    created_at=message.created_at,
+                )
+            )
+            if db_conv.message_count == 0:
+                db_conv.snippet = message.content[:SNIPPET_LENGTH]
+            db_conv.message_count += 1
+        db_conv.updated_at = datetime.utcnow()
+        await db.commit()
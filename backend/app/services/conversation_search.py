@@ -0,0 +1,210 @@
+"""Full-text search over conversation messages."""
+
+import html
+import re
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import ConversationMessageDB
+from ..schemas import MessageSearchHit
+
+# FTS5 table created by db.init_db on SQLite
+MESSAGE_SEARCH_TABLE = "conversation_messages_fts"
+
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+SNIPPET_TOKENS = 16
+MAX_QUERY_TERMS = 16
+
+# Ignored when matching any term of free text (e.g. a chat message)
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could do does for from had has have how i if in "
+    "is it its me my of on or our please so that the their them then there this to "
+    "was we were what when where which who why will with would you your".split()
+)
+
+
+def query_terms(query: str, match_any: bool = False) -> List[str]:
+    """Split free text into distinct lowercase search terms (stopwords dropped for match_any)."""
+    terms = re.findall(r"\w+", query.lower())
+    if match_any:
+        terms = [term for term in terms if term not in STOPWORDS and len(term) > 2]
+    return list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+
+
+def build_match_query(query: str, match_any: bool = False, prefix: bool = False) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every term is quoted, so user input can never inject FTS5 operators.
+
+    Args:
+        query: Free text
+        match_any: OR the terms (ranked by how many match) instead of requiring all
+        prefix: Let the last term match as a prefix (search-as-you-type)
+
+    Returns:
+        MATCH expression, or "" when the text has no searchable terms
+    """
+    terms = query_terms(query, match_any)
+    if not terms:
+        return ""
+
+    quoted = [f'"{term}"' for term in terms]
+    if prefix:
+        quoted[-1] += "*"
+    return (" OR " if match_any else " ").join(quoted)
+
+
+class ConversationSearchService:
+    """Service for ranked full-text search over conversation history.
+
+    Uses the FTS5 index on SQLite and falls back to a LIKE scan on other
+    databases or when the index is unavailable.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """Initialize conversation search service."""
+        self.db = db
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 20,
+        exclude_id: Optional[str] = None,
+        match_any: bool = False,
+        prefix: bool = False,
+        markup: bool = True,
+    ) -> List[MessageSearchHit]:
+        """
+        Search messages, best match first.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of hits
+            exclude_id: Conversation to leave out
+            match_any: Match messages containing any term instead of all
+            prefix: Let the last term match as a prefix
+            markup: Mark matched terms with <mark>; otherwise return plain text
+
+        Returns:
+            Ranked message hits with snippets and highlights
+        """
+        match = build_match_query(query, match_any=match_any, prefix=prefix)
+        if not match:
+            return []
+
+        if self.db.bind.dialect.name == "sqlite":
+            try:
+                return await self._search_fts(match, limit, exclude_id, markup)
+            except OperationalError as e:
+                print(f"Full-text search unavailable, scanning instead: {e}")
+        return await self._search_like(query_terms(query, match_any), limit, exclude_id, match_any, markup)
+
+    async def related_sessions(
+        self,
+        message: str,
+        exclude_id: Optional[str] = None,
+        limit: int = 3,
+    ) -> List[MessageSearchHit]:
+        """Get the best-matching message of each of the `limit` conversations most related to message."""
+        hits = await self.search(
+            message, limit=limit * 10, exclude_id=exclude_id, match_any=True, markup=False
+        )
+        best: dict = {}
+        for hit in hits:
+            best.setdefault(hit.conversation_id, hit)
+            if len(best) == limit:
+                break
+        return list(best.values())
+
+    async def _search_fts(
+        self,
+        match: str,
+        limit: int,
+        exclude_id: Optional[str],
+        markup: bool,
+    ) -> List[MessageSearchHit]:
+        # Matches are delimited with control characters first, so the stored
+        # text can be HTML-escaped before the real tags go in
+        sql = f"""
+            SELECT m.id, m.conversation_id, m.role, m.created_at,
+                   snippet({MESSAGE_SEARCH_TABLE}, 0, char(2), char(3), '...', {SNIPPET_TOKENS}) AS snippet,
+                   highlight({MESSAGE_SEARCH_TABLE}, 0, char(2), char(3)) AS highlight,
+                   bm25({MESSAGE_SEARCH_TABLE}) AS rank
+            FROM {MESSAGE_SEARCH_TABLE}
+            JOIN conversation_messages m ON m.search_rowid = {MESSAGE_SEARCH_TABLE}.rowid
+            WHERE {MESSAGE_SEARCH_TABLE} MATCH :match
+            {"AND m.conversation_id != :exclude_id" if exclude_id else ""}
+            ORDER BY rank
+            LIMIT :limit
+        """
+        params = {"match": match, "limit": limit, "exclude_id": exclude_id}
+        rows = (await self.db.execute(text(sql), params)).all()
+        return [
+            MessageSearchHit(
+                message_id=row.id,
+                conversation_id=row.conversation_id,
+                role=row.role,
+                snippet=self._mark(row.snippet, markup),
+                highlight=self._mark(row.highlight, markup),
+                # bm25() is lower-is-better; flip it so higher means more relevant
+                score=round(-row.rank, 4),
+                created_at=row.created_at,
+            )
+            for row in rows
+        ]
+
+    async def _search_like(
+        self,
+        terms: List[str],
+        limit: int,
+        exclude_id: Optional[str],
+        match_any: bool,
+        markup: bool,
+    ) -> List[MessageSearchHit]:
+        conditions = [ConversationMessageDB.content.ilike(f"%{term}%") for term in terms]
+        stmt = select(ConversationMessageDB).where(or_(*conditions) if match_any else and_(*conditions))
+        if exclude_id:
+            stmt = stmt.where(ConversationMessageDB.conversation_id != exclude_id)
+        stmt = stmt.order_by(ConversationMessageDB.created_at.desc()).limit(limit)
+
+        hits = []
+        for row in (await self.db.scalars(stmt)).all():
+            content = row.content or ""
+            start = max(0, content.lower().find(terms[0]) - 60)
+            snippet = ("..." if start else "") + content[start:start + 160]
+            hits.append(
+                MessageSearchHit(
+                    message_id=row.id,
+                    conversation_id=row.conversation_id,
+                    role=row.role,
+                    snippet=self._mark_terms(snippet, terms) if markup else snippet,
+                    highlight=self._mark_terms(content, terms) if markup else content,
+                    created_at=row.created_at,
+                )
+            )
+        return hits
+
+    @staticmethod
+    def _mark(delimited: str, markup: bool) -> str:
+        """Turn \\x02/\\x03 match delimiters into <mark> tags (escaping the text) or drop them."""
+        if not markup:
+            return (delimited or "").replace("\x02", "").replace("\x03", "")
+        return (
+            html.escape(delimited or "")
+            .replace("\x02", HIGHLIGHT_OPEN)
+            .replace("\x03", HIGHLIGHT_CLOSE)
+        )
+
+    @staticmethod
+    def _mark_terms(content: str, terms: List[str]) -> str:
+        """HTML-escape content and mark every occurrence of the terms."""
+        escaped = html.escape(content)
+        if not terms:
+            return escaped
+        pattern = re.compile("|".join(re.escape(html.escape(term)) for term in terms), re.IGNORECASE)
+        return pattern.sub(lambda m: f"{HIGHLIGHT_OPEN}{m.group(0)}{HIGHLIGHT_CLOSE}", escaped)
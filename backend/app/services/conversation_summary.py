@@ -0,0 +1,140 @@
+"""Rolling conversation summary service."""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..core.llm import AsyncGroqLLM
+from ..database import ConversationSummaryDB
+from .conversation import AsyncConversationService
+
+# Hard cap on raw tail messages if summarization keeps failing
+MAX_TAIL_MESSAGES = 40
+
+# Conversations with a summary update in flight in this process
+_updating: Set[str] = set()
+
+
+class ConversationSummaryService:
+    """Service for maintaining an incrementally updated summary per conversation.
+
+    Messages older than the recent tail are folded into the summary every
+    ``summary_update_every`` messages, so the prompt carries "summary + tail"
+    with bounded size regardless of conversation length.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """Initialize conversation summary service."""
+        self.db = db
+        self.conversation_service = AsyncConversationService(db)
+
+    async def get_summary(self, conversation_id: str) -> Optional[ConversationSummaryDB]:
+        """Get the stored summary row for a conversation."""
+        return await self.db.get(ConversationSummaryDB, conversation_id)
+
+    async def get_context_messages(
+        self,
+        conversation_id: str,
+        fallback_limit: int = 15,
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Get the summary text and the unsummarized recent tail for LLM context.
+
+        Args:
+            conversation_id: Conversation ID
+            fallback_limit: Message count used when summaries are disabled
+
+        Returns:
+            (summary, messages) where messages are in LLM context format
+        """
+        if not settings.summary_enabled:
+            return "", await self.conversation_service.get_conversation_messages(conversation_id, fallback_limit)
+
+        db_summary = await self.get_summary(conversation_id)
+        summarized_count = db_summary.summarized_count if db_summary else 0
+        total = await self.conversation_service.count_messages(conversation_id)
+        start_seq = max(summarized_count, total - MAX_TAIL_MESSAGES)
+        tail = await self.conversation_service.get_messages(conversation_id, start_seq=start_seq)
+
+        return (
+            db_summary.summary if db_summary else "",
+            [{"role": msg.role, "content": msg.content} for msg in tail],
+        )
+
+    async def needs_update(self, conversation_id: str) -> bool:
+        """Check whether enough messages have accumulated beyond the tail to fold."""
+        db_summary = await self.get_summary(conversation_id)
+        summarized_count = db_summary.summarized_count if db_summary else 0
+        total = await self.conversation_service.count_messages(conversation_id)
+        pending = total - summarized_count - settings.summary_tail_messages
+        return pending >= settings.summary_update_every
+
+    async def update_summary(self, conversation_id: str) -> bool:
+        """Fold messages older than the tail into the summary. Returns True if updated."""
+        if not settings.summary_enabled or conversation_id in _updating:
+            return False
+
+        _updating.add(conversation_id)
+        try:
+            if not await self.needs_update(conversation_id):
+                return False
+
+            db_summary = await self.get_summary(conversation_id)
+            summarized_count = db_summary.summarized_count if db_summary else 0
+            total = await self.conversation_service.count_messages(conversation_id)
+            fold_until = total - settings.summary_tail_messages
+            to_fold = await self.conversation_service.get_messages(
+                conversation_id, start_seq=summarized_count, end_seq=fold_until
+            )
+
+            transcript = "\n".join(
+                f"{msg.role.upper()}: {msg.content}" for msg in to_fold
+            )
+            prompt = f"""
+            You maintain a running summary of a conversation between a user and the OpenPaw agent.
+
+            CURRENT SUMMARY:
+            {db_summary.summary if db_summary and db_summary.summary else "(none yet)"}
+
+            NEW MESSAGES TO FOLD IN:
+            {transcript}
+
+            INSTRUCTIONS:
+            1. Return the updated summary only, as concise Markdown bullets.
+            2. Keep facts, names, numbers, decisions, tool results and open questions.
+            3. Drop greetings and filler. Stay under 200 words.
+            """
+
+            llm = AsyncGroqLLM(
+                api_key=settings.groq_api_key,
+                model=settings.summary_model,
+                temperature=0.2,
+                max_tokens=settings.summary_max_tokens,
+            )
+            summary = (await llm.generate(prompt)).strip()
+
+            if not db_summary:
+                db_summary = ConversationSummaryDB(conversation_id=conversation_id)
+                self.db.add(db_summary)
+            db_summary.summary = summary
+            db_summary.summarized_count = fold_until
+            db_summary.updated_at = datetime.utcnow()
+            await self.db.commit()
+            return True
+        except Exception as e:
+            # Silent fail - the tail keeps growing until the next successful fold
+            print(f"Conversation summary update failed: {e}")
+            await self.db.rollback()
+            return False
+        finally:
+            _updating.discard(conversation_id)
+
+    async def delete_summary(self, conversation_id: str) -> None:
+        """Delete the summary of a conversation."""
+        await self.db.execute(
+            delete(ConversationSummaryDB).where(ConversationSummaryDB.conversation_id == conversation_id)
+        )
+        await self.db.commit()
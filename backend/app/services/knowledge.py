@@ -0,0 +1,128 @@
+"""Knowledge base documents, their chunks and vectors."""
+
+import uuid
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import KnowledgeChunkDB, MemoryDB
+from ..memory.chunker import TextChunker
+from .rag_registry import rag_registry
+
+
+class KnowledgeService:
+    """Service for knowledge documents (MemoryDB rows of type "knowledge").
+
+    Each document is split into chunks stored in knowledge_chunks; every
+    chunk is embedded and added to the vector store, and its row records the
+    vector id.
+    """
+
+    def __init__(self, db: Session, chunker: Optional[TextChunker] = None):
+        """Initialize knowledge service."""
+        self.db = db
+        self.chunker = chunker or TextChunker(
+            settings.knowledge_chunk_tokens, settings.knowledge_chunk_overlap_tokens
+        )
+
+    def list_documents(self) -> List[MemoryDB]:
+        """List all knowledge documents."""
+        return self.db.query(MemoryDB).filter(MemoryDB.memory_type == "knowledge").all()
+
+    def chunk_counts(self) -> Dict[str, int]:
+        """Number of stored chunks per document id."""
+        rows = (
+            self.db.query(KnowledgeChunkDB.document_id, func.count(KnowledgeChunkDB.id))
+            .group_by(KnowledgeChunkDB.document_id)
+            .all()
+        )
+        return {document_id: count for document_id, count in rows}
+
+    def chunk_count(self, doc_id: str) -> int:
+        """Number of stored chunks of one document."""
+        return self.db.query(KnowledgeChunkDB).filter(KnowledgeChunkDB.document_id == doc_id).count()
+
+    def add_document(self, title: str, content: str, doc_type: str = ".md") -> MemoryDB:
+        """
+        Store a document, chunk it and index the chunks.
+
+        The document and its chunks are committed first; indexing failures
+        leave the chunks with vector_id None.
+
+        Args:
+            title: Document title
+            content: Document text
+            doc_type: File extension shown in listings
+
+        Returns:
+            Stored document
+        """
+        doc = MemoryDB(
+            id=str(uuid.uuid4()),
+            content=content,
+            memory_type="knowledge",
+            tags=f"{title},{doc_type}",
+        )
+        chunks = [
+            KnowledgeChunkDB(
+                id=str(uuid.uuid4()),
+                document_id=doc.id,
+                seq=chunk.seq,
+                content=chunk.text,
+                token_count=chunk.token_count,
+                start_offset=chunk.start,
+                end_offset=chunk.end,
+            )
+            for chunk in self.chunker.split(content)
+        ]
+        self.db.add(doc)
+        self.db.add_all(chunks)
+        self.db.commit()
+        self.db.refresh(doc)
+
+        try:
+            self.index_chunks(title, chunks)
+        except Exception as e:
+            print(f"Vector Store indexing skipped/failed: {e}")
+        return doc
+
+    def index_chunks(self, title: str, chunks: List[KnowledgeChunkDB]) -> None:
+        """Embed chunks in batches, add them to the vector store and record their vector ids."""
+        if not chunks:
+            return
+        rag = rag_registry.get_rag_service()
+        vector_ids = rag.add_knowledge(
+            [chunk.content for chunk in chunks],
+            metadata=[
+                {"id": chunk.document_id, "title": title, "chunk": chunk.seq, "chunk_id": chunk.id}
+                for chunk in chunks
+            ],
+            batch_size=settings.embedding_batch_size,
+        )
+        for chunk, vector_id in zip(chunks, vector_ids):
+            chunk.vector_id = vector_id
+        self.db.commit()
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document, its chunk rows and its vectors; False if it does not exist."""
+        doc = self.db.query(MemoryDB).filter(MemoryDB.id == doc_id).first()
+        if not doc:
+            return False
+        chunks = self.db.query(KnowledgeChunkDB).filter(KnowledgeChunkDB.document_id == doc_id)
+        vector_ids = [chunk.vector_id for chunk in chunks if chunk.vector_id is not None]
+
+        try:
+            vector_store = rag_registry.get_vector_store()
+            # Chunk rows name the vectors; documents indexed before chunking
+            # are found through the store's document id mapping
+            removed = vector_store.delete_vectors(vector_ids) + vector_store.delete_by_document(doc_id)
+            print(f"Deleted {removed} vectors of knowledge document {doc_id}")
+        except Exception as e:
+            print(f"Vector Store deletion skipped/failed: {e}")
+
+        chunks.delete()
+        self.db.delete(doc)
+        self.db.commit()
+        return True
@@ -0,0 +1,374 @@
+"""Hybrid keyword + vector retrieval over knowledge chunks.
+
+Dense retrieval finds paraphrases but misses exact identifiers (tickers,
+error codes, names) that embed close to unrelated text; BM25 finds those.
+Hybrid mode runs both searches concurrently over the same chunks and fuses
+the two rankings with reciprocal rank fusion (RRF), which needs no score
+calibration between them.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, literal, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..core.context_assembler import TokenCounter
+from ..database import KnowledgeChunkDB, MemoryDB
+from ..schemas import KnowledgeSearchHit
+from .conversation_search import MAX_QUERY_TERMS, STOPWORDS
+from .rag_registry import rag_registry
+from .vector_db import RAGService
+
+# FTS5 table created by db.init_db on SQLite
+CHUNK_SEARCH_TABLE = "knowledge_chunks_fts"
+
+HYBRID = "hybrid"
+VECTOR = "vector"
+LEXICAL = "lexical"
+SEARCH_MODES = (HYBRID, VECTOR, LEXICAL)
+
+_TERM_RE = re.compile(r"\w+")
+
+
+def _title(tags: Optional[str]) -> Optional[str]:
+    """Document title from MemoryDB.tags ("title,ext")."""
+    return tags.split(",")[0] if tags else None
+
+
+def _ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def lexical_terms(query: str) -> List[str]:
+    """
+    Split a query into distinct lowercase keyword-search terms.
+
+    Unlike conversation search, short tokens are kept when they look like
+    identifiers: uppercase words ("GE", "T"), and anything with a digit
+    ("E42"). Other stopwords and one- or two-letter words are dropped.
+
+    Args:
+        query: Free text
+
+    Returns:
+        Terms in query order
+    """
+    terms = []
+    for token in _TERM_RE.findall(query):
+        term = token.lower()
+        identifier = any(ch.isdigit() for ch in token) or (token.isupper() and term not in ("i", "a"))
+        if identifier or (term not in STOPWORDS and len(term) > 2):
+            terms.append(term)
+    return list(dict.fromkeys(terms))[:MAX_QUERY_TERMS]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> Dict[str, float]:
+    """
+    Fuse rankings by summing 1 / (k + rank) over every ranking a key appears in.
+
+    Args:
+        rankings: Keys in rank order, best first, one list per retriever
+        k: Smoothing constant; larger values flatten the gap between top ranks
+
+    Returns:
+        Fused score per key
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+    return scores
+
+
+def hit_key(hit: KnowledgeSearchHit) -> str:
+    """Identity of a chunk across the vector and keyword stages."""
+    # Vectors indexed before chunking have no chunk row to match
+    return hit.chunk_id or f"{hit.document_id}:{hit.text}"
+
+
+def fuse_hits(
+    vector_hits: List[KnowledgeSearchHit],
+    lexical_hits: List[KnowledgeSearchHit],
+    rrf_k: int,
+) -> List[KnowledgeSearchHit]:
+    """Merge the candidates of both stages, ordered by RRF score."""
+    merged: Dict[str, KnowledgeSearchHit] = {}
+    for hit in vector_hits:
+        merged[hit_key(hit)] = hit.model_copy()
+    for hit in lexical_hits:
+        existing = merged.get(hit_key(hit))
+        if existing is None:
+            merged[hit_key(hit)] = hit.model_copy()
+        else:
+            existing.lexical_score = hit.lexical_score
+            existing.lexical_rank = hit.lexical_rank
+
+    scores = reciprocal_rank_fusion(
+        [[hit_key(hit) for hit in vector_hits], [hit_key(hit) for hit in lexical_hits]], rrf_k
+    )
+    for key, hit in merged.items():
+        hit.score = round(scores[key], 6)
+    return sorted(merged.values(), key=lambda hit: hit.score, reverse=True)
+
+
+def vector_hit(rank: int, doc: str, score: float, metadata: dict) -> KnowledgeSearchHit:
+    """Hit for one vector store result."""
+    return KnowledgeSearchHit(
+        chunk_id=metadata.get("chunk_id"),
+        document_id=metadata.get("id"),
+        title=metadata.get("title"),
+        text=doc,
+        score=round(score, 4),
+        vector_score=round(score, 4),
+        vector_rank=rank,
+    )
+
+
+def _fts_statement(terms: List[str], limit: int):
+    # Every term is quoted, so user input can never inject FTS5 operators
+    match = " OR ".join(f'"{term}"' for term in terms)
+    sql = f"""
+        SELECT c.id, c.document_id, c.content, m.tags,
+               bm25({CHUNK_SEARCH_TABLE}) AS rank
+        FROM {CHUNK_SEARCH_TABLE}
+        JOIN knowledge_chunks c ON c.search_rowid = {CHUNK_SEARCH_TABLE}.rowid
+        LEFT JOIN memory m ON m.id = c.document_id
+        WHERE {CHUNK_SEARCH_TABLE} MATCH :match
+        ORDER BY rank
+        LIMIT :limit
+    """
+    return text(sql).bindparams(match=match, limit=limit)
+
+
+def _fts_hits(rows) -> List[KnowledgeSearchHit]:
+    return [
+        KnowledgeSearchHit(
+            chunk_id=row.id,
+            document_id=row.document_id,
+            title=_title(row.tags),
+            text=row.content,
+            # bm25() is lower-is-better; flip it so higher means more relevant
+            score=round(-row.rank, 4),
+            lexical_score=round(-row.rank, 4),
+            lexical_rank=rank,
+        )
+        for rank, row in enumerate(rows, 1)
+    ]
+
+
+def _like_statement(terms: List[str], limit: int):
+    # Rank by how many distinct terms a chunk contains
+    matched = sum(
+        (case((KnowledgeChunkDB.content.ilike(f"%{term}%"), 1), else_=0) for term in terms),
+        literal(0),
+    ).label("matched")
+    return (
+        select(KnowledgeChunkDB, MemoryDB.tags, matched)
+        .outerjoin(MemoryDB, MemoryDB.id == KnowledgeChunkDB.document_id)
+        .where(or_(*(KnowledgeChunkDB.content.ilike(f"%{term}%") for term in terms)))
+        .order_by(matched.desc(), func.length(KnowledgeChunkDB.content))
+        .limit(limit)
+    )
+
+
+def _like_hits(rows) -> List[KnowledgeSearchHit]:
+    return [
+        KnowledgeSearchHit(
+            chunk_id=chunk.id,
+            document_id=chunk.document_id,
+            title=_title(tags),
+            text=chunk.content,
+            score=float(count),
+            lexical_score=float(count),
+            lexical_rank=rank,
+        )
+        for rank, (chunk, tags, count) in enumerate(rows, 1)
+    ]
+
+
+def search_chunks_lexical(db: Session, query: str, limit: int) -> List[KnowledgeSearchHit]:
+    """
+    Keyword search over chunk text with a sync session, best match first.
+
+    Args:
+        db: Database session
+        query: Free-text query
+        limit: Maximum number of hits
+
+    Returns:
+        Ranked chunk hits
+    """
+    terms = lexical_terms(query)
+    if not terms:
+        return []
+    if db.bind.dialect.name == "sqlite":
+        try:
+            return _fts_hits(db.execute(_fts_statement(terms, limit)).all())
+        except OperationalError as e:
+            db.rollback()
+            print(f"Full-text search unavailable, scanning instead: {e}")
+    return _like_hits(db.execute(_like_statement(terms, limit)).all())
+
+
+def fit_budget(
+    hits: List[KnowledgeSearchHit],
+    max_tokens: int,
+    counter: TokenCounter,
+) -> List[KnowledgeSearchHit]:
+    """Keep hits, best first, until the next would exceed max_tokens (0 for no limit)."""
+    if not max_tokens:
+        return hits
+    kept, used = [], 0
+    for hit in hits:
+        tokens = counter.count(hit.text)
+        if used + tokens > max_tokens:
+            break
+        kept.append(hit)
+        used += tokens
+    return kept
+
+
+class KnowledgeSearchService:
+    """Service for keyword, vector and hybrid retrieval of knowledge chunks.
+
+    Keyword search uses the FTS5 index on SQLite and falls back to a LIKE
+    scan on other databases or when the index is unavailable.
+    """
+
+    def __init__(self, db: AsyncSession, rag_service: Optional[RAGService] = None):
+        """
+        Initialize knowledge search service.
+
+        Args:
+            db: Async database session
+            rag_service: RAG service for the vector stage (the shared one if omitted)
+        """
+        self.db = db
+        self.rag_service = rag_service
+        self.token_counter = TokenCounter()
+
+    async def search(
+        self,
+        query: str,
+        k: int = 5,
+        mode: str = HYBRID,
+        min_score: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        vector_candidates: Optional[int] = None,
+        lexical_candidates: Optional[int] = None,
+    ) -> Tuple[List[KnowledgeSearchHit], Dict[str, Any]]:
+        """
+        Retrieve the chunks most relevant to query.
+
+        In hybrid mode the vector and keyword searches run concurrently and
+        their candidates are fused with RRF. Without an embedding model
+        hybrid retrieval degrades to keyword search.
+
+        Args:
+            query: Free-text query
+            k: Maximum number of chunks
+            mode: hybrid, vector or lexical
+            min_score: Drop vector candidates below this similarity
+                (settings.rag_min_score if omitted)
+            max_tokens: Stop before the chunks exceed this many tokens
+                (settings.rag_max_context_tokens if omitted; 0 for no limit)
+            vector_candidates: Vector hits to fuse (settings.rag_vector_candidates if omitted)
+            lexical_candidates: Keyword hits to fuse (settings.rag_lexical_candidates if omitted)
+
+        Returns:
+            (hits, timings): chunks best first, and per-stage latencies in
+            milliseconds with candidate counts
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        min_score = settings.rag_min_score if min_score is None else min_score
+        max_tokens = settings.rag_max_context_tokens if max_tokens is None else max_tokens
+        if mode == HYBRID:
+            vector_candidates = max(k, vector_candidates or settings.rag_vector_candidates)
+            lexical_candidates = max(k, lexical_candidates or settings.rag_lexical_candidates)
+        else:
+            vector_candidates = lexical_candidates = k
+
+        started = time.perf_counter()
+        timings: Dict[str, Any] = {"mode": mode}
+
+        stages = []
+        if mode != LEXICAL:
+            stages.append(asyncio.to_thread(self._vector_stage, query, vector_candidates, min_score, timings))
+        if mode != VECTOR:
+            stages.append(self._lexical_stage(query, lexical_candidates, timings))
+        results = await asyncio.gather(*stages)
+        vector_hits = results[0] if mode != LEXICAL else []
+        lexical_hits = results[-1] if mode != VECTOR else []
+
+        fusion_started = time.perf_counter()
+        if mode == HYBRID:
+            hits = fuse_hits(vector_hits, lexical_hits, settings.rag_rrf_k)
+        else:
+            hits = vector_hits or lexical_hits
+        hits = fit_budget(hits[:k], max_tokens, self.token_counter)
+        timings["fusion_ms"] = _ms(fusion_started)
+        timings["total_ms"] = _ms(started)
+        return hits, timings
+
+    def _vector_stage(
+        self,
+        query: str,
+        limit: int,
+        min_score: float,
+        timings: Dict[str, Any],
+    ) -> List[KnowledgeSearchHit]:
+        """Embed the query and search the vector store (runs in a worker thread)."""
+        timings["vector_candidates"] = 0
+        try:
+            rag = self.rag_service or rag_registry.get_rag_service()
+            started = time.perf_counter()
+            embedding = rag.embedding_service.embed(query)
+            timings["embed_ms"] = _ms(started)
+
+            started = time.perf_counter()
+            results = rag.vector_store.search(embedding, limit)
+            timings["vector_ms"] = _ms(started)
+        except Exception as e:
+            print(f"Vector retrieval unavailable: {e}")
+            timings["vector_error"] = str(e)
+            return []
+
+        hits = [
+            vector_hit(rank, doc, score, metadata)
+            for rank, (doc, score, metadata) in enumerate(
+                (r for r in results if r[1] >= min_score), 1
+            )
+        ]
+        timings["vector_candidates"] = len(hits)
+        return hits
+
+    async def _lexical_stage(
+        self,
+        query: str,
+        limit: int,
+        timings: Dict[str, Any],
+    ) -> List[KnowledgeSearchHit]:
+        """Keyword search over chunk text, best match first."""
+        started = time.perf_counter()
+        hits: List[KnowledgeSearchHit] = []
+        terms = lexical_terms(query)
+        if terms:
+            if self.db.bind.dialect.name == "sqlite":
+                try:
+                    hits = _fts_hits((await self.db.execute(_fts_statement(terms, limit))).all())
+                except OperationalError as e:
+                    await self.db.rollback()
+                    print(f"Full-text search unavailable, scanning instead: {e}")
+                    hits = _like_hits((await self.db.execute(_like_statement(terms, limit))).all())
+            else:
+                hits = _like_hits((await self.db.execute(_like_statement(terms, limit))).all())
+        timings["lexical_ms"] = _ms(started)
+        timings["lexical_candidates"] = len(hits)
+        return hits
@@ -0,0 +1,162 @@
+"""Structured edit operations on markdown memory files.
+
+The memory analysis returns small edits instead of whole files, so its
+output stays the same size however large memory grows. Edits address
+``## Section`` headings and ``- bullet`` lines and are applied locally.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+ADD_BULLET = "add_bullet"
+APPEND_SECTION = "append_section"
+REPLACE_BULLET = "replace_bullet"
+DELETE_BULLET = "delete_bullet"
+OPERATIONS = (ADD_BULLET, APPEND_SECTION, REPLACE_BULLET, DELETE_BULLET)
+
+_BULLET_RE = re.compile(r"^\s*[-*+]\s+(.*)$")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+
+@dataclass
+class MemoryEdit:
+    """One edit operation on a memory file."""
+
+    op: str
+    file: str
+    section: str = ""  # Heading text, for add_bullet and append_section
+    text: str = ""  # New bullet or section body
+    old: str = ""  # Existing bullet to replace or delete
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["MemoryEdit"]:
+        """Build an edit from LLM output, or None if it is malformed."""
+        if not isinstance(data, dict):
+            return None
+        edit = cls(
+            op=str(data.get("op", "")).strip(),
+            file=str(data.get("file", "")).strip(),
+            section=str(data.get("section") or "").strip(),
+            text=str(data.get("text") or data.get("new") or "").strip(),
+            old=str(data.get("old") or "").strip(),
+        )
+        if edit.op not in OPERATIONS or not edit.file:
+            return None
+        if edit.op in (ADD_BULLET, APPEND_SECTION) and not (edit.section and edit.text):
+            return None
+        if edit.op in (REPLACE_BULLET, DELETE_BULLET) and not edit.old:
+            return None
+        if edit.op == REPLACE_BULLET and not edit.text:
+            return None
+        return edit
+
+
+def _normalize(text: str) -> str:
+    """Normalize bullet text for matching (markers, emphasis, case, spacing)."""
+    match = _BULLET_RE.match(text)
+    if match:
+        text = match.group(1)
+    text = re.sub(r"[*_`]", "", text)
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _as_bullet(text: str) -> str:
+    """Format text as a single bullet line."""
+    match = _BULLET_RE.match(text)
+    body = match.group(1) if match else text
+    return f"- {' '.join(body.split())}"
+
+
+def _find_bullet(lines: List[str], old: str) -> Optional[int]:
+    """Index of the bullet matching old: exact after normalizing, else the only one containing it.
+
+    A bullet that merely appears inside old does not match, so a misquoted
+    old can never select a shorter, unrelated bullet.
+    """
+    target = _normalize(old)
+    bullets = [(i, _normalize(line)) for i, line in enumerate(lines) if _BULLET_RE.match(line)]
+    for i, text in bullets:
+        if text == target:
+            return i
+    containing = [i for i, text in bullets if target and target in text]
+    return containing[0] if len(containing) == 1 else None
+
+
+def _find_section(lines: List[str], section: str) -> Optional[Tuple[int, int]]:
+    """(heading index, end index) of the section whose heading matches, end exclusive."""
+    target = _normalize(section).lstrip("# ")
+    for i, line in enumerate(lines):
+        match = _HEADING_RE.match(line)
+        if match and _normalize(match.group(2)) == target:
+            level = len(match.group(1))
+            end = len(lines)
+            for j in range(i + 1, len(lines)):
+                next_heading = _HEADING_RE.match(lines[j])
+                if next_heading and len(next_heading.group(1)) <= level:
+                    end = j
+                    break
+            return i, end
+    return None
+
+
+def apply_edit(content: str, edit: MemoryEdit) -> Tuple[str, bool]:
+    """
+    Apply one edit to markdown content.
+
+    Args:
+        content: Current file content
+        edit: Edit to apply
+
+    Returns:
+        (new content, whether anything changed)
+    """
+    lines = content.splitlines()
+
+    if edit.op in (REPLACE_BULLET, DELETE_BULLET):
+        index = _find_bullet(lines, edit.old)
+        if index is None:
+            return content, False
+        if edit.op == DELETE_BULLET:
+            del lines[index]
+        else:
+            indent = lines[index][: len(lines[index]) - len(lines[index].lstrip())]
+            lines[index] = indent + _as_bullet(edit.text)
+
+    elif edit.op == ADD_BULLET:
+        bullet = _as_bullet(edit.text)
+        if any(_BULLET_RE.match(line) and _normalize(line) == _normalize(bullet) for line in lines):
+            return content, False  # Already known
+        section = _find_section(lines, edit.section)
+        if section is None:
+            lines += ["", f"## {edit.section}", bullet]
+        else:
+            start, end = section
+            # Insert after the section's last non-blank line
+            insert_at = end
+            while insert_at > start + 1 and not lines[insert_at - 1].strip():
+                insert_at -= 1
+            lines.insert(insert_at, bullet)
+
+    elif edit.op == APPEND_SECTION:
+        body = [line.rstrip() for line in edit.text.splitlines()]
+        section = _find_section(lines, edit.section)
+        if section is None:
+            lines += ["", f"## {edit.section}", *body]
+        else:
+            _, end = section
+            while end > 0 and not lines[end - 1].strip():
+                end -= 1
+            lines[end:end] = body
+
+    new_content = "\n".join(lines).strip("\n") + "\n"
+    return new_content, new_content != content
+
+
+def apply_edits(content: str, edits: List[MemoryEdit]) -> Tuple[str, int]:
+    """Apply edits in order; returns (new content, number of edits that changed it)."""
+    applied = 0
+    for edit in edits:
+        content, changed = apply_edit(content, edit)
+        applied += int(changed)
+    return content, applied
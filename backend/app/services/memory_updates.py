@@ -0,0 +1,158 @@
+"""Gated, coalesced persistent-memory analysis.
+
+Chat turns go through three stages before they cost an LLM call:
+
+1. A local pre-filter drops turns without candidate facts (statements about
+   the user, preferences, decisions or explicit "remember" requests).
+2. A per-conversation debounce collects the remaining turns and analyzes
+   them together once the conversation has been quiet for a while, or once
+   enough turns are pending.
+3. The batched analysis runs on the small memory model.
+"""
+
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from ..config import settings
+from .persistent_memory import PersistentMemoryService, get_persistent_memory_service
+
+logger = logging.getLogger(__name__)
+
+# Phrases that usually introduce durable facts worth remembering
+FACT_PATTERNS = [
+    r"\b(remember|don't forget|do not forget|note that|keep in mind|from now on)\b",
+    r"\bcall me\b",
+    r"\bmy (name|birthday|email|phone|job|role|title|company|team|goal|wife|husband|partner|"
+    r"son|daughter|kid|dog|cat|address|timezone|time zone|favou?rite)\b",
+    r"\bmy \w+(?: \w+)? (is|are|was)\b",
+    r"\bi(?:'m| am) (a|an|the|from|based|working|learning|building|allergic|vegetarian|vegan|\d)\b",
+    r"\bi (live|work|study|prefer|like|love|hate|dislike|enjoy|use|own|have|want|need|plan|usually|always|never)\b",
+    r"\b(we|i) (decided|agreed|chose|switched|moved|started|finished|launched)\b",
+    r"\b(deadline|milestone|project|meeting) (is|was|on|at)\b",
+    r"\b(forget|stop|don't|do not) (remember|call|use|mention)\b",
+]
+_FACT_RE = re.compile("|".join(f"(?:{pattern})" for pattern in FACT_PATTERNS), re.IGNORECASE)
+
+
+def has_candidate_facts(user_message: str) -> bool:
+    """Cheap local check whether a user message may contain something worth remembering."""
+    return bool(_FACT_RE.search(user_message or ""))
+
+
+class MemoryUpdateQueue:
+    """Per-conversation debounce queue in front of PersistentMemoryService.analyze_turns."""
+
+    def __init__(
+        self,
+        memory_service: Optional[PersistentMemoryService] = None,
+        debounce_seconds: Optional[float] = None,
+        max_batch: Optional[int] = None,
+    ):
+        """
+        Initialize memory update queue.
+
+        Args:
+            memory_service: Service that runs the analysis (the shared one if omitted)
+            debounce_seconds: Quiet period before a conversation's turns are analyzed
+            max_batch: Pending turns that trigger an analysis right away
+        """
+        self.memory_service = memory_service
+        self.debounce_seconds = (
+            settings.memory_update_debounce_seconds if debounce_seconds is None else debounce_seconds
+        )
+        self.max_batch = max_batch or settings.memory_update_max_batch
+        self._pending: Dict[str, List[Tuple[str, str]]] = {}
+        self._timers: Dict[str, asyncio.Task] = {}
+        self._running: Set[asyncio.Task] = set()
+
+        self.submitted = 0
+        self.skipped = 0
+        self.batched = 0
+        self.executed = 0
+        self.failed = 0
+        self.edits_applied = 0
+
+    def submit(self, conversation_id: str, user_message: str, agent_reply: str) -> bool:
+        """
+        Queue a finished turn for memory analysis. Must be called on the event loop.
+
+        Returns:
+            False if the pre-filter skipped the turn, True if it was queued
+        """
+        self.submitted += 1
+        if settings.memory_prefilter_enabled and not has_candidate_facts(user_message):
+            self.skipped += 1
+            return False
+
+        pending = self._pending.setdefault(conversation_id, [])
+        pending.append((user_message, agent_reply))
+        if len(pending) > 1:
+            self.batched += 1
+
+        # Restart the quiet period; flush at once when the batch is full
+        timer = self._timers.pop(conversation_id, None)
+        if timer is not None:
+            timer.cancel()
+        delay = 0.0 if len(pending) >= self.max_batch else self.debounce_seconds
+        self._timers[conversation_id] = asyncio.create_task(self._flush_later(conversation_id, delay))
+        return True
+
+    async def flush_all(self) -> None:
+        """Analyze everything still pending (e.g. on shutdown)."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        await asyncio.gather(*(self._flush(cid) for cid in list(self._pending)))
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def _flush_later(self, conversation_id: str, delay: float) -> None:
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        # Detach from the timer slot so a new submit starts a fresh batch
+        task = self._timers.pop(conversation_id, None)
+        if task is not None:
+            self._running.add(task)
+        try:
+            await self._flush(conversation_id)
+        finally:
+            if task is not None:
+                self._running.discard(task)
+
+    async def _flush(self, conversation_id: str) -> None:
+        turns = self._pending.pop(conversation_id, None)
+        if not turns:
+            return
+        service = self.memory_service or get_persistent_memory_service()
+        try:
+            self.executed += 1
+            applied = await service.analyze_turns(turns)
+        except Exception as e:
+            self.failed += 1
+            logger.warning("Memory analysis of %d turns failed: %s", len(turns), e)
+            return
+        self.edits_applied += applied
+        logger.info("Memory analysis of %d turns applied %d edits", len(turns), applied)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get skipped/batched/executed/failed counters and the memory edits applied."""
+        return {
+            "model": settings.memory_model,
+            "debounce_seconds": self.debounce_seconds,
+            "submitted": self.submitted,
+            "skipped": self.skipped,
+            "batched": self.batched,
+            "executed": self.executed,
+            "failed": self.failed,
+            "edits_applied": self.edits_applied,
+            "pending_turns": sum(len(turns) for turns in self._pending.values()),
+            "pending_conversations": len(self._pending),
+        }
+
+
+# Process-wide queue used by the chat routes
+memory_updates = MemoryUpdateQueue()
@@ -1,15 +1,100 @@
 """Persistent memory service."""
 
+import asyncio
+import hashlib
 import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Dict, Iterator, Optional, List, Tuple
 import json
 
 from ..config import settings
-from ..core.llm import GroqLLM
+from ..core.llm import AsyncGroqLLM
+from ..memory.fact_store import MemoryFactStore
+from .memory_edits import MemoryEdit, apply_edits
+
+# Cross-process file locking: fcntl on POSIX, msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+@dataclass(frozen=True)
+class MemorySnapshot:
+    """Joined persistent memory as of one set of file versions."""
+
+    text: str  # Prompt block of all memory files
+    hash: str  # Content hash; changes whenever any file's content changes
+    contents: Dict[str, str] = field(default_factory=dict)
+    signature: Tuple[Tuple[str, int, int], ...] = ()  # (filename, mtime_ns, size) per file
+
+
+# Process-wide snapshots per memory directory, rebuilt only when a file changes
+_snapshots: Dict[Path, MemorySnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+# Files split into relevance-selected facts; soul.md is always injected whole
+FACT_FILES = ("user_info.md", "memory.md")
+
+_fact_store: Optional[MemoryFactStore] = None
+_fact_store_lock = threading.Lock()
+
+# Serializes writers within the process; the lock file covers other processes
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def _file_lock(lock_path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on lock_path across threads and processes."""
+    with _write_lock, open(lock_path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _atomic_write(path: Path, content: str) -> None:
+    """Write content to path via a temp file and rename, so readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(content)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
 
 class PersistentMemoryService:
-    """Service for managing persistent markdown memory files."""
+    """Service for managing persistent markdown memory files.
+
+    Reads go through a process-wide snapshot that is revalidated with one
+    stat() per file (mtime and size), so files are only read when they
+    actually changed. Writes hold a cross-process lock, replace files
+    atomically, keep the previous versions under .history/ and invalidate
+    the snapshot directly.
+    """
 
     def __init__(self):
         """Initialize memory service."""
@@ -17,46 +102,193 @@ class PersistentMemoryService:
         self.base_path = Path(__file__).resolve().parent.parent / "persistent"
         self.files = ["soul.md", "user_info.md", "memory.md"]
         
+        self.history_path = self.base_path / ".history"
+        self.lock_path = self.base_path / ".memory.lock"
+        
         # Ensure directory exists
         self.base_path.mkdir(exist_ok=True)
 
+    def get_snapshot(self) -> MemorySnapshot:
+        """Get the current memory snapshot, re-reading files only if they changed."""
+        signature = self._signature()
+        snapshot = _snapshots.get(self.base_path)
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+
+        with _snapshots_lock:
+            snapshot = _snapshots.get(self.base_path)
+            if snapshot is not None and snapshot.signature == signature:
+                return snapshot
+
+            if any(size < 0 for _, _, size in signature):
+                self._create_missing_files()
+                signature = self._signature()
+
+            contents = {
+                filename: (self.base_path / filename).read_text(encoding="utf-8")
+                for filename in self.files
+            }
+            text = "\n\n".join(
+                f"--- {filename.upper()} ---\n{content}" for filename, content in contents.items()
+            )
+            snapshot = MemorySnapshot(
+                text=text,
+                hash=hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+                contents=contents,
+                signature=signature,
+            )
+            _snapshots[self.base_path] = snapshot
+            return snapshot
+
     def get_all_memory(self) -> str:
-        """Read all memory files and return combined text for the system prompt."""
-        combined = []
-        for filename in self.files:
-            file_path = self.base_path / filename
-            if file_path.exists():
-                content = file_path.read_text(encoding="utf-8")
-                combined.append(f"--- {filename.upper()} ---\n{content}")
-            else:
-                # Initialize if missing
-                file_path.write_text(f"# {filename.replace('.md', '').replace('_', ' ').title()}\n", encoding="utf-8")
-        
-        return "\n\n".join(combined)
+        """Get all memory files combined for the system prompt."""
+        return self.get_snapshot().text
+
+    def get_relevant_memory(self, query: str, k: Optional[int] = None) -> str:
+        """
+        Get soul.md plus the memory facts most relevant to query for the system prompt.
+
+        Falls back to all memory files when fact selection is disabled.
+        May load the embedding model on first use, so call it off the event loop.
+
+        Args:
+            query: Current user message
+            k: Number of relevance-selected facts (settings.memory_top_k if omitted)
+
+        Returns:
+            Memory prompt block
+        """
+        snapshot = self.get_snapshot()
+        if not settings.memory_fact_selection:
+            return snapshot.text
+
+        store = _get_fact_store()
+        store.sync(snapshot.hash, {name: snapshot.contents.get(name, "") for name in FACT_FILES})
+        facts = store.select(query, settings.memory_top_k if k is None else k)
+        return (
+            f"--- SOUL.MD ---\n{snapshot.contents.get('soul.md', '')}\n\n"
+            f"--- RELEVANT MEMORY ({len(facts)} of {len(store.facts)} facts) ---\n"
+            f"{store.render(facts)}"
+        )
 
     def update_memory(self, filename: str, content: str):
         """Update a specific memory file."""
         if filename not in self.files:
             raise ValueError(f"Invalid memory file: {filename}")
             
+        with _file_lock(self.lock_path):
+            self._write_file(filename, content)
+
+    def apply_edits(self, edits: List[MemoryEdit]) -> int:
+        """
+        Apply structured edits to the memory files.
+
+        Each file is re-read under the lock, so edits from concurrent writers
+        (other workers included) are never lost.
+
+        Args:
+            edits: Edit operations; edits on unknown files are ignored
+
+        Returns:
+            Number of edits that changed a file
+        """
+        by_file: Dict[str, List[MemoryEdit]] = {}
+        for edit in edits:
+            if edit.file in self.files:
+                by_file.setdefault(edit.file, []).append(edit)
+
+        applied = 0
+        with _file_lock(self.lock_path):
+            for filename, file_edits in by_file.items():
+                file_path = self.base_path / filename
+                current = file_path.read_text(encoding="utf-8") if file_path.exists() else ""
+                updated, changed = apply_edits(current, file_edits)
+                if changed:
+                    self._write_file(filename, updated)
+                    applied += changed
+        return applied
+
+    def _write_file(self, filename: str, content: str) -> None:
+        """Save the current version to history and atomically replace the file. Caller holds the lock."""
         file_path = self.base_path / filename
-        file_path.write_text(content, encoding="utf-8")
+        if file_path.exists() and settings.memory_history_versions > 0:
+            self.history_path.mkdir(exist_ok=True)
+            _atomic_write(
+                self.history_path / f"{filename}.{time.time_ns()}",
+                file_path.read_text(encoding="utf-8"),
+            )
+            versions = sorted(self.history_path.glob(f"{filename}.*"))
+            for old_version in versions[: -settings.memory_history_versions]:
+                old_version.unlink(missing_ok=True)
+
+        _atomic_write(file_path, content)
+        # mtime may not tick between two quick writes of the same size
+        self.invalidate()
 
     def get_file_content(self, filename: str) -> str:
         """Get content of a single memory file."""
+        if filename in self.files:
+            return self.get_snapshot().contents.get(filename, "")
         file_path = self.base_path / filename
         if file_path.exists():
             return file_path.read_text(encoding="utf-8")
         return ""
 
-    def analyze_and_update(self, user_message: str, agent_reply: str):
-        """Analyze the latest interaction and update persistent memory if needed."""
-        llm = GroqLLM(
+    def invalidate(self) -> None:
+        """Drop the cached snapshot so the next read goes to disk."""
+        with _snapshots_lock:
+            _snapshots.pop(self.base_path, None)
+
+    def _signature(self) -> Tuple[Tuple[str, int, int], ...]:
+        """Get (filename, mtime_ns, size) of every memory file; size -1 if missing."""
+        signature = []
+        for filename in self.files:
+            try:
+                stat = os.stat(self.base_path / filename)
+                signature.append((filename, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append((filename, 0, -1))
+        return tuple(signature)
+
+    def _create_missing_files(self) -> None:
+        """Initialize missing memory files with a title."""
+        for filename in self.files:
+            file_path = self.base_path / filename
+            if not file_path.exists():
+                file_path.write_text(f"# {filename.replace('.md', '').replace('_', ' ').title()}\n", encoding="utf-8")
+
+    async def analyze_and_update(self, user_message: str, agent_reply: str) -> int:
+        """Analyze the latest interaction and update persistent memory if needed; returns edits applied."""
+        try:
+            return await self.analyze_turns([(user_message, agent_reply)])
+        except Exception as e:
+            # Silent fail for memory updates to not break chat
+            print(f"Memory update failed: {e}")
+            return 0
+
+    async def analyze_turns(self, turns: List[Tuple[str, str]]) -> int:
+        """
+        Analyze a batch of interactions in one LLM call and update persistent memory if needed.
+
+        Errors propagate, so the memory update queue can count and log them.
+
+        Args:
+            turns: (user_message, agent_reply) pairs, oldest first
+
+        Returns:
+            Number of edits that changed a memory file
+        """
+        llm = AsyncGroqLLM(
             api_key=settings.groq_api_key,
-            model=settings.llm_model,
+            model=settings.memory_model,
+            temperature=0.2,
         )
 
         current_memory = self.get_all_memory()
+        interactions = "\n\n".join(
+            f"User: {user_message}\n        Agent: {agent_reply}"
+            for user_message, agent_reply in turns
+        )
         
         prompt = f"""
         You are a memory management module for the OpenPaw agent.
@@ -68,26 +300,55 @@ class PersistentMemoryService:
         CURRENT MEMORY CONTENT:
         {current_memory}
 
-        LATEST INTERACTION:
-        User: {user_message}
-        Agent: {agent_reply}
+        LATEST INTERACTIONS (oldest first):
+        {interactions}
 
         INSTRUCTIONS:
-        1. If no NEW or CONTRADICTORY information is found, respond with "NO_UPDATE".
-        2. If information should be updated, provide the ENTIRE NEW CONTENT for the specific file(s) that need changing.
-        3. Format your response as a JSON object: {{"user_info.md": "full content...", "memory.md": "full content..."}}
-        4. Keep the content simple and structured in Markdown.
-        5. DO NOT update soul.md unless explicitly asked or a major shift occurred.
+        1. Respond with a JSON object {{"edits": [...]}}. If no NEW or CONTRADICTORY information is found, return {{"edits": []}}.
+        2. Never return whole files. Each edit is one of:
+           {{"op": "add_bullet", "file": "user_info.md", "section": "Preferences", "text": "Prefers dark mode"}}
+           {{"op": "replace_bullet", "file": "user_info.md", "old": "existing bullet text", "text": "corrected bullet text"}}
+           {{"op": "delete_bullet", "file": "memory.md", "old": "existing bullet text"}}
+           {{"op": "append_section", "file": "memory.md", "section": "New Heading", "text": "- bullet\\n- bullet"}}
+        3. "section" is a heading name from the file (new headings are created); "old" must quote an existing bullet.
+        4. Use replace_bullet for changed facts instead of adding a contradicting bullet. Keep bullets short.
+        5. DO NOT edit soul.md unless explicitly asked or a major shift occurred.
 
         RESPONSE:
         """
 
-        try:
-            update_data = llm.generate_structured(prompt)
-            if isinstance(update_data, dict):
-                for filename, content in update_data.items():
-                    if filename in self.files and content and content != "NO_UPDATE":
-                        self.update_memory(filename, content)
-        except Exception as e:
-            # Silent fail for memory updates to not break chat
-            print(f"Memory update failed: {e}")
+        update_data = await llm.generate_structured(prompt)
+        raw_edits = update_data.get("edits", []) if isinstance(update_data, dict) else []
+        edits = [edit for edit in map(MemoryEdit.from_dict, raw_edits or []) if edit]
+        if not edits:
+            return 0
+        # File lock waits must not block the event loop
+        return await asyncio.to_thread(self.apply_edits, edits)
+
+
+_memory_service: Optional[PersistentMemoryService] = None
+
+
+def get_persistent_memory_service() -> PersistentMemoryService:
+    """Get the process-wide persistent memory service."""
+    global _memory_service
+    if _memory_service is None:
+        _memory_service = PersistentMemoryService()
+    return _memory_service
+
+
+def _get_fact_store() -> MemoryFactStore:
+    """Get the process-wide fact store, with an embedding model if one can be loaded."""
+    global _fact_store
+    with _fact_store_lock:
+        if _fact_store is None:
+            embedding_service = None
+            if settings.memory_fact_embeddings:
+                try:
+                    from .rag_registry import rag_registry
+
+                    embedding_service = rag_registry.get_embedding_service()
+                except Exception as e:
+                    print(f"Memory facts ranked by keywords (no embedding model): {e}")
+            _fact_store = MemoryFactStore(embedding_service, settings.memory_pinned_sections)
+        return _fact_store
@@ -0,0 +1,202 @@
+"""Process-wide embedding model, vector store and RAG service.
+
+Loading the SentenceTransformer model takes seconds and hundreds of MB, and
+opening the vector store re-reads the FAISS index and its JSON sidecar, so
+each is created once per process on first use (or by an optional warm-up at
+startup) and shared by every request.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from ..config import settings
+from .vector_db import EmbeddingService, RAGService, VectorStore
+
+
+@dataclass
+class _Component:
+    """Load state of one shared component."""
+
+    name: str
+    instance: Any = None
+    error: Optional[Exception] = None  # Cached when retrying cannot help (missing package)
+    load_seconds: Optional[float] = None
+    loaded_at: Optional[datetime] = None
+    rss_delta_bytes: Optional[int] = None
+
+    def __post_init__(self):
+        self.lock = threading.Lock()
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None if it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class RAGRegistry:
+    """Lazily initialized, thread-safe holder of the shared RAG components.
+
+    Each component is built at most once, under its own lock, the first time
+    it is requested; concurrent callers wait for that build instead of
+    starting their own.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        index_path: Optional[str] = None,
+        dimension: Optional[int] = None,
+    ):
+        """
+        Initialize registry. Nothing is loaded until first use or warm_up().
+
+        Args:
+            model_name: Embedding model (settings.embedding_model if omitted)
+            index_path: FAISS index path (settings.vector_index_path if omitted)
+            dimension: Embedding dimension (settings.embedding_dimension if omitted)
+        """
+        self.model_name = model_name or settings.embedding_model
+        self.index_path = index_path or settings.vector_index_path
+        self.dimension = dimension or settings.embedding_dimension
+        self._embedding = _Component("embedding_service")
+        self._vector_store = _Component("vector_store")
+        self._rag = _Component("rag_service")
+
+    def get_embedding_service(self) -> EmbeddingService:
+        """Get the shared embedding service, loading the model on first use."""
+        return self._get(self._embedding, lambda: EmbeddingService(self.model_name))
+
+    def get_vector_store(self) -> VectorStore:
+        """Get the shared vector store, opening the index on first use."""
+        return self._get(self._vector_store, lambda: VectorStore(self.dimension, self.index_path))
+
+    def get_rag_service(self) -> RAGService:
+        """Get the shared RAG service over the shared store and embedding model."""
+        return self._get(
+            self._rag, lambda: RAGService(self.get_vector_store(), self.get_embedding_service())
+        )
+
+    def warm_up(self) -> None:
+        """Load every component now instead of on the first request."""
+        started = time.perf_counter()
+        try:
+            self.get_rag_service()
+            print(f"RAG components warmed up in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            print(f"RAG warm-up failed, components will load on first use: {e}")
+
+    def shutdown(self) -> None:
+        """Close and release every component; the next request loads them again.
+
+        Closing the vector store folds its log into a snapshot.
+        """
+        for component in (self._rag, self._vector_store, self._embedding):
+            with component.lock:
+                close = getattr(component.instance, "close", None)
+                if close is not None:
+                    try:
+                        close()
+                    except Exception as e:
+                        print(f"Failed to close {component.name}: {e}")
+                component.instance = None
+                component.error = None
+                component.load_seconds = None
+                component.loaded_at = None
+                component.rss_delta_bytes = None
+
+    def _get(self, component: _Component, factory: Callable[[], Any]) -> Any:
+        instance = component.instance
+        if instance is not None:
+            return instance
+
+        with component.lock:
+            if component.instance is not None:
+                return component.instance
+            if component.error is not None:
+                raise component.error
+
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            try:
+                instance = factory()
+            except ImportError as e:
+                component.error = e
+                raise
+            component.load_seconds = round(time.perf_counter() - started, 3)
+            component.loaded_at = datetime.utcnow()
+            rss_after = _rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                component.rss_delta_bytes = rss_after - rss_before
+            component.instance = instance
+            print(f"Loaded {component.name} in {component.load_seconds:.2f}s")
+            return instance
+
+    def status(self) -> Dict[str, Any]:
+        """Get load state, load time and memory footprint of each component."""
+        embedding = self._embedding.instance
+        store = self._vector_store.instance
+        return {
+            "model_name": self.model_name,
+            "index_path": self.index_path,
+            "process_rss_bytes": _rss_bytes(),
+            "embedding_service": {
+                **self._component_status(self._embedding),
+                "model_bytes": self._model_bytes(embedding) if embedding is not None else None,
+            },
+            "vector_store": {
+                **self._component_status(self._vector_store),
+                "documents": store.size() if store is not None else None,
+                "index_bytes": self._index_bytes(store) if store is not None else None,
+                "index": store.index_info() if store is not None else None,
+                "log_bytes": store.log_bytes() if store is not None else None,
+            },
+            "rag_service": self._component_status(self._rag),
+        }
+
+    @staticmethod
+    def _component_status(component: _Component) -> Dict[str, Any]:
+        return {
+            "loaded": component.instance is not None,
+            "error": str(component.error) if component.error is not None else None,
+            "load_seconds": component.load_seconds,
+            "loaded_at": component.loaded_at.isoformat() if component.loaded_at else None,
+            "rss_delta_bytes": component.rss_delta_bytes,
+        }
+
+    @staticmethod
+    def _model_bytes(embedding_service: EmbeddingService) -> Optional[int]:
+        """Size of the model's parameters and buffers."""
+        model = getattr(embedding_service, "model", None)
+        try:
+            tensors = list(model.parameters()) + list(model.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _index_bytes(store: VectorStore) -> Optional[int]:
+        """Approximate size of the stored vectors and document texts."""
+        index = getattr(store, "index", None)
+        if index is None:
+            return None
+        vectors = index.ntotal * index.d * 4  # float32
+        texts = sum(len(doc.encode("utf-8")) for doc in store.documents.values() if doc)
+        return vectors + texts
+
+
+# Process-wide registry used by the routes and memory services
+rag_registry = RAGRegistry()
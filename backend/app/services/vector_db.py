@@ -1,11 +1,41 @@
 """Vector database service for RAG (Retrieval Augmented Generation)."""
 
+import base64
+import dataclasses
 import json
+import logging
 import os
-from typing import List, Optional, Tuple
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 
+from ..config import settings
+from ..core.context_assembler import TokenCounter
+from .vector_index import (
+    AUTO,
+    COSINE,
+    FLAT,
+    L2,
+    INDEX_TYPES,
+    IndexConfig,
+    build_index,
+    export_vectors,
+    index_metric,
+    index_type,
+    RecallProbe,
+    is_exact,
+    make_recall_probe,
+    measure_recall,
+    normalized,
+    search_params,
+    similarity,
+    supports_remove,
+)
+
 # FAISS imports - optional dependency
 try:
     import faiss
@@ -13,84 +43,314 @@ try:
 except ImportError:
     FAISS_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
+
+# Runs the keyword stage of hybrid retrieval next to the embedding; shared so
+# each call does not start (and join) a thread of its own
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-lexical")
+
+
+def _ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _replace_file(path: str, write) -> None:
+    """Write a file through write(tmp_path), fsync it and rename it over path."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        with open(tmp_path, "rb") as handle:
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
 
 class VectorStore:
-    """Vector store for semantic search and RAG."""
+    """Vector store for semantic search and RAG.
+
+    Vectors live in an IndexIDMap2 under stable ids, over a Flat, HNSW or
+    IVF-PQ index chosen by index_config, scoring by cosine similarity
+    (inner product over normalized vectors) or L2 distance. When the corpus
+    outgrows the
+    current type, the background job builds the new index from a copy of
+    the vectors while searches continue, then swaps it in. Deleting marks ids as
+    tombstones, which searches skip; once tombstones reach tombstone_ratio
+    of the index, a background job removes them with remove_ids. Vectors
+    are also grouped by their metadata "id" (the knowledge document id), so
+    all vectors of a document can be deleted together.
+
+    State on disk is a snapshot (the FAISS index plus a JSON file of
+    documents, metadata and tombstones) and an append-only log of the adds
+    and deletes since. Each add appends only its own batch to the log; once
+    the log grows past compact_log_bytes, a background thread writes a new
+    snapshot and drops the log records it covers. Opening the store loads the
+    snapshot and replays the log, so a crash loses at most a torn final
+    record. Log records carry their vector ids, which makes replay
+    idempotent.
+    """
 
-    def __init__(self, dimension: int = 384, index_path: str = "./data/faiss.index"):
+    def __init__(
+        self,
+        dimension: int = 384,
+        index_path: str = "./data/faiss.index",
+        compact_log_bytes: Optional[int] = None,
+        fsync: Optional[bool] = None,
+        tombstone_ratio: Optional[float] = None,
+        index_config: Optional[IndexConfig] = None,
+    ):
         """
         Initialize vector store.
-        
+
         Args:
             dimension: Dimension of embeddings (default 384 for all-MiniLM-L6-v2)
             index_path: Path to save FAISS index
+            compact_log_bytes: Log size that triggers a background snapshot
+            fsync: Flush every log append to disk before returning
+            tombstone_ratio: Share of deleted vectors that triggers their removal from the index
+            index_config: Index type and tuning (from settings if omitted)
         """
         if not FAISS_AVAILABLE:
             raise ImportError("FAISS not installed. Install with: pip install faiss-cpu")
-        
+
         self.dimension = dimension
         self.index_path = index_path
+        self.metadata_path = index_path.replace(".index", ".json")
+        self.log_path = index_path.replace(".index", ".log")
+        self.compact_log_bytes = (
+            settings.vector_compact_log_bytes if compact_log_bytes is None else compact_log_bytes
+        )
+        self.fsync = settings.vector_log_fsync if fsync is None else fsync
+        self.tombstone_ratio = (
+            settings.vector_tombstone_ratio if tombstone_ratio is None else tombstone_ratio
+        )
+        self.index_config = index_config or IndexConfig.from_settings()
+        self.last_recall: Optional[dict] = None  # Measured at the last migration
+        self._recall_probe: Optional[RecallProbe] = None  # Exact neighbors since the last migration
+        self._failed_migration: Optional[str] = None  # Not retried until restart
         self.index = None
-        self.documents = []
-        self.metadata = {}
-        
+        self.documents: Dict[int, str] = {}  # Vector id -> text of live vectors
+        self.metadata: Dict[str, dict] = {}  # str(vector id) -> metadata
+        self.tombstones: Set[int] = set()  # Deleted ids whose vectors are still in the index
+        self.next_id = 0
+        self._document_vectors: Dict[str, Set[int]] = {}  # Metadata "id" -> vector ids
+        self._exclude = None  # Cached search parameters that skip the tombstones
+        self._lock = threading.RLock()  # Guards index, documents, metadata and the log
+        self._compact_lock = threading.Lock()
+        self._compaction: Optional[threading.Thread] = None
+        self._log = None
+
         # Create index directory if it doesn't exist
         os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
-        
-        # Load or create index
+
+        # Load or create index, then replay the log on top
         self._load_or_create_index()
+        self._replay_log()
+        self._log = open(self.log_path, "ab")
+        # An index of another type or metric than configured is rebuilt in the background
+        self._maybe_compact()
+
+    def _new_index(self):
+        kind = self.index_config.choose(0)
+        empty = np.zeros((0, self.dimension), dtype=np.float32)
+        return build_index(kind, self.dimension, empty, np.zeros(0, dtype=np.int64), self.index_config)
 
     def _load_or_create_index(self):
         """Load existing index or create new one."""
-        if os.path.exists(self.index_path):
-            self.index = faiss.read_index(self.index_path)
-            # Load metadata
-            metadata_path = self.index_path.replace(".index", ".json")
-            if os.path.exists(metadata_path):
-                with open(metadata_path, "r") as f:
-                    data = json.load(f)
-                    self.documents = data.get("documents", [])
-                    self.metadata = data.get("metadata", {})
+        if not os.path.exists(self.index_path):
+            self.index = self._new_index()
+            return
+
+        self.index = faiss.read_index(self.index_path)
+        data = {}
+        if os.path.exists(self.metadata_path):
+            with open(self.metadata_path, "r") as f:
+                data = json.load(f)
+        documents = data.get("documents", [])
+        self.metadata = data.get("metadata", {})
+
+        if isinstance(documents, list):
+            # Positional format (vector id = list index, None = deleted)
+            self.documents = {i: doc for i, doc in enumerate(documents) if doc is not None}
+            self.tombstones = {i for i, doc in enumerate(documents) if doc is None}
+            self.next_id = len(documents)
+        else:
+            self.documents = {int(i): doc for i, doc in documents.items()}
+            self.tombstones = set(data.get("tombstones", []))
+            self.next_id = data.get("next_id", max(self.documents, default=-1) + 1)
+
+        if not isinstance(self.index, faiss.IndexIDMap2):
+            # Plain index from before stable ids: its vectors are numbered by position
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)
+            ids = np.arange(len(vectors), dtype=np.int64)
+            config = dataclasses.replace(self.index_config, metric=L2)
+            self.index = build_index(FLAT, self.dimension, vectors, ids, config)
+
+        for vector_id in self.documents:
+            self._map_document(vector_id)
+
+    def _replay_log(self) -> None:
+        """Apply log records written after the snapshot; cut off a torn final record."""
+        # The snapshot's index and JSON are replaced one after the other, so
+        # after a crash they may disagree: drop vectors the JSON no longer
+        # knows; vectors it knows but the index lacks are still in the log
+        present = set(faiss.vector_to_array(self.index.id_map).tolist())
+        unknown = present - set(self.documents) - self.tombstones
+        if unknown:
+            self._remove_from_index(unknown)
+            present -= unknown
+
+        if not os.path.exists(self.log_path):
+            return
+
+        valid_bytes = 0
+        replayed = 0
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self._apply(record, present)
+                valid_bytes += len(line)
+                replayed += 1
+
+        if valid_bytes < os.path.getsize(self.log_path):
+            print(f"Vector log {self.log_path}: dropping incomplete record after {replayed} records")
+            with open(self.log_path, "r+b") as f:
+                f.truncate(valid_bytes)
+        if replayed:
+            print(f"Vector log {self.log_path}: replayed {replayed} records")
+
+    def _apply(self, record: dict, present: Optional[Set[int]] = None) -> None:
+        """
+        Apply one log record to the in-memory state.
+
+        Args:
+            record: Log record
+            present: Ids in the index while replaying; None for a live change
+        """
+        if record.get("op") == "delete":
+            ids = record["ids"] if "ids" in record else [record["id"]]
+            for vector_id in map(int, ids):
+                if vector_id not in self.documents:
+                    continue
+                self._unmap_document(vector_id)
+                del self.documents[vector_id]
+                self.metadata.pop(str(vector_id), None)
+                if present is None or vector_id in present:
+                    self.tombstones.add(vector_id)
+            if present is None and self._recall_probe is not None:
+                self._recall_probe.remove(map(int, ids))
+            self._exclude = None
+            return
+
+        start = int(record["start"])
+        documents = record["documents"]
+        metadata = record.get("metadata") or []
+        ids = np.arange(start, start + len(documents), dtype=np.int64)
+        vectors = np.frombuffer(base64.b64decode(record["vectors"]), dtype=np.float32)
+        vectors = vectors.reshape(-1, self.dimension)
+        if index_metric(self.index) == COSINE:
+            vectors = normalized(vectors)
+
+        if present is None:
+            keep = list(range(len(documents)))
+            self.index.add_with_ids(vectors, ids)
+            if self._recall_probe is not None:
+                self._recall_probe.add(ids, vectors)
         else:
-            # Create new index
-            self.index = faiss.IndexFlatL2(self.dimension)
+            # Skip ids the snapshot already holds or has deleted
+            keep = [
+                i for i, vector_id in enumerate(ids.tolist())
+                if vector_id >= self.next_id or vector_id in self.documents or vector_id in self.tombstones
+            ]
+            missing = [i for i in keep if int(ids[i]) not in present]
+            if missing:
+                self.index.add_with_ids(vectors[missing], ids[missing])
+                present.update(int(ids[i]) for i in missing)
+
+        for i in keep:
+            vector_id = int(ids[i])
+            if vector_id in self.documents or vector_id in self.tombstones:
+                continue
+            self.documents[vector_id] = documents[i]
+            self.metadata[str(vector_id)] = metadata[i] if i < len(metadata) else {"source": "unknown"}
+            self._map_document(vector_id)
+        self.next_id = max(self.next_id, start + len(documents))
+
+    def _map_document(self, vector_id: int) -> None:
+        document_id = self.metadata.get(str(vector_id), {}).get("id")
+        if document_id is not None:
+            self._document_vectors.setdefault(str(document_id), set()).add(vector_id)
+
+    def _unmap_document(self, vector_id: int) -> None:
+        document_id = self.metadata.get(str(vector_id), {}).get("id")
+        vector_ids = self._document_vectors.get(str(document_id))
+        if vector_ids is not None:
+            vector_ids.discard(vector_id)
+            if not vector_ids:
+                del self._document_vectors[str(document_id)]
+
+    def _append_log(self, record: dict) -> None:
+        """Append one record to the log (must hold self._lock)."""
+        self._log.write(json.dumps(record).encode("utf-8") + b"\n")
+        self._log.flush()
+        if self.fsync:
+            os.fsync(self._log.fileno())
 
     def add_documents(
         self,
         documents: List[str],
         embeddings: List[List[float]],
         metadata: Optional[List[dict]] = None,
-    ) -> None:
+    ) -> List[int]:
         """
         Add documents with embeddings to the index.
-        
+
+        Only the new batch is written to disk (appended to the log).
+
         Args:
             documents: List of document texts
             embeddings: List of embedding vectors
             metadata: Optional metadata for each document
+
+        Returns:
+            Vector ids assigned to the documents
         """
         if len(documents) != len(embeddings):
             raise ValueError("Number of documents and embeddings must match")
-        
+        if not documents:
+            return []
+
         # Convert embeddings to numpy array
-        embeddings_array = np.array(embeddings, dtype=np.float32)
-        
-        # Add to FAISS index
-        self.index.add(embeddings_array)
-        
-        # Store documents and metadata
-        start_idx = len(self.documents)
-        for i, doc in enumerate(documents):
-            doc_id = str(start_idx + i)
-            self.documents.append(doc)
-            
-            if metadata and i < len(metadata):
-                self.metadata[doc_id] = metadata[i]
-            else:
-                self.metadata[doc_id] = {"source": "unknown"}
-        
-        # Save index and metadata
-        self._save()
+        embeddings_array = np.ascontiguousarray(embeddings, dtype=np.float32)
+        metadata = [
+            metadata[i] if metadata and i < len(metadata) else {"source": "unknown"}
+            for i in range(len(documents))
+        ]
+
+        with self._lock:
+            start_idx = self.next_id
+            record = {
+                "op": "add",
+                "start": start_idx,
+                "documents": documents,
+                "metadata": metadata,
+                "vectors": base64.b64encode(embeddings_array.tobytes()).decode("ascii"),
+            }
+            # Write-ahead: the log is durable before the in-memory state changes
+            self._append_log(record)
+            self._apply(record)
+
+        self._maybe_compact()
+        return list(range(start_idx, start_idx + len(documents)))
 
     def search(
         self,
@@ -99,54 +359,387 @@ class VectorStore:
     ) -> List[Tuple[str, float, dict]]:
         """
         Search for similar documents.
-        
+
         Args:
             query_embedding: Query embedding vector
             k: Number of results to return
-        
+
         Returns:
-            List of (document, distance, metadata) tuples
+            List of (document, score, metadata) tuples, best first; score is
+            the cosine similarity, or 1 / (1 + squared L2 distance) for L2 indexes
         """
         query_array = np.array([query_embedding], dtype=np.float32)
-        distances, indices = self.index.search(query_array, k)
-        
-        results = []
-        for distance, idx in zip(distances[0], indices[0]):
-            if idx >= 0 and idx < len(self.documents):
-                doc = self.documents[int(idx)]
-                metadata = self.metadata.get(str(idx), {})
-                results.append((doc, float(distance), metadata))
-        
+        with self._lock:
+            metric = index_metric(self.index)
+            if metric == COSINE:
+                query_array = normalized(query_array)
+            params = search_params(self.index, self.index_config, self._tombstone_selector())
+            distances, indices = self.index.search(query_array, k, params=params)
+
+            results = []
+            for distance, idx in zip(distances[0], indices[0]):
+                doc = self.documents.get(int(idx))
+                if doc is not None:
+                    metadata = self.metadata.get(str(idx), {})
+                    results.append((doc, similarity(float(distance), metric), metadata))
+
         return results
 
+    def _tombstone_selector(self):
+        """Id selector that skips the tombstones, or None (must hold self._lock)."""
+        if not self.tombstones:
+            return None
+        if self._exclude is None:
+            deleted = np.fromiter(self.tombstones, dtype=np.int64, count=len(self.tombstones))
+            self._exclude = faiss.IDSelectorNot(faiss.IDSelectorBatch(deleted))
+        return self._exclude
+
     def delete_document(self, doc_id: int) -> None:
         """Delete a document from the index."""
-        if doc_id < len(self.documents):
-            self.documents[doc_id] = None
-            if str(doc_id) in self.metadata:
-                del self.metadata[str(doc_id)]
-            self._save()
-
-    def _save(self) -> None:
-        """Save index and metadata to disk."""
-        faiss.write_index(self.index, self.index_path)
-        
-        metadata_path = self.index_path.replace(".index", ".json")
-        with open(metadata_path, "w") as f:
-            json.dump(
-                {
-                    "documents": self.documents,
-                    "metadata": self.metadata,
-                },
-                f,
+        self.delete_vectors([doc_id])
+
+    def delete_vectors(self, vector_ids: List[int]) -> int:
+        """
+        Delete vectors by id.
+
+        They are excluded from searches at once and removed from the index
+        by the next tombstone compaction.
+
+        Args:
+            vector_ids: Vector ids to delete
+
+        Returns:
+            Number of vectors deleted
+        """
+        with self._lock:
+            ids = sorted({int(i) for i in vector_ids if int(i) in self.documents})
+            if ids:
+                record = {"op": "delete", "ids": ids}
+                self._append_log(record)
+                self._apply(record)
+        if ids:
+            self._maybe_compact()
+        return len(ids)
+
+    def delete_by_document(self, document_id: str) -> int:
+        """Delete every vector whose metadata "id" is document_id; returns how many."""
+        return self.delete_vectors(self.vector_ids(document_id))
+
+    def vector_ids(self, document_id: str) -> List[int]:
+        """Vector ids of a document (by metadata "id")."""
+        with self._lock:
+            return sorted(self._document_vectors.get(str(document_id), ()))
+
+    def log_bytes(self) -> int:
+        """Size of the log not yet folded into the snapshot."""
+        with self._lock:
+            return self._log.tell() if self._log else 0
+
+    def _needs_purge(self) -> bool:
+        with self._lock:
+            return bool(self.tombstones) and (
+                len(self.tombstones) >= self.tombstone_ratio * max(1, self.index.ntotal)
+            )
+
+    def _migration_target(self) -> Optional[str]:
+        """Index type to migrate to, or None to keep the current one."""
+        with self._lock:
+            current = index_type(self.index)
+            target = self.index_config.choose(self.index.ntotal)
+            exact = is_exact(self.index)
+            same_metric = index_metric(self.index) == self.index_config.metric
+        if not exact or target == self._failed_migration:
+            return None
+        if not same_metric:
+            # Rebuild under the configured metric, keeping the type unless it is outgrown
+            return target if INDEX_TYPES.index(target) > INDEX_TYPES.index(current) else current
+        if target == current:
+            return None
+        # Automatic selection only moves up, so deletions near a threshold do not flap
+        if self.index_config.index_type == AUTO and INDEX_TYPES.index(target) < INDEX_TYPES.index(current):
+            return None
+        return target
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once the log or the tombstones are large enough,
+        or the corpus has outgrown the index type."""
+        if (
+            self.log_bytes() < self.compact_log_bytes
+            and not self._needs_purge()
+            and self._migration_target() is None
+        ):
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, name="vector-compaction", daemon=True)
+        self._compaction.start()
+
+    def purge_tombstones(self) -> int:
+        """Remove deleted vectors from the index; returns how many were removed."""
+        with self._compact_lock:
+            return self._purge_tombstones()
+
+    def _purge_tombstones(self) -> int:
+        """Purge the tombstones (must hold self._compact_lock, which keeps migrations out).
+
+        Flat and IVF-PQ indexes drop the vectors in place. HNSW graphs cannot
+        drop nodes, so, as in _migrate, the remaining vectors are copied
+        under the lock, the new graph is built outside it while adds,
+        deletes and searches continue, and vectors added meanwhile are
+        copied over before the swap.
+        """
+        with self._lock:
+            purge = set(self.tombstones)
+            if not purge:
+                return 0
+            if supports_remove(self.index):
+                removed = self._remove_from_index(purge)
+                self.tombstones -= purge
+                self._exclude = None
+                remaining = self.index.ntotal
+                source = None
+            else:
+                source = self.index
+                all_ids, vectors = export_vectors(source)
+                cut_id = self.next_id
+
+        if source is not None:
+            live = ~np.isin(all_ids, np.fromiter(purge, dtype=np.int64, count=len(purge)))
+            config = dataclasses.replace(self.index_config, metric=index_metric(source))
+            new_index = build_index(
+                index_type(source), self.dimension, vectors[live], all_ids[live], config
             )
+            removed = int((~live).sum())
+
+            with self._lock:
+                late = [
+                    vector_id for vector_id in range(cut_id, self.next_id)
+                    if vector_id in self.documents or vector_id in self.tombstones
+                ]
+                if late:
+                    # Stored vectors are already normalized for the index's metric
+                    late_vectors = np.vstack([source.reconstruct(vector_id) for vector_id in late])
+                    new_index.add_with_ids(late_vectors, np.array(late, dtype=np.int64))
+                self.index = new_index
+                # Deletes made during the rebuild stay tombstones of the new index
+                self.tombstones -= purge
+                self._exclude = None
+                remaining = self.index.ntotal
+
+        if removed:
+            print(f"Vector store: removed {removed} deleted vectors, {remaining} remain")
+        return removed
+
+    def _remove_from_index(self, vector_ids: Set[int]) -> int:
+        """Remove vectors from the index at once; HNSW is rebuilt synchronously (used while loading)."""
+        if not vector_ids:
+            return 0
+        ids = np.fromiter(vector_ids, dtype=np.int64, count=len(vector_ids))
+        if not supports_remove(self.index):
+            # HNSW cannot drop graph nodes: rebuild from the remaining vectors
+            ids_before, vectors = export_vectors(self.index)
+            live = ~np.isin(ids_before, ids)
+            config = dataclasses.replace(self.index_config, metric=index_metric(self.index))
+            self.index = build_index(
+                index_type(self.index), self.dimension, vectors[live], ids_before[live], config
+            )
+            return int((~live).sum())
+        return int(self.index.remove_ids(faiss.IDSelectorBatch(ids)))
+
+    def migrate(self, kind: str) -> None:
+        """
+        Rebuild the index as another type (flat, hnsw or ivfpq) under the configured metric.
+
+        The new index is built (and trained, for IVF-PQ) from a copy of the
+        live vectors while adds, deletes and searches continue on the old
+        one; vectors added meanwhile are copied over before the swap. Its
+        recall against an exact search is measured before it goes live.
+
+        Args:
+            kind: Target index type
+        """
+        with self._compact_lock:
+            self._migrate(kind)
+
+    def _migrate(self, kind: str) -> None:
+        """Migrate the index (must hold self._compact_lock, which keeps purges out)."""
+        with self._lock:
+            source = self.index
+            all_ids, vectors = export_vectors(source)
+            # Tombstones are left out of the new index
+            dropped = np.isin(all_ids, np.fromiter(self.tombstones, dtype=np.int64))
+            ids, vectors = all_ids[~dropped], vectors[~dropped]
+            dropped_ids = set(all_ids[dropped].tolist())
+            cut_id = self.next_id
+
+        started = time.perf_counter()
+        metric = self.index_config.metric
+        if metric == COSINE:
+            vectors = normalized(vectors)
+        new_index = build_index(kind, self.dimension, vectors, ids, self.index_config)
+        probe = make_recall_probe(ids, vectors, metric=metric)
+        recall = measure_recall(new_index, probe, self.index_config)
+        recall["build_seconds"] = round(time.perf_counter() - started, 3)
+
+        with self._lock:
+            late = [
+                vector_id for vector_id in range(cut_id, self.next_id)
+                if vector_id in self.documents or vector_id in self.tombstones
+            ]
+            if late:
+                late_vectors = np.vstack([source.reconstruct(vector_id) for vector_id in late])
+                if metric == COSINE:
+                    late_vectors = normalized(late_vectors)
+                late_ids = np.array(late, dtype=np.int64)
+                new_index.add_with_ids(late_vectors, late_ids)
+                probe.add(late_ids, late_vectors)
+            self.index = new_index
+            self.tombstones -= dropped_ids
+            # Vectors deleted while the new index was built
+            probe.remove(self.tombstones)
+            self._exclude = None
+            self.last_recall = recall
+            self._recall_probe = probe
+        print(
+            f"Vector store: migrated {len(ids) + len(late)} vectors to {kind} ({metric}) "
+            f"in {recall['build_seconds']:.1f}s (recall@{recall['k']} {recall['recall']})"
+        )
+
+    def tune(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+        """Set HNSW efSearch and/or IVF nprobe for later searches (higher: better recall, slower)."""
+        if ef_search is not None:
+            self.index_config.ef_search = ef_search
+        if nprobe is not None:
+            self.index_config.nprobe = nprobe
+
+    def recall_check(self, k: int = 10, queries: int = 100) -> dict:
+        """
+        Recall@k of the current index against an exact (flat) search over the live vectors.
+
+        IVF-PQ keeps only compressed codes, so it is checked against the
+        exact neighbors sampled when it was built, kept up to date with the
+        vectors added and deleted since (with the current nprobe).
+
+        Args:
+            k: Neighbors per query
+            queries: Number of stored vectors sampled as queries
+
+        Returns:
+            Recall and per-query latency of the index and the exact search
+        """
+        with self._lock:
+            index = self.index
+            selector = self._tombstone_selector()
+            probe = self._recall_probe
+            if is_exact(index):
+                ids, vectors = export_vectors(index)
+                live = ~np.isin(ids, np.fromiter(self.tombstones, dtype=np.int64))
+                probe = make_recall_probe(ids[live], vectors[live], k, queries, index_metric(index))
+        if probe is None:
+            return {"recall": None, "baseline": None}
+        result = measure_recall(index, probe, self.index_config, selector)
+        return {**result, "baseline": "now" if is_exact(index) else "since migration"}
+
+    def index_info(self) -> dict:
+        """Index type, size and tuning."""
+        with self._lock:
+            return {
+                "type": index_type(self.index),
+                "metric": index_metric(self.index),
+                "configured_type": self.index_config.index_type,
+                "vectors": self.index.ntotal,
+                "tombstones": len(self.tombstones),
+                "ef_search": self.index_config.ef_search,
+                "nprobe": self.index_config.nprobe,
+                "last_recall": self.last_recall,
+            }
+
+    def compact(self) -> None:
+        """
+        Remove deleted vectors once there are enough of them, then write a
+        snapshot of the current state and drop the log records it covers.
+
+        The snapshot is written from a copy, so adds and searches continue
+        meanwhile; records appended during the write stay in the log.
+        """
+        with self._compact_lock:
+            purged = self._purge_tombstones() if self._needs_purge() else 0
+
+            migrated = False
+            target = self._migration_target()
+            if target is not None:
+                try:
+                    self._migrate(target)
+                    migrated = True
+                except Exception as e:
+                    self._failed_migration = target
+                    print(f"Vector store: migration to {target} failed, keeping {index_type(self.index)}: {e}")
+
+            with self._lock:
+                cut = self._log.tell()
+                if cut == 0 and not purged and not migrated:
+                    return
+                index = faiss.clone_index(self.index)
+                state = {
+                    "next_id": self.next_id,
+                    "documents": dict(self.documents),
+                    "metadata": dict(self.metadata),
+                    "tombstones": sorted(self.tombstones),
+                }
+
+            self._save(index, state)
+
+            with self._lock:
+                self._log.close()
+                with open(self.log_path, "rb") as f:
+                    f.seek(cut)
+                    tail = f.read()
+
+                def write_tail(tmp_path: str) -> None:
+                    with open(tmp_path, "wb") as f:
+                        f.write(tail)
+
+                _replace_file(self.log_path, write_tail)
+                self._log = open(self.log_path, "ab")
+
+    def _save(self, index, state: dict) -> None:
+        """Atomically replace the snapshot (index and metadata files) on disk."""
+
+        def write_metadata(tmp_path: str) -> None:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+
+        _replace_file(self.metadata_path, write_metadata)
+        _replace_file(self.index_path, lambda tmp_path: faiss.write_index(index, tmp_path))
 
     def clear(self) -> None:
         """Clear all documents and index."""
-        self.index = faiss.IndexFlatL2(self.dimension)
-        self.documents = []
-        self.metadata = {}
-        self._save()
+        with self._compact_lock, self._lock:
+            self.index = self._new_index()
+            self.documents = {}
+            self.metadata = {}
+            self.tombstones = set()
+            self._document_vectors = {}
+            self._exclude = None
+            self._save(
+                self.index,
+                {"next_id": self.next_id, "documents": {}, "metadata": {}, "tombstones": []},
+            )
+            self._log.truncate(0)
+            self._log.seek(0)
+
+    def close(self) -> None:
+        """Fold the log into a snapshot and close it."""
+        if self._compaction is not None:
+            self._compaction.join()
+        if self._log is None:
+            return
+        try:
+            self.compact()
+        finally:
+            with self._lock:
+                self._log.close()
+                self._log = None
 
     def size(self) -> int:
         """Get number of documents in index."""
@@ -176,9 +769,9 @@ class EmbeddingService:
         """Generate embedding for text."""
         return self.model.encode(text, convert_to_numpy=True).tolist()
 
-    def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
+    def embed_batch(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Generate embeddings for multiple texts, batch_size at a time."""
+        embeddings = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
         return embeddings.tolist()
 
 
@@ -193,34 +786,186 @@ class RAGService:
         """Initialize RAG service."""
         self.vector_store = vector_store
         self.embedding_service = embedding_service
+        self.token_counter = TokenCounter()
 
     def add_knowledge(
         self,
         documents: List[str],
         metadata: Optional[List[dict]] = None,
-    ) -> None:
-        """Add documents to knowledge base."""
-        embeddings = self.embedding_service.embed_batch(documents)
-        self.vector_store.add_documents(documents, embeddings, metadata)
+        batch_size: int = 32,
+    ) -> List[int]:
+        """
+        Add documents to knowledge base.
+
+        Documents are embedded batch_size at a time and written to the
+        vector store once.
+
+        Args:
+            documents: Document (or chunk) texts
+            metadata: Optional metadata for each document
+            batch_size: Texts per embedding call
+
+        Returns:
+            Vector ids assigned to the documents
+        """
+        if not documents:
+            return []
+        embeddings = []
+        for start in range(0, len(documents), batch_size):
+            embeddings.extend(
+                self.embedding_service.embed_batch(documents[start:start + batch_size], batch_size)
+            )
+        return self.vector_store.add_documents(documents, embeddings, metadata)
 
     def retrieve(
         self,
         query: str,
         k: int = 5,
+        min_score: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        mode: Optional[str] = None,
+        timings: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[str, float, dict]]:
-        """Retrieve relevant documents for query."""
+        """
+        Retrieve relevant documents for query.
+
+        In hybrid mode the keyword index over knowledge chunks is searched in
+        a worker thread while the query is embedded and searched here, and the
+        two rankings are fused with reciprocal rank fusion, so exact
+        identifiers (tickers, error codes, names) that embed poorly still
+        come back.
+
+        Args:
+            query: Query text
+            k: Maximum number of documents
+            min_score: Drop vector candidates scoring below this (settings.rag_min_score if omitted)
+            max_tokens: Stop before the documents exceed this many tokens
+                (settings.rag_max_context_tokens if omitted; 0 for no limit)
+            mode: "vector" or "hybrid" (settings.rag_retrieval_mode if omitted)
+            timings: Filled with per-stage latencies in milliseconds and
+                candidate counts, as KnowledgeSearchService reports them;
+                they are also logged at debug level
+
+        Returns:
+            List of (document, score, metadata) tuples, best first; score is
+            the similarity in vector mode and the fused RRF score in hybrid mode
+        """
+        from .knowledge_search import HYBRID, VECTOR
+
+        min_score = settings.rag_min_score if min_score is None else min_score
+        max_tokens = settings.rag_max_context_tokens if max_tokens is None else max_tokens
+        mode = mode or settings.rag_retrieval_mode
+        if mode not in (VECTOR, HYBRID):
+            raise ValueError(f"Unknown retrieval mode: {mode}")
+
+        started = time.perf_counter()
+        timings = {} if timings is None else timings
+        timings["mode"] = mode
+        if mode == HYBRID:
+            results = self._retrieve_hybrid(query, k, min_score, timings)
+        else:
+            results = self._vector_candidates(query, k, min_score, timings)
+
+        kept, used = [], 0
+        for result in results:
+            if max_tokens:
+                tokens = self.token_counter.count(result[0])
+                if used + tokens > max_tokens:
+                    break
+                used += tokens
+            kept.append(result)
+        timings["total_ms"] = _ms(started)
+        logger.debug("RAG retrieval timings: %s", timings)
+        return kept
+
+    def _vector_candidates(
+        self,
+        query: str,
+        limit: int,
+        min_score: float,
+        timings: Dict[str, Any],
+    ) -> List[Tuple[str, float, dict]]:
+        """Embed the query and search the store, dropping results below min_score."""
+        started = time.perf_counter()
         query_embedding = self.embedding_service.embed(query)
-        return self.vector_store.search(query_embedding, k)
+        timings["embed_ms"] = _ms(started)
+
+        started = time.perf_counter()
+        results = [r for r in self.vector_store.search(query_embedding, limit) if r[1] >= min_score]
+        timings["vector_ms"] = _ms(started)
+        timings["vector_candidates"] = len(results)
+        return results
+
+    def _retrieve_hybrid(
+        self,
+        query: str,
+        k: int,
+        min_score: float,
+        timings: Dict[str, Any],
+    ) -> List[Tuple[str, float, dict]]:
+        """Vector and keyword candidates fused with RRF, best first."""
+        from ..db import SessionLocal
+        from .knowledge_search import fuse_hits, hit_key, search_chunks_lexical, vector_hit
 
-    def get_context(self, query: str, k: int = 5) -> str:
-        """Get formatted context for LLM from retrieved documents."""
-        results = self.retrieve(query, k)
+        def lexical_stage():
+            started = time.perf_counter()
+            with SessionLocal() as db:
+                hits = search_chunks_lexical(db, query, max(k, settings.rag_lexical_candidates))
+            timings["lexical_ms"] = _ms(started)
+            return hits
+
+        lexical = _lexical_pool.submit(lexical_stage)
+        results = self._vector_candidates(
+            query, max(k, settings.rag_vector_candidates), min_score, timings
+        )
+        try:
+            lexical_hits = lexical.result()
+        except Exception as e:
+            logger.warning("Keyword retrieval unavailable, using vectors only: %s", e)
+            timings["lexical_error"] = str(e)
+            lexical_hits = []
+        timings["lexical_candidates"] = len(lexical_hits)
+
+        started = time.perf_counter()
+        vector_hits = []
+        metadata_by_key = {}
+        for rank, (doc, score, metadata) in enumerate(results, 1):
+            hit = vector_hit(rank, doc, score, metadata)
+            vector_hits.append(hit)
+            metadata_by_key[hit_key(hit)] = metadata
+
+        fused = [
+            (
+                hit.text,
+                hit.score,
+                metadata_by_key.get(hit_key(hit))
+                or {"id": hit.document_id, "title": hit.title, "chunk_id": hit.chunk_id},
+            )
+            for hit in fuse_hits(vector_hits, lexical_hits, settings.rag_rrf_k)[:k]
+        ]
+        timings["fusion_ms"] = _ms(started)
+        return fused
+
+    def get_context(
+        self,
+        query: str,
+        k: int = 5,
+        min_score: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        mode: Optional[str] = None,
+    ) -> str:
+        """Get formatted context for LLM from the documents that pass the score cutoff and token budget."""
+        mode = mode or settings.rag_retrieval_mode
+        results = self.retrieve(query, k, min_score=min_score, max_tokens=max_tokens, mode=mode)
         
         if not results:
             return ""
         
         context_parts = []
-        for i, (doc, distance, metadata) in enumerate(results, 1):
-            context_parts.append(f"[{i}] {doc}\n(similarity: {1 / (1 + distance):.2%})")
+        for i, (doc, score, metadata) in enumerate(results, 1):
+            if mode == "vector":
+                context_parts.append(f"[{i}] {doc}\n(similarity: {score:.2%})")
+            else:
+                context_parts.append(f"[{i}] {doc}\n(relevance: {score:.4f})")
         
         return "\n\n".join(context_parts)
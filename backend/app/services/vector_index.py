@@ -0,0 +1,343 @@
+"""FAISS index types for the vector store: Flat, HNSW and IVF-PQ.
+
+Every index is wrapped in an IndexIDMap2, so vector ids stay stable when
+the store migrates from one type to another. Indexes use either squared L2
+distance or inner product over L2-normalized vectors (cosine similarity).
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from ..config import settings
+
+# FAISS imports - optional dependency
+try:
+    import faiss
+    FAISS_AVAILABLE = True
+except ImportError:
+    FAISS_AVAILABLE = False
+
+FLAT = "flat"
+HNSW = "hnsw"
+IVFPQ = "ivfpq"
+AUTO = "auto"
+COSINE = "cosine"
+L2 = "l2"
+INDEX_TYPES = (FLAT, HNSW, IVFPQ)  # In order of corpus size they suit
+
+# IVF-PQ needs enough vectors to train its coarse quantizer and codebooks
+IVFPQ_MIN_TRAIN_VECTORS = 1000
+
+
+@dataclass
+class IndexConfig:
+    """Index type selection and tuning."""
+
+    index_type: str = AUTO  # flat, hnsw, ivfpq, or auto to choose by corpus size
+    metric: str = COSINE  # cosine (inner product over normalized vectors) or l2
+    hnsw_min_vectors: int = 20_000
+    ivfpq_min_vectors: int = 500_000
+    hnsw_m: int = 32
+    hnsw_ef_construction: int = 80
+    ef_search: int = 64
+    ivf_nlist: int = 0  # 0 = 4 * sqrt(vectors)
+    nprobe: int = 16
+    pq_m: int = 48
+    train_sample: int = 100_000
+
+    @classmethod
+    def from_settings(cls) -> "IndexConfig":
+        """Build the configuration from application settings."""
+        return cls(
+            index_type=settings.vector_index_type,
+            metric=settings.vector_metric,
+            hnsw_min_vectors=settings.vector_hnsw_min_vectors,
+            ivfpq_min_vectors=settings.vector_ivfpq_min_vectors,
+            hnsw_m=settings.vector_hnsw_m,
+            hnsw_ef_construction=settings.vector_hnsw_ef_construction,
+            ef_search=settings.vector_hnsw_ef_search,
+            ivf_nlist=settings.vector_ivf_nlist,
+            nprobe=settings.vector_ivf_nprobe,
+            pq_m=settings.vector_pq_m,
+            train_sample=settings.vector_train_sample,
+        )
+
+    def choose(self, vectors: int) -> str:
+        """Index type for a corpus of this many vectors."""
+        kind = self.index_type
+        if kind not in INDEX_TYPES:
+            if vectors >= self.ivfpq_min_vectors:
+                kind = IVFPQ
+            elif vectors >= self.hnsw_min_vectors:
+                kind = HNSW
+            else:
+                kind = FLAT
+        if kind == IVFPQ and vectors < IVFPQ_MIN_TRAIN_VECTORS:
+            return FLAT
+        return kind
+
+
+def index_type(index) -> str:
+    """Type of an (ID-mapped) index."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return HNSW
+    if isinstance(inner, faiss.IndexIVF):
+        return IVFPQ
+    return FLAT
+
+
+def index_metric(index) -> str:
+    """Metric of an index: cosine for inner product, else l2."""
+    return COSINE if index.metric_type == faiss.METRIC_INNER_PRODUCT else L2
+
+
+def faiss_metric(metric: str) -> int:
+    return faiss.METRIC_INNER_PRODUCT if metric == COSINE else faiss.METRIC_L2
+
+
+def normalized(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalized float32 copy of vectors."""
+    vectors = np.array(vectors, dtype=np.float32, copy=True).reshape(len(vectors), -1)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def similarity(score: float, metric: str) -> float:
+    """Turn a raw search score into a similarity (higher is more similar)."""
+    return score if metric == COSINE else 1 / (1 + score)
+
+
+def is_exact(index) -> bool:
+    """Whether reconstructed vectors equal the added ones (false for PQ codes)."""
+    return index_type(index) != IVFPQ
+
+
+def supports_remove(index) -> bool:
+    """Whether remove_ids works in place (HNSW graphs cannot drop nodes)."""
+    return index_type(index) != HNSW
+
+
+def _pq_subquantizers(dimension: int, wanted: int) -> int:
+    """Largest divisor of dimension that is at most wanted."""
+    for m in range(min(wanted, dimension), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def build_index(kind: str, dimension: int, vectors: np.ndarray, ids: np.ndarray, config: IndexConfig):
+    """
+    Build an ID-mapped index of the given type holding vectors.
+
+    IVF-PQ is trained on a random sample of at most config.train_sample
+    vectors first.
+
+    Args:
+        kind: flat, hnsw or ivfpq
+        dimension: Vector dimension
+        vectors: float32 array of shape (n, dimension)
+        ids: int64 vector ids
+        config: Index configuration (type tuning and metric; cosine
+            vectors must already be normalized)
+
+    Returns:
+        Populated IndexIDMap2
+    """
+    metric = faiss_metric(config.metric)
+    if kind == HNSW:
+        inner = faiss.IndexHNSWFlat(dimension, config.hnsw_m, metric)
+        inner.hnsw.efConstruction = config.hnsw_ef_construction
+        inner.hnsw.efSearch = config.ef_search
+    elif kind == IVFPQ:
+        nlist = config.ivf_nlist or int(4 * math.sqrt(max(1, len(vectors))))
+        # k-means needs a few dozen points per list
+        nlist = max(1, min(nlist, len(vectors) // 39))
+        quantizer = faiss.IndexFlat(dimension, metric)
+        inner = faiss.IndexIVFPQ(
+            quantizer, dimension, nlist, _pq_subquantizers(dimension, config.pq_m), 8, metric
+        )
+        sample_size = max(config.train_sample, 39 * nlist)
+        sample = vectors
+        if len(vectors) > sample_size:
+            rng = np.random.default_rng(0)
+            sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        inner.train(np.ascontiguousarray(sample))
+        inner.nprobe = config.nprobe
+    else:
+        inner = faiss.IndexFlat(dimension, metric)
+
+    index = faiss.IndexIDMap2(inner)
+    if len(vectors):
+        index.add_with_ids(np.ascontiguousarray(vectors), ids)
+    return index
+
+
+def export_vectors(index):
+    """(ids, vectors) of every vector in an ID-mapped index, in storage order."""
+    ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+    if not len(ids):
+        return ids, np.zeros((0, index.d), dtype=np.float32)
+    inner = faiss.downcast_index(index.index)
+    if isinstance(inner, faiss.IndexIVF):
+        inner.make_direct_map()
+    return ids, inner.reconstruct_n(0, inner.ntotal)
+
+
+def search_params(index, config: IndexConfig, selector=None):
+    """Search parameters for the index type (efSearch or nprobe) with an optional id selector."""
+    kind = index_type(index)
+    if kind == HNSW:
+        return faiss.SearchParametersHNSW(efSearch=config.ef_search, sel=selector)
+    if kind == IVFPQ:
+        return faiss.SearchParametersIVF(nprobe=config.nprobe, sel=selector)
+    return faiss.SearchParameters(sel=selector) if selector is not None else None
+
+
+@dataclass
+class RecallProbe:
+    """Sampled queries with their exact nearest neighbors.
+
+    The neighbor lists are kept exact as vectors are added and deleted, so
+    recall can be re-measured on an index whose original vectors are gone
+    (IVF-PQ keeps only compressed codes). Each list holds every live vector
+    closer than its bound, best first; it is sampled k deep plus a margin
+    that absorbs deletions.
+    """
+
+    queries: np.ndarray
+    neighbor_ids: List[np.ndarray]  # Per query, best first
+    neighbor_keys: List[np.ndarray]  # Matching distances (negated similarities for cosine)
+    bounds: np.ndarray  # Per query: every live vector closer than this is in the list
+    k: int
+    exact_ms_per_query: float
+    metric: str = L2
+    depth: int = 0  # Longest list kept
+
+    def _keys(self, vectors: np.ndarray) -> np.ndarray:
+        """Distance of every query to every vector, lower is closer."""
+        products = self.queries @ vectors.T
+        if self.metric == COSINE:
+            return -products
+        return (
+            (self.queries ** 2).sum(axis=1)[:, None] - 2 * products + (vectors ** 2).sum(axis=1)[None, :]
+        )
+
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Merge added vectors (as stored in the index) into the neighbor lists."""
+        if not len(ids):
+            return
+        keys = self._keys(np.asarray(vectors, dtype=np.float32))
+        for row in range(len(self.queries)):
+            closer = keys[row] < self.bounds[row]
+            if not closer.any():
+                continue
+            merged_ids = np.concatenate([self.neighbor_ids[row], ids[closer]])
+            merged_keys = np.concatenate([self.neighbor_keys[row], keys[row][closer]])
+            order = np.argsort(merged_keys, kind="stable")[:self.depth]
+            if len(merged_keys) > self.depth:
+                # Vectors past the cut are no longer tracked
+                self.bounds[row] = merged_keys[order[-1]]
+            self.neighbor_ids[row] = merged_ids[order]
+            self.neighbor_keys[row] = merged_keys[order]
+
+    def remove(self, ids) -> None:
+        """Drop deleted vectors from the neighbor lists."""
+        removed = np.fromiter(ids, dtype=np.int64)
+        if not len(removed):
+            return
+        for row in range(len(self.queries)):
+            keep = ~np.isin(self.neighbor_ids[row], removed)
+            if not keep.all():
+                self.neighbor_ids[row] = self.neighbor_ids[row][keep]
+                self.neighbor_keys[row] = self.neighbor_keys[row][keep]
+
+    def valid(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(queries, truth) for the queries that still know their k nearest neighbors."""
+        rows = [row for row in range(len(self.queries)) if len(self.neighbor_ids[row]) >= self.k]
+        if not rows:
+            return self.queries[:0], np.zeros((0, self.k), dtype=np.int64)
+        return self.queries[rows], np.vstack([self.neighbor_ids[row][:self.k] for row in rows])
+
+
+def make_recall_probe(
+    ids: np.ndarray,
+    vectors: np.ndarray,
+    k: int = 10,
+    queries: int = 100,
+    metric: str = L2,
+) -> RecallProbe:
+    """
+    Sample stored vectors as queries and find their exact neighbors by brute force.
+
+    Args:
+        ids: Vector ids
+        vectors: Vectors (the live vectors of the index)
+        k: Neighbors per query
+        queries: Number of sampled queries
+        metric: Metric of the evaluated index
+
+    Returns:
+        Probe for measure_recall
+    """
+    k = max(1, min(k, len(vectors)))
+    depth = min(2 * k, len(vectors))
+    rng = np.random.default_rng()
+    sample = vectors[rng.choice(len(vectors), min(queries, len(vectors)), replace=False)]
+    started = time.perf_counter()
+    scores, positions = faiss.knn(sample, vectors, depth, metric=faiss_metric(metric))
+    exact_ms = (time.perf_counter() - started) * 1000 / max(1, len(sample))
+
+    keys = -scores if metric == COSINE else scores
+    # A list of every vector is complete however far new vectors land
+    bounds = keys[:, -1].copy() if depth < len(vectors) else np.full(len(sample), np.inf)
+    return RecallProbe(
+        queries=sample,
+        neighbor_ids=list(ids[positions]),
+        neighbor_keys=list(keys),
+        bounds=bounds.astype(np.float64),
+        k=k,
+        exact_ms_per_query=exact_ms,
+        metric=metric,
+        depth=depth,
+    )
+
+
+def measure_recall(index, probe: RecallProbe, config: IndexConfig, selector=None) -> Dict[str, Any]:
+    """
+    Recall@k of index against the exact neighbors of a probe.
+
+    Args:
+        index: Index to evaluate
+        probe: Queries and exact neighbors
+        config: Index configuration (efSearch, nprobe)
+        selector: Id selector applied to the evaluated index (e.g. tombstones)
+
+    Returns:
+        Recall and mean per-query latency of the index and the exact search
+    """
+    queries, truth = probe.valid()
+    if not len(queries):
+        return {"recall": None, "k": probe.k, "queries": 0}
+    started = time.perf_counter()
+    _, found = index.search(queries, probe.k, params=search_params(index, config, selector))
+    index_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+    hits = sum(
+        len(set(truth_row.tolist()) & set(found_row.tolist()))
+        for truth_row, found_row in zip(truth, found)
+    )
+    return {
+        "recall": round(hits / (len(queries) * probe.k), 4),
+        "k": probe.k,
+        "queries": len(queries),
+        "index_type": index_type(index),
+        "ef_search": config.ef_search,
+        "nprobe": config.nprobe,
+        "exact_ms_per_query": round(probe.exact_ms_per_query, 3),
+        "index_ms_per_query": round(index_ms, 3),
+    }
@@ -14,11 +14,13 @@ class BaseSkill:
 
     async def run(self, **kwargs) -> Any:
         # Check if it's an async function
+        import asyncio
         import inspect
         if inspect.iscoroutinefunction(self._run_func):
             return await self._run_func(**kwargs)
         else:
-            return self._run_func(**kwargs)
+            # Run sync skills in a worker thread so they don't block the event loop
+            return await asyncio.to_thread(self._run_func, **kwargs)
 
     def to_tool_definition(self) -> Dict[str, Any]:
         """Convert skill manifest to Groq/OpenAI tool format."""
@@ -0,0 +1,21 @@
+"""Test setup: every run gets its own SQLite database and vector index directory.
+
+The environment is set before the app package is imported, because settings
+and the database engines are created at import time.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_DATA_DIR = tempfile.mkdtemp(prefix="openpaw-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DATA_DIR}/openpaw_test.db"
+os.environ["VECTOR_INDEX_PATH"] = f"{_DATA_DIR}/faiss.index"
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ.setdefault("GROQ_API_KEY", "test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.db import init_db  # noqa: E402
+
+init_db()
@@ -0,0 +1,71 @@
+"""Chat routes: the reply and the prompt token usage of the turn are reported."""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.exceptions import APIException, api_exception_handler
+from app.routes import chat as chat_routes
+
+
+async def _no_summary(conversation_id):
+    return None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Chat router with the LLM agent, memory queue and summary task stubbed out."""
+
+    async def run(self, user_message, db=None, history=None, system_prompt=None):
+        return f"echo: {user_message}", None
+
+    async def run_stream(self, user_message, db=None, history=None, system_prompt=None):
+        yield {"type": "token", "text": "echo"}
+        yield {"type": "done", "reply": f"echo: {user_message}", "tool_used": None}
+
+    monkeypatch.setattr(chat_routes.SimpleAgent, "run", run)
+    monkeypatch.setattr(chat_routes.SimpleAgent, "run_stream", run_stream)
+    monkeypatch.setattr(chat_routes.memory_updates, "submit", lambda *args: False)
+    monkeypatch.setattr(chat_routes, "_update_conversation_summary", _no_summary)
+
+    app = FastAPI()
+    app.add_exception_handler(APIException, api_exception_handler)
+    app.include_router(chat_routes.router, prefix="/api/chat")
+    return TestClient(app)
+
+
+def _assert_usage(context_tokens):
+    assert context_tokens["system"] > 0
+    assert context_tokens["user_message"] > 0
+    assert "reserved" in context_tokens
+    assert all(isinstance(tokens, int) and tokens >= 0 for tokens in context_tokens.values())
+
+
+def test_chat_reports_context_tokens_per_segment(client):
+    first = client.post("/api/chat", json={"message": "Plan my week please"})
+    assert first.status_code == 200
+    _assert_usage(first.json()["context_tokens"])
+
+    # The second turn also carries the first one as history
+    second = client.post(
+        "/api/chat",
+        json={"conversation_id": first.json()["conversation_id"], "message": "And next week?"},
+    )
+    assert second.status_code == 200
+    assert second.json()["reply"] == "echo: And next week?"
+    assert second.json()["context_tokens"]["history"] > 0
+
+
+def test_stream_done_event_reports_context_tokens(client):
+    response = client.post("/api/chat/stream", json={"message": "Plan my week please"})
+    assert response.status_code == 200
+
+    events = {}
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events[event.removeprefix("event: ")] = json.loads(data.removeprefix("data: "))
+
+    assert events["done"]["message"]["content"] == "echo: Plan my week please"
+    _assert_usage(events["done"]["context_tokens"])
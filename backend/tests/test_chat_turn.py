@@ -0,0 +1,158 @@
+"""ChatTurn persistence: one transaction per save, messages numbered in order."""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.config import settings
+from app.core.keyed_lock import conversation_locks
+from app.database import ConversationDB, ConversationMessageDB
+from app.db import AsyncSessionLocal, SessionLocal
+from app.services.conversation import AsyncConversationService, ChatTurn
+
+
+async def _messages(conversation_id):
+    async with AsyncSessionLocal() as db:
+        service = AsyncConversationService(db)
+        return await service.get_messages(conversation_id), await service.count_messages(conversation_id)
+
+
+def test_user_message_committed_before_reply():
+    conversation_id = str(uuid.uuid4())
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            turn = ChatTurn(conversation_id, is_new=True)
+            turn.add_message(role="user", content="What is on my calendar?")
+            await turn.save(db)
+            # The agent runs here; the user message is already durable
+            after_user, _ = await _messages(conversation_id)
+
+            turn.add_message(role="assistant", content="Two meetings.", tool_used="calendar")
+            await turn.save(db)
+        return after_user, await _messages(conversation_id)
+
+    after_user, (messages, count) = asyncio.run(run())
+
+    assert [m.content for m in after_user] == ["What is on my calendar?"]
+    assert [(m.role, m.content, m.tool_used) for m in messages] == [
+        ("user", "What is on my calendar?", None),
+        ("assistant", "Two meetings.", "calendar"),
+    ]
+    assert count == 2
+
+
+def test_turns_append_after_existing_messages():
+    conversation_id = str(uuid.uuid4())
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            for i in range(3):
+                turn = ChatTurn(conversation_id, is_new=(i == 0))
+                turn.add_message(role="user", content=f"question {i}")
+                await turn.save(db)
+                turn.add_message(role="assistant", content=f"answer {i}")
+                await turn.save(db)
+        return await _messages(conversation_id)
+
+    messages, count = asyncio.run(run())
+
+    assert [m.content for m in messages] == [
+        "question 0", "answer 0", "question 1", "answer 1", "question 2", "answer 2",
+    ]
+    assert count == 6
+
+
+def test_save_without_messages_is_a_no_op():
+    conversation_id = str(uuid.uuid4())
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            turn = ChatTurn(conversation_id, is_new=True)
+            turn.add_message(role="user", content="hello")
+            await turn.save(db)
+            await turn.save(db)
+        return await _messages(conversation_id)
+
+    messages, count = asyncio.run(run())
+
+    assert len(messages) == 1
+    assert count == 1
+
+
+def _append_from_other_worker(conversation_id, content):
+    """Append a message through a separate connection, as another process would."""
+    with SessionLocal() as other:
+        db_conv = other.get(ConversationDB, conversation_id)
+        other.add(
+            ConversationMessageDB(
+                id=str(uuid.uuid4()),
+                conversation_id=conversation_id,
+                seq=db_conv.message_count,
+                role="user",
+                content=content,
+            )
+        )
+        db_conv.message_count += 1
+        other.commit()
+
+
+def test_concurrent_writer_triggers_retry_and_renumbering():
+    conversation_id = str(uuid.uuid4())
+    conflicts_before = conversation_locks.conflicts
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            turn = ChatTurn(conversation_id, is_new=True)
+            turn.add_message(role="user", content="first")
+            await turn.save(db)
+
+            interleaved = []
+
+            @event.listens_for(db.sync_session, "before_flush")
+            def interleave(session, flush_context, instances):
+                # Another worker commits between our read and our write, once
+                if not interleaved:
+                    interleaved.append(True)
+                    _append_from_other_worker(conversation_id, "from another worker")
+
+            turn.add_message(role="assistant", content="reply")
+            await turn.save(db)
+            event.remove(db.sync_session, "before_flush", interleave)
+        return await _messages(conversation_id)
+
+    messages, count = asyncio.run(run())
+
+    assert [m.content for m in messages] == ["first", "from another worker", "reply"]
+    assert count == 3
+    assert conversation_locks.conflicts == conflicts_before + 1
+
+
+def test_retries_exhausted_raises(monkeypatch):
+    conversation_id = str(uuid.uuid4())
+    monkeypatch.setattr(settings, "conversation_save_retries", 1)
+    unresolved_before = conversation_locks.conflicts_unresolved
+
+    async def run():
+        async with AsyncSessionLocal() as db:
+            turn = ChatTurn(conversation_id, is_new=True)
+            turn.add_message(role="user", content="first")
+            await turn.save(db)
+
+            @event.listens_for(db.sync_session, "before_flush")
+            def interleave(session, flush_context, instances):
+                _append_from_other_worker(conversation_id, "from another worker")
+
+            turn.add_message(role="assistant", content="reply")
+            try:
+                await turn.save(db)
+            finally:
+                event.remove(db.sync_session, "before_flush", interleave)
+
+    with pytest.raises((StaleDataError, IntegrityError)):
+        asyncio.run(run())
+    assert conversation_locks.conflicts_unresolved == unresolved_before + 1
@@ -0,0 +1,88 @@
+"""TextChunker: sentence packing, overlap between chunks and long sentences."""
+
+import pytest
+
+from app.memory.chunker import TextChunker
+
+
+class WordCounter:
+    """One token per word, so chunk sizes are easy to reason about."""
+
+    def count(self, text):
+        return len(text.split())
+
+
+def _document(sentences):
+    return " ".join(f"Sentence {i} has five words." for i in range(sentences))
+
+
+def _chunker(chunk_tokens, overlap_tokens):
+    return TextChunker(chunk_tokens, overlap_tokens, counter=WordCounter())
+
+
+def test_chunks_are_exact_slices_within_budget():
+    text = _document(9)
+    chunks = _chunker(12, 5).split(text)
+
+    assert [chunk.seq for chunk in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert chunk.text == text[chunk.start:chunk.end]
+        assert chunk.token_count == len(chunk.text.split()) <= 12
+        assert chunk.text.startswith("Sentence") and chunk.text.endswith(".")
+    assert chunks[0].start == 0
+    assert chunks[-1].end == len(text)
+
+
+def test_consecutive_chunks_share_the_trailing_sentence():
+    text = _document(6)
+    chunks = _chunker(10, 5).split(text)
+
+    # Two sentences per chunk; each chunk starts with the last sentence of the previous one
+    assert [chunk.text.count(".") for chunk in chunks] == [2] * 5
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_sentence_start = text.rindex("Sentence", previous.start, previous.end)
+        assert chunk.start == last_sentence_start
+        assert chunk.start < previous.end
+
+
+def test_overlap_smaller_than_a_sentence_carries_nothing():
+    text = _document(6)
+    chunks = _chunker(10, 4).split(text)
+
+    assert len(chunks) == 3
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start > previous.end
+
+
+def test_overlap_is_capped_at_half_a_chunk():
+    chunker = _chunker(10, 50)
+    assert chunker.overlap_tokens == 5
+
+    chunks = chunker.split(_document(6))
+    # With a full-chunk overlap no chunk would ever advance
+    assert all(b.start > a.start for a, b in zip(chunks, chunks[1:]))
+    assert chunks[-1].text.endswith("Sentence 5 has five words.")
+
+
+def test_long_sentence_is_cut_on_word_boundaries():
+    words = [f"word{i}" for i in range(25)]
+    text = " ".join(words) + "."
+    chunks = _chunker(10, 0).split(text)
+
+    assert [chunk.token_count for chunk in chunks] == [10, 10, 5]
+    assert " ".join(chunk.text for chunk in chunks) == text
+    for chunk in chunks:
+        assert text[chunk.start - 1:chunk.start].strip() == ""
+        assert text[chunk.end:chunk.end + 1].strip() == ""
+
+
+def test_blank_line_ends_a_sentence():
+    text = "Heading without a period\n\nBody text follows here."
+    chunks = _chunker(5, 0).split(text)
+
+    assert [chunk.text for chunk in chunks] == ["Heading without a period", "Body text follows here."]
+
+
+def test_chunk_tokens_must_be_positive():
+    with pytest.raises(ValueError):
+        TextChunker(0)
@@ -0,0 +1,120 @@
+"""Keyword, vector and hybrid retrieval of knowledge chunks."""
+
+import asyncio
+import hashlib
+import logging
+import re
+
+import numpy as np
+import pytest
+
+from app.db import AsyncSessionLocal, SessionLocal
+from app.services import knowledge_search
+from app.services.knowledge import KnowledgeService
+from app.services.knowledge_search import KnowledgeSearchService, lexical_terms
+from app.services.rag_registry import rag_registry
+from app.services.vector_db import RAGService, VectorStore
+
+DIMENSION = 32
+
+DOCUMENTS = {
+    "Industrials": "GE reported steady turbine orders and a larger services backlog.",
+    "Utilities": "Regional utilities raised capital spending on grid upgrades this quarter.",
+    "Retail": "Retail chains expect softer holiday margins after heavy discounting.",
+}
+
+
+class WordHashEmbedding:
+    """Stand-in embedding model: hashed words of three or more letters.
+
+    Like a real sentence embedding it carries no signal for short tickers,
+    so only the keyword stage can find "GE".
+    """
+
+    def embed(self, text):
+        vector = np.zeros(DIMENSION, dtype="float32")
+        vector[0] = 1.0
+        for word in re.findall(r"[a-z]{3,}", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % (DIMENSION - 1) + 1] += 1.0
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_batch(self, texts, batch_size=32):
+        return [self.embed(text) for text in texts]
+
+
+@pytest.fixture
+def rag(tmp_path, monkeypatch):
+    """RAG service over a fresh store, installed as the shared one, with DOCUMENTS uploaded."""
+    rag = RAGService(VectorStore(DIMENSION, str(tmp_path / "faiss.index")), WordHashEmbedding())
+    monkeypatch.setattr(rag_registry, "get_rag_service", lambda: rag)
+    monkeypatch.setattr(rag_registry, "get_vector_store", lambda: rag.vector_store)
+
+    with SessionLocal() as db:
+        service = KnowledgeService(db)
+        doc_ids = [service.add_document(title, content).id for title, content in DOCUMENTS.items()]
+    yield rag
+    with SessionLocal() as db:
+        service = KnowledgeService(db)
+        for doc_id in doc_ids:
+            service.delete_document(doc_id)
+    rag.vector_store.close()
+
+
+def test_lexical_terms_keep_short_identifiers():
+    assert lexical_terms("What about GE?") == ["about", "ge"]
+    assert lexical_terms("AI and T or F") == ["ai", "t", "f"]
+    assert lexical_terms("error E42 in a log") == ["error", "e42", "log"]
+    assert lexical_terms("is it on the") == []
+
+
+@pytest.mark.parametrize("mode", ["hybrid", "lexical"])
+def test_two_letter_ticker_ranks_its_chunk_first(rag, mode):
+    # min_score=0 keeps every chunk a dense candidate, so the ticker match decides
+    async def search():
+        async with AsyncSessionLocal() as db:
+            return await KnowledgeSearchService(db, rag).search(
+                "What about GE?", k=3, mode=mode, min_score=0.0
+            )
+
+    hits, _ = asyncio.run(search())
+
+    assert hits
+    assert hits[0].title == "Industrials"
+    assert "GE reported" in hits[0].text
+
+
+def test_rag_service_hybrid_retrieval_finds_ticker(rag):
+    results = rag.retrieve("What about GE?", k=3, min_score=0.0, mode="hybrid")
+
+    assert results
+    assert results[0][2]["title"] == "Industrials"
+
+
+def test_rag_service_rejects_unknown_mode(rag):
+    with pytest.raises(ValueError):
+        rag.retrieve("GE", mode="lexical")
+
+
+def test_rag_service_reports_stage_timings(rag):
+    timings = {}
+    rag.retrieve("What about GE?", k=3, min_score=0.0, mode="hybrid", timings=timings)
+
+    for stage in ("embed_ms", "vector_ms", "lexical_ms", "fusion_ms", "total_ms"):
+        assert timings[stage] >= 0
+    assert timings["mode"] == "hybrid"
+    assert timings["vector_candidates"] == 3
+    assert timings["lexical_candidates"] == 1
+
+
+def test_rag_service_falls_back_to_vectors_when_keyword_search_fails(rag, monkeypatch, caplog):
+    def unavailable(db, query, limit):
+        raise RuntimeError("index missing")
+
+    monkeypatch.setattr(knowledge_search, "search_chunks_lexical", unavailable)
+    timings = {}
+    with caplog.at_level(logging.WARNING, logger="app.services.vector_db"):
+        results = rag.retrieve("What about GE?", k=3, min_score=0.0, mode="hybrid", timings=timings)
+
+    assert len(results) == 3
+    assert timings["lexical_error"] == "index missing"
+    assert "Keyword retrieval unavailable" in caplog.text
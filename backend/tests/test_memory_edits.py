@@ -0,0 +1,115 @@
+"""Structured memory edits: bullet and section operations on markdown files."""
+
+import pytest
+
+from app.services.memory_edits import MemoryEdit, apply_edit, apply_edits
+from app.services.persistent_memory import PersistentMemoryService
+
+MEMORY = """# Memory
+
+## Preferences
+- Prefers **dark mode**
+- Drinks coffee black
+
+## Projects
+- Building a garden shed
+"""
+
+
+def _edit(**data):
+    edit = MemoryEdit.from_dict(data)
+    assert edit is not None
+    return edit
+
+
+def test_replace_bullet_round_trip():
+    replaced, changed = apply_edit(
+        MEMORY, _edit(op="replace_bullet", file="memory.md", old="prefers dark mode", text="Prefers light mode")
+    )
+    assert changed
+    assert "- Prefers light mode" in replaced
+    assert "dark mode" not in replaced
+
+    restored, changed = apply_edit(
+        replaced, _edit(op="replace_bullet", file="memory.md", old="- Prefers light mode", text="Prefers **dark mode**")
+    )
+    assert changed
+    assert restored == MEMORY
+
+
+def test_delete_bullet_then_add_it_back():
+    deleted, changed = apply_edit(MEMORY, _edit(op="delete_bullet", file="memory.md", old="coffee black"))
+    assert changed
+    assert "coffee" not in deleted
+    assert "## Preferences\n- Prefers **dark mode**\n\n## Projects" in deleted
+
+    restored, changed = apply_edit(
+        deleted, _edit(op="add_bullet", file="memory.md", section="Preferences", text="Drinks coffee black")
+    )
+    assert changed
+    assert restored == MEMORY
+
+
+@pytest.mark.parametrize(
+    "op, old",
+    [
+        ("delete_bullet", "tea with milk"),  # No such bullet
+        ("replace_bullet", "Prefers"),  # Ambiguous: two bullets contain it
+    ],
+)
+def test_unmatched_bullet_leaves_content_unchanged(op, old):
+    content = MEMORY + "- Prefers window seats\n"
+    result, changed = apply_edit(content, _edit(op=op, file="memory.md", old=old, text="x"))
+    assert not changed
+    assert result == content
+
+
+def test_bullet_inside_misquoted_old_is_not_matched():
+    content = "## Notes\n- Python\n- Deadline is Friday\n"
+    old = "Migrated the billing service from Python 2 to Go"
+
+    for op in ("delete_bullet", "replace_bullet"):
+        result, changed = apply_edit(content, _edit(op=op, file="memory.md", old=old, text="Uses Go"))
+        assert not changed
+        assert result == content
+    assert apply_edits(content, [_edit(op="delete_bullet", file="memory.md", old=old)]) == (content, 0)
+
+
+def test_apply_edits_counts_changes():
+    edits = [
+        _edit(op="delete_bullet", file="memory.md", old="Building a garden shed"),
+        _edit(op="delete_bullet", file="memory.md", old="Building a garden shed"),
+        _edit(op="add_bullet", file="memory.md", section="Projects", text="Learning Spanish"),
+    ]
+    content, applied = apply_edits(MEMORY, edits)
+    assert applied == 2
+    assert content.endswith("## Projects\n- Learning Spanish\n")
+
+
+def test_malformed_edits_are_rejected():
+    assert MemoryEdit.from_dict({"op": "replace_bullet", "file": "memory.md", "old": "x"}) is None
+    assert MemoryEdit.from_dict({"op": "delete_bullet", "file": "memory.md"}) is None
+    assert MemoryEdit.from_dict({"op": "rename", "file": "memory.md", "old": "x"}) is None
+
+
+def test_service_applies_edits_to_files(tmp_path):
+    service = PersistentMemoryService()
+    service.base_path = tmp_path
+    service.history_path = tmp_path / ".history"
+    service.lock_path = tmp_path / ".memory.lock"
+    (tmp_path / "memory.md").write_text(MEMORY, encoding="utf-8")
+
+    applied = service.apply_edits(
+        [
+            _edit(op="replace_bullet", file="memory.md", old="coffee black", text="Drinks green tea"),
+            _edit(op="delete_bullet", file="memory.md", old="garden shed"),
+            _edit(op="delete_bullet", file="unknown.md", old="anything"),
+        ]
+    )
+
+    assert applied == 2
+    content = (tmp_path / "memory.md").read_text(encoding="utf-8")
+    assert "- Drinks green tea" in content
+    assert "garden shed" not in content
+    # The previous version is kept in the history
+    assert [path.read_text(encoding="utf-8") for path in service.history_path.iterdir()] == [MEMORY]
@@ -0,0 +1,86 @@
+"""Memory update queue: analysis results and failures are counted."""
+
+import asyncio
+import logging
+
+from app.services import persistent_memory
+from app.services.memory_updates import MemoryUpdateQueue
+from app.services.persistent_memory import PersistentMemoryService
+
+FACT = "I prefer dark mode"
+
+
+class FakeMemoryService:
+    """Records analyzed batches; returns a fixed edit count or raises."""
+
+    def __init__(self, applied=0, error=None):
+        self.applied = applied
+        self.error = error
+        self.batches = []
+
+    async def analyze_turns(self, turns):
+        self.batches.append(turns)
+        if self.error:
+            raise self.error
+        return self.applied
+
+
+def _run(queue, *messages):
+    async def run():
+        for message in messages:
+            queue.submit("conversation", message, "Noted.")
+        await queue.flush_all()
+
+    asyncio.run(run())
+
+
+def test_applied_edits_are_counted_and_logged(caplog):
+    service = FakeMemoryService(applied=2)
+    queue = MemoryUpdateQueue(service, debounce_seconds=60)
+
+    with caplog.at_level(logging.INFO, logger="app.services.memory_updates"):
+        _run(queue, FACT, "My timezone is CET")
+
+    assert len(service.batches) == 1
+    stats = queue.stats()
+    assert stats["executed"] == 1
+    assert stats["edits_applied"] == 2
+    assert stats["failed"] == 0
+    assert "applied 2 edits" in caplog.text
+
+
+def test_failed_analysis_is_counted_and_logged(caplog):
+    queue = MemoryUpdateQueue(FakeMemoryService(error=RuntimeError("model unavailable")), debounce_seconds=60)
+
+    with caplog.at_level(logging.WARNING, logger="app.services.memory_updates"):
+        _run(queue, FACT)
+
+    assert queue.stats()["failed"] == 1
+    assert queue.stats()["edits_applied"] == 0
+    assert "model unavailable" in caplog.text
+
+
+def test_analyze_turns_returns_edits_applied(tmp_path, monkeypatch, capsys):
+    class FakeLLM:
+        def __init__(self, **kwargs):
+            pass
+
+        async def generate_structured(self, prompt):
+            return {
+                "edits": [
+                    {"op": "add_bullet", "file": "user_info.md", "section": "Preferences", "text": "Prefers dark mode"},
+                    {"op": "delete_bullet", "file": "memory.md", "old": "no such bullet"},
+                ]
+            }
+
+    monkeypatch.setattr(persistent_memory, "AsyncGroqLLM", FakeLLM)
+    service = PersistentMemoryService()
+    service.base_path = tmp_path
+    service.history_path = tmp_path / ".history"
+    service.lock_path = tmp_path / ".memory.lock"
+
+    applied = asyncio.run(service.analyze_turns([(FACT, "Noted.")]))
+
+    assert applied == 1
+    assert "- Prefers dark mode" in (tmp_path / "user_info.md").read_text(encoding="utf-8")
+    assert capsys.readouterr().out == ""
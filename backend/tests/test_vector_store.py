@@ -0,0 +1,145 @@
+"""VectorStore durability: snapshot plus append-only log."""
+
+import os
+
+import numpy as np
+import pytest
+
+from app.services.vector_db import VectorStore
+from app.services.vector_index import IndexConfig
+
+DIMENSION = 8
+
+
+def _vectors(count, seed=0):
+    return np.random.default_rng(seed).random((count, DIMENSION), dtype=np.float32).tolist()
+
+
+def _open(path, **kwargs):
+    # No automatic snapshots; each test decides when to compact
+    kwargs.setdefault("compact_log_bytes", 1 << 30)
+    kwargs.setdefault("tombstone_ratio", 1.0)
+    return VectorStore(
+        DIMENSION,
+        str(path / "faiss.index"),
+        fsync=False,
+        index_config=IndexConfig(index_type="flat"),
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = _open(tmp_path)
+    yield store
+    if store._log is not None:
+        store._log.close()
+
+
+def _crash(store):
+    """Drop the store without close(): no snapshot, only what the log holds."""
+    store._log.close()
+    store._log = None
+
+
+def test_log_replay_after_unclean_shutdown(tmp_path, store):
+    texts = [f"doc {i}" for i in range(5)]
+    ids = store.add_documents(texts, _vectors(5), [{"id": f"d{i}"} for i in range(5)])
+    store.delete_vectors([ids[1]])
+    _crash(store)
+
+    reopened = _open(tmp_path)
+
+    assert reopened.documents == {i: texts[i] for i in ids if i != ids[1]}
+    assert reopened.metadata[str(ids[3])] == {"id": "d3"}
+    assert reopened.next_id == 5
+    assert "d1" not in [metadata["id"] for _, _, metadata in reopened.search(_vectors(5)[1], k=5)]
+    assert reopened.add_documents(["doc 5"], _vectors(1, seed=1)) == [5]
+    reopened.close()
+
+
+def test_torn_final_record_is_dropped(tmp_path, store):
+    store.add_documents(["kept"], _vectors(1))
+    _crash(store)
+    intact_bytes = os.path.getsize(tmp_path / "faiss.log")
+    with open(tmp_path / "faiss.log", "ab") as f:
+        f.write(b'{"op": "add", "start": 1, "documents": ["to')
+
+    reopened = _open(tmp_path)
+
+    assert reopened.documents == {0: "kept"}
+    assert os.path.getsize(tmp_path / "faiss.log") == intact_bytes
+    assert reopened.add_documents(["next"], _vectors(1, seed=1)) == [1]
+    _crash(reopened)
+
+    again = _open(tmp_path)
+    assert again.documents == {0: "kept", 1: "next"}
+    again.close()
+
+
+def test_replay_on_top_of_snapshot(tmp_path, store):
+    store.add_documents(["a", "b"], _vectors(2))
+    store.compact()
+    assert store.log_bytes() == 0
+    store.add_documents(["c"], _vectors(1, seed=1))
+    store.delete_vectors([0])
+    _crash(store)
+
+    reopened = _open(tmp_path)
+
+    assert reopened.documents == {1: "b", 2: "c"}
+    assert reopened.index.ntotal - len(reopened.tombstones) == 2
+    reopened.close()
+
+
+def test_tombstones_hidden_then_purged_by_compaction(tmp_path):
+    store = _open(tmp_path, tombstone_ratio=0.5)
+    vectors = _vectors(10)
+    ids = store.add_documents([f"doc {i}" for i in range(10)], vectors, [{"id": f"d{i % 5}"} for i in range(10)])
+
+    # Below the ratio: deleted vectors stay in the index but are never returned
+    assert store.delete_by_document("d0") == 2
+    assert store.tombstones == {0, 5}
+    assert store.index.ntotal == 10
+    assert {0, 5}.isdisjoint(store.documents)
+    assert "d0" not in [metadata["id"] for _, _, metadata in store.search(vectors[0], k=10)]
+
+    # Reaching the ratio starts a background compaction that drops them
+    assert store.delete_vectors([1, 2, 3]) == 3
+    store._compaction.join()
+    assert store.tombstones == set()
+    assert store.index.ntotal == 5
+    assert store.delete_vectors([1]) == 0
+
+    # Ids are stable: the survivors keep theirs and new ids are never reused
+    results = store.search(vectors[7], k=1)
+    assert results[0][0] == "doc 7"
+    assert store.add_documents(["doc 10"], _vectors(1, seed=1)) == [10]
+    store.close()
+
+    reopened = _open(tmp_path)
+    assert sorted(reopened.documents) == [4, 6, 7, 8, 9, 10]
+    assert reopened.tombstones == set()
+    assert reopened.index.ntotal == 6
+    assert reopened.vector_ids("d2") == [7]
+    reopened.close()
+
+
+def test_hnsw_purge_rebuilds_without_deleted_vectors(tmp_path):
+    store = VectorStore(
+        DIMENSION,
+        str(tmp_path / "faiss.index"),
+        compact_log_bytes=1 << 30,
+        fsync=False,
+        tombstone_ratio=1.0,
+        index_config=IndexConfig(index_type="hnsw"),
+    )
+    vectors = _vectors(50)
+    store.add_documents([f"doc {i}" for i in range(50)], vectors)
+    store.delete_vectors(list(range(0, 50, 2)))
+
+    assert store.purge_tombstones() == 25
+    assert store.tombstones == set()
+    assert store.index.ntotal == 25
+    assert store.search(vectors[11], k=1)[0][0] == "doc 11"
+    store.close()
@@ -0,0 +1,119 @@
+"""Benchmark concurrent chat write throughput with and without the SQLite profile.
+
+Simulates several gunicorn workers (processes), each with a few request
+threads, persisting chat turns (user + assistant message) into a fresh
+SQLite file. Runs once with SQLAlchemy defaults (rollback journal) and once
+with the tuned profile from app.db (WAL, synchronous=NORMAL, busy_timeout,
+mmap, cache, pool).
+
+Usage:
+    python bench_db.py [--workers 4] [--threads 4] [--turns 50]
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add backend to path
+sys.path.append(os.path.abspath("backend"))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.db import create_db_engine
+from app.services.conversation import ConversationService
+
+
+def _make_engine(url: str, tuned: bool):
+    if tuned:
+        return create_db_engine(url)
+    # What db.py did before the profile existed
+    return create_engine(url, connect_args={"check_same_thread": False})
+
+
+def _worker(url: str, tuned: bool, threads: int, turns: int, results) -> None:
+    engine = _make_engine(url, tuned)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    written = 0
+    errors = 0
+    lock = threading.Lock()
+
+    def run_thread():
+        nonlocal written, errors
+        db = Session()
+        try:
+            service = ConversationService(db)
+            conversation = service.create_conversation()
+            for i in range(turns):
+                try:
+                    service.add_message(conversation.id, "user", f"question {i}")
+                    service.add_message(conversation.id, "assistant", f"answer {i} " * 20)
+                    with lock:
+                        written += 2
+                except Exception as e:
+                    db.rollback()
+                    with lock:
+                        errors += 1
+                        first_error = errors == 1
+                    if first_error:
+                        print(f"  write failed: {e.__class__.__name__}: {str(e)[:80]}")
+        finally:
+            db.close()
+
+    pool = [threading.Thread(target=run_thread) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    engine.dispose()
+    results.put((written, errors))
+
+
+def run(tuned: bool, workers: int, threads: int, turns: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        setup_engine = _make_engine(url, tuned)
+        Base.metadata.create_all(bind=setup_engine)
+        setup_engine.dispose()
+
+        results = multiprocessing.Queue()
+        procs = [
+            multiprocessing.Process(target=_worker, args=(url, tuned, threads, turns, results))
+            for _ in range(workers)
+        ]
+        start = time.perf_counter()
+        for p in procs:
+            p.start()
+        totals = [results.get() for _ in procs]
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        written = sum(w for w, _ in totals)
+        errors = sum(e for _, e in totals)
+        label = "tuned  " if tuned else "default"
+        print(
+            f"{label}: {written} messages in {elapsed:.2f}s "
+            f"-> {written / elapsed:.0f} msg/s, {errors} failed turns"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4, help="Processes (gunicorn workers)")
+    parser.add_argument("--threads", type=int, default=4, help="Concurrent requests per worker")
+    parser.add_argument("--turns", type=int, default=50, help="Chat turns per request thread")
+    args = parser.parse_args()
+
+    print(f"--- {args.workers} workers x {args.threads} threads x {args.turns} turns ---")
+    run(False, args.workers, args.threads, args.turns)
+    run(True, args.workers, args.threads, args.turns)
+
+
+if __name__ == "__main__":
+    main()
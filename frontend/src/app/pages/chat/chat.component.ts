@@ -10,6 +10,17 @@ interface ChatMessage {
   created_at: string;
 }
 
+interface ConversationPage {
+  conversations: { conversation_id: string; snippet: string | null; message_count: number }[];
+  next_cursor: string | null;
+}
+
+interface MessagePage {
+  conversation_id: string;
+  messages: ChatMessage[];
+  next_before: number | null;
+}
+
 interface ChatResponse {
   conversation_id: string;
   agent_id: string;
@@ -52,6 +63,9 @@ interface ChatResponse {
               </button>
             </div>
           }
+          @if (conversationsCursor()) {
+            <button class="btn-ghost load-more" (click)="loadMoreConversations()">Load more</button>
+          }
         </div>
       </div>
 
@@ -81,6 +95,10 @@ interface ChatResponse {
 
         <!-- Messages area -->
         <div class="chat-messages" #messagesContainer>
+          @if (messagesBefore() !== null) {
+            <button class="btn-ghost load-more" (click)="loadEarlierMessages()">Load earlier messages</button>
+          }
+
           @if (messages().length === 0) {
             <div class="chat-welcome">
               <div class="welcome-icon">
@@ -240,6 +258,12 @@ interface ChatResponse {
       transition: all var(--transition-fast);
     }
 
+    .load-more {
+      width: 100%;
+      justify-content: center;
+      font-size: 0.8rem;
+    }
+
     .conv-item:hover { background: var(--bg-surface); color: var(--text-primary); }
     .conv-item.active { background: var(--accent-primary-dim); color: var(--accent-primary); }
 
@@ -679,6 +703,8 @@ export class ChatComponent implements OnInit {
   isMobile = signal(false);
   private lastMobileState: boolean | null = null;
   conversations = signal<{ id: string; preview: string; messageCount: number }[]>([]);
+  conversationsCursor = signal<string | null>(null);
+  messagesBefore = signal<number | null>(null);
 
   constructor() {
     effect(() => {
@@ -703,13 +729,10 @@ export class ChatComponent implements OnInit {
       // Fetch existing conversations
       const res = await fetch('/api/chat/conversations');
       if (res.ok) {
-        const data = await res.json();
-        const mapped = data.map((c: any) => ({
-          id: c.conversation_id,
-          preview: c.messages && c.messages.length > 0 ? c.messages[c.messages.length - 1].content.substring(0, 40) : 'New Chat',
-          messageCount: c.messages ? c.messages.length : 0
-        }));
+        const data = (await res.json()) as ConversationPage;
+        const mapped = this.mapConversations(data);
         this.conversations.set(mapped);
+        this.conversationsCursor.set(data.next_cursor);
 
         if (mapped.length > 0) {
           // Switch to the most recent conversation (first in list)
@@ -728,6 +751,28 @@ export class ChatComponent implements OnInit {
     }
   }
 
+  private mapConversations(page: ConversationPage): { id: string; preview: string; messageCount: number }[] {
+    return page.conversations.map(c => ({
+      id: c.conversation_id,
+      preview: c.snippet ? c.snippet.substring(0, 40) : 'New Chat',
+      messageCount: c.message_count,
+    }));
+  }
+
+  async loadMoreConversations(): Promise<void> {
+    const cursor = this.conversationsCursor();
+    if (!cursor) return;
+    try {
+      const res = await fetch(`/api/chat/conversations?cursor=${encodeURIComponent(cursor)}`);
+      if (!res.ok) throw new Error('Failed to load conversations');
+      const data = (await res.json()) as ConversationPage;
+      this.conversations.set([...this.conversations(), ...this.mapConversations(data)]);
+      this.conversationsCursor.set(data.next_cursor);
+    } catch (err) {
+      this.error.set(err instanceof Error ? err.message : 'Failed to load conversations');
+    }
+  }
+
   async newConversation(): Promise<void> {
     try {
       const res = await fetch('/api/chat/conversations', { method: 'POST' });
@@ -735,6 +780,7 @@ export class ChatComponent implements OnInit {
       const data = await res.json();
       this.conversationId.set(data.conversation_id);
       this.messages.set([]);
+      this.messagesBefore.set(null);
       this.messageText = '';
       this.error.set(null);
 
@@ -752,10 +798,11 @@ export class ChatComponent implements OnInit {
   async switchConversation(id: string): Promise<void> {
     try {
       this.conversationId.set(id);
-      const res = await fetch(`/api/chat/conversations/${id}`);
+      const res = await fetch(`/api/chat/conversations/${id}/messages?limit=50`);
       if (!res.ok) throw new Error('Failed to load conversation');
-      const data = await res.json();
+      const data = (await res.json()) as MessagePage;
       this.messages.set(data.messages || []);
+      this.messagesBefore.set(data.next_before);
       if (this.isMobile()) {
         this.showConversations.set(false);
       }
@@ -764,6 +811,21 @@ export class ChatComponent implements OnInit {
     }
   }
 
+  async loadEarlierMessages(): Promise<void> {
+    const id = this.conversationId();
+    const before = this.messagesBefore();
+    if (!id || before === null) return;
+    try {
+      const res = await fetch(`/api/chat/conversations/${id}/messages?limit=50&before=${before}`);
+      if (!res.ok) throw new Error('Failed to load messages');
+      const data = (await res.json()) as MessagePage;
+      this.messages.set([...data.messages, ...this.messages()]);
+      this.messagesBefore.set(data.next_before);
+    } catch (err) {
+      this.error.set(err instanceof Error ? err.message : 'Failed to load messages');
+    }
+  }
+
   async deleteConversation(id: string): Promise<void> {
     if (!confirm('Are you sure you want to delete this conversation?')) return;
 
@@ -813,14 +875,16 @@ export class ChatComponent implements OnInit {
       }
 
       const data = (await res.json()) as ChatResponse;
-      this.messages.set(data.messages);
+      // Keep already loaded history and append the new turn
+      const known = new Set(this.messages().map(m => m.id));
+      this.messages.set([...this.messages(), ...data.messages.filter(m => !known.has(m.id))]);
 
       // Update conversation preview
       const convs = this.conversations();
       const idx = convs.findIndex(c => c.id === this.conversationId());
       if (idx >= 0) {
         convs[idx].preview = userMessage.substring(0, 40);
-        convs[idx].messageCount = data.messages.length;
+        convs[idx].messageCount += 2;
         this.conversations.set([...convs]);
       }
     } catch (err) {
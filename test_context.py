@@ -32,7 +32,7 @@ def test_chat_context():
 
         # 4. Check if we can list it
         res = requests.get(f"{BASE_URL}/chat/conversations")
-        print(f"\nList Conversations: Found {len(res.json())} sessions")
+        print(f"\nList Conversations: Found {len(res.json()['conversations'])} sessions")
 
     except Exception as e:
         print(f"Chat Context Test failed: {e}")